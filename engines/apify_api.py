@@ -4,6 +4,7 @@ try:
 except Exception:  # pragma: no cover - allow discovery without the dependency installed
     ApifyClient = None  # type: ignore[assignment]
 from .base import Scraper, ScrapeResult
+from .shared.body import utf8_len
 from dotenv import load_dotenv
 import logging
 from datetime import datetime
@@ -16,6 +17,8 @@ class ApifyAPIScraper(Scraper):
     """
     Scraper implementation for Apify API using the apify/web-scraper actor and the official Apify Python client.
     """
+    timeout = 120
+
     def __init__(self):
         self.api_token = os.getenv("APIFY_API_TOKEN")
         if ApifyClient is None:
@@ -52,7 +55,7 @@ class ApifyAPIScraper(Scraper):
                       }
                     """
                 },
-                timeout_secs=120  # Wait up to 2 minutes
+                timeout_secs=int(self.timeout)  # Wait up to 2 minutes by default
             )
             if run_result is None:
                 error = "Actor run failed."
@@ -63,7 +66,7 @@ class ApifyAPIScraper(Scraper):
                 if items and "html" in items[0]:
                     html = items[0]["html"] or ""
                     status_code = items[0].get("status_code")
-                    content_size = len(html.encode("utf-8")) if html else 0
+                    content_size = utf8_len(html)
                 else:
                     error = "No HTML found in Apify dataset result."
         except Exception as e:
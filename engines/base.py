@@ -1,4 +1,4 @@
-from typing import Protocol, Union, Awaitable, TypedDict, Optional, runtime_checkable, Literal
+from typing import Any, Dict, Protocol, Union, Awaitable, TypedDict, Optional, runtime_checkable, Literal
 
 class ScrapeResult(TypedDict, total=False):
     scraper: Literal[
@@ -52,6 +52,21 @@ class ScrapeResult(TypedDict, total=False):
     format: Literal["markdown", "text", "html"]
     content_size: int
     content: Optional[str]
+    timed_out: bool
+    # Body hit the --max-body-bytes cap; content holds the first content_size bytes
+    truncated: bool
+    # Engine-specific per-page measurements (e.g. Playwright profile, bytes transferred); averaged in the summary
+    engine_stats: Dict[str, Any]
+
+# Optional class attributes read by ScrapeEngine (kept off the Protocol so
+# issubclass() checks keep working):
+#   self_hosted = True  -> engine fetches target sites itself; per-host politeness applies
+#   timeout = <seconds> -> engine's own request/process timeout; overridden by --task-timeout
+#   resource_class = "browser" | "cpu" | "network" (default) -> how run_all.py budgets
+#       memory/CPU for the engine; read statically, so it must be a plain string literal
+#   batch_mode = True with `async def scrape_many(urls, run_id)` yielding (index into urls,
+#       ScrapeResult) -> ScrapeEngine hands the engine the whole task list instead of calling
+#       scrape() per URL; results are delivered in the order they are yielded
 
 @runtime_checkable
 class Scraper(Protocol):
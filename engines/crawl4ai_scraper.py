@@ -1,8 +1,11 @@
 from .base import Scraper, ScrapeResult
+from .shared.body import cap_text
+from .shared.browser_cache import browser_cache_from_env
+from .shared.browser_farm import farm_url, lease_browser_async
 from datetime import datetime
 import sys
 import os
-from contextlib import contextmanager
+from contextlib import AsyncExitStack, contextmanager
 from crawl4ai import AsyncWebCrawler
 from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
 
@@ -10,6 +13,13 @@ class Crawl4AIScraper(Scraper):
     """
     Scrapes web pages using the local Crawl4AI library (headless browser).
     """
+    self_hosted = True
+    resource_class = "browser"
+    timeout = 60
+
+    def __init__(self):
+        self.cache = browser_cache_from_env("crawl4ai_scraper")
+
     def check_environment(self) -> bool:
         try:
             # Try to instantiate the crawler (will fail if setup is missing)
@@ -34,11 +44,23 @@ class Crawl4AIScraper(Scraper):
     async def scrape(self, url: str, run_id: str) -> ScrapeResult:
         try:
 
-            browser_config = BrowserConfig(verbose=False)
-            with self.suppress_output():
-                async with AsyncWebCrawler(config=browser_config) as crawler:
-                    result = await crawler.arun(url=url, config=CrawlerRunConfig())
-            content_size = len(result.html.encode('utf-8')) if result.html else 0
+            async with AsyncExitStack() as stack:
+                if farm_url() is not None:
+                    # Connect to a leased farm browser over CDP instead of launching one
+                    lease = await stack.enter_async_context(lease_browser_async("crawl4ai_scraper", self.timeout))
+                    browser_config = BrowserConfig(verbose=False, cdp_url=lease.http_endpoint)
+                elif self.cache is not None:
+                    slot = stack.enter_context(self.cache.lease())
+                    # Crawl4AI exposes no per-request cache flags, so no hit ratio is reported
+                    browser_config = BrowserConfig(
+                        verbose=False, use_persistent_context=True, user_data_dir=str(slot), extra_args=self.cache.chromium_args(),
+                    )
+                else:
+                    browser_config = BrowserConfig(verbose=False)
+                with self.suppress_output():
+                    async with AsyncWebCrawler(config=browser_config) as crawler:
+                        result = await crawler.arun(url=url, config=CrawlerRunConfig(page_timeout=int(self.timeout * 1000)))
+            html, content_size, truncated = cap_text(result.html)
 
             return ScrapeResult(
                 run_id=run_id,
@@ -49,7 +71,8 @@ class Crawl4AIScraper(Scraper):
                 content_size=content_size,
                 format="html",
                 created_at=datetime.now().isoformat(),
-                content=result.html,
+                content=html or None,
+                truncated=truncated,
             )
         except Exception as e:
             return ScrapeResult(
@@ -10,6 +10,7 @@ sys.path.insert(0, str(project_root / "src"))
 
 from dotenv import load_dotenv
 from .base import Scraper, ScrapeResult
+from .shared.body import utf8_len
 from exa_py import Exa
 
 load_dotenv()
@@ -39,7 +40,7 @@ class ExaAPIScraper(Scraper):
                 first_result = result.results[0]
                 html_content = getattr(first_result, 'text', '') or ''
                 
-                content_size = len(html_content.encode('utf-8')) if html_content else 0
+                content_size = utf8_len(html_content)
                 
                 # Try to get status code from result
                 status_code = 200  # Default success
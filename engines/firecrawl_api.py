@@ -1,7 +1,11 @@
 import os
 import sys
+import time
+import contextlib
 from pathlib import Path
 from datetime import datetime
+from typing import AsyncIterator, Dict, List, Tuple
+from urllib.parse import urlsplit, urlunsplit
 import asyncio
 
 # Add project root and src to Python path
@@ -11,66 +15,142 @@ sys.path.insert(0, str(project_root / "src"))
 
 from dotenv import load_dotenv  # type: ignore
 from .base import Scraper, ScrapeResult
+from .shared.body import utf8_len
 from firecrawl import AsyncFirecrawl  # type: ignore
 
 load_dotenv()
 
+BATCH_TERMINAL = ("completed", "failed", "cancelled")
+
+
+def _url_key(url: str) -> str:
+    # Firecrawl may echo the URL back normalized (lower-case host, trailing slash)
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+
+
+def _source_url(doc) -> str:
+    metadata = getattr(doc, "metadata", None)
+    return str(getattr(metadata, "source_url", None) or getattr(metadata, "url", None) or "")
+
+
 class FirecrawlAPIScraper(Scraper):
-    """Scrapes web pages using the Firecrawl API with caching disabled (maxAge=0)."""
+    """Scrapes web pages using the Firecrawl API with caching disabled (maxAge=0).
+
+    FIRECRAWL_MODE=batch submits the task list as batch scrape jobs (FIRECRAWL_BATCH_SIZE
+    URLs each) and polls them every FIRECRAWL_POLL_S seconds, so throughput is bounded by
+    Firecrawl rather than by --max-workers; jobs still running after FIRECRAWL_BATCH_TIMEOUT_S
+    are cancelled and their remaining URLs marked timed out.
+    """
     def __init__(self):
         self.api_key = os.getenv("FIRECRAWL_API_KEY")
         if not self.api_key:
             raise ValueError("FIRECRAWL_API_KEY not set in environment.")
         self.firecrawl = AsyncFirecrawl(api_key=self.api_key)
+        mode = os.getenv("FIRECRAWL_MODE", "single").strip().lower()
+        if mode not in ("single", "batch"):
+            raise ValueError(f"FIRECRAWL_MODE must be single or batch, not '{mode}'")
+        self.batch_mode = mode == "batch"
+        self.batch_size = max(1, int(os.getenv("FIRECRAWL_BATCH_SIZE", "100")))
+        self.poll_s = max(0.1, float(os.getenv("FIRECRAWL_POLL_S", "2")))
+        self.batch_timeout_s = float(os.getenv("FIRECRAWL_BATCH_TIMEOUT_S", "1800"))
+
+    def _document_result(self, url: str, run_id: str, result) -> ScrapeResult:
+        # Content selection
+        markdown = (result.markdown or "") if result else ""
+        content = markdown
+
+        # Metadata (typed)
+        metadata = result.metadata if result else None
+        status_code = metadata.status_code if metadata else 200
+        err_str = metadata.error if metadata else None
+
+        content_size = utf8_len(markdown)
+
+        return ScrapeResult(
+            run_id=run_id,
+            scraper="firecrawl_api",
+            url=url,
+            status_code=status_code,
+            error=err_str,
+            content_size=content_size,
+            format="markdown",
+            created_at=datetime.now().isoformat(),
+            content=content or None,
+        )
+
+    def _error_result(self, url: str, run_id: str, status_code: int, error: str, timed_out: bool = False) -> ScrapeResult:
+        return ScrapeResult(
+            run_id=run_id,
+            scraper="firecrawl_api",
+            url=url,
+            status_code=status_code,
+            error=error,
+            content_size=0,
+            format="markdown",
+            created_at=datetime.now().isoformat(),
+            content=None,
+            timed_out=timed_out,
+        )
 
     async def scrape(self, url: str, run_id: str) -> ScrapeResult:
         try:
             formats = ['markdown']
             result = await self.firecrawl.scrape(url, formats=formats)
-
-            # Content selection
-            markdown = (result.markdown or "") if result else ""
-            content = markdown
-
-            # Metadata (typed)
-            metadata = result.metadata if result else None
-            status_code = metadata.status_code if metadata else 200
-            err_str = metadata.error if metadata else None
-
-            content_size = len((markdown or "").encode('utf-8'))
-
-            return ScrapeResult(
-                run_id=run_id,
-                scraper="firecrawl_api",
-                url=url,
-                status_code=status_code,
-                error=err_str,
-                content_size=content_size,
-                format="markdown",
-                created_at=datetime.now().isoformat(),
-                content=content or None,
-            )
+            return self._document_result(url, run_id, result)
         except asyncio.TimeoutError:
-            return ScrapeResult(
-                run_id=run_id,
-                scraper="firecrawl_api",
-                url=url,
-                status_code=408,  # Timeout status code
-                error="Timeout error",
-                content_size=0,
-                format="markdown",
-                created_at=datetime.now().isoformat(),
-                content=None,
-            )
+            return self._error_result(url, run_id, 408, "Timeout error", timed_out=True)
         except Exception as e:
-            return ScrapeResult(
-                run_id=run_id,
-                scraper="firecrawl_api",
-                url=url,
-                status_code=500,
-                error=f"{type(e).__name__}: {str(e)}",
-                content_size=0,
-                format="markdown",
-                created_at=datetime.now().isoformat(),
-                content=None,
-            )
+            return self._error_result(url, run_id, 500, f"{type(e).__name__}: {str(e)}")
+
+    async def scrape_many(self, urls: List[str], run_id: str) -> AsyncIterator[Tuple[int, ScrapeResult]]:
+        """Batch mode: yields (index into urls, result) as pages of the batch jobs complete."""
+        # job id -> {url key: indexes still waiting}; a URL listed twice is scraped once
+        jobs: Dict[str, Dict[str, List[int]]] = {}
+        for start in range(0, len(urls), self.batch_size):
+            waiting: Dict[str, List[int]] = {}
+            for i in range(start, min(start + self.batch_size, len(urls))):
+                waiting.setdefault(_url_key(urls[i]), []).append(i)
+            unique = [urls[indexes[0]] for indexes in waiting.values()]
+            try:
+                job = await self.firecrawl.start_batch_scrape(unique, formats=["markdown"])
+            except Exception as e:
+                for indexes in waiting.values():
+                    for i in indexes:
+                        yield i, self._error_result(urls[i], run_id, 500, f"{type(e).__name__}: {str(e)}")
+                continue
+            for invalid in getattr(job, "invalid_urls", None) or []:
+                for i in waiting.pop(_url_key(invalid), []):
+                    yield i, self._error_result(urls[i], run_id, 400, "Rejected by Firecrawl as an invalid URL")
+            if waiting:
+                jobs[job.id] = waiting
+
+        deadline = time.monotonic() + self.batch_timeout_s
+        while jobs:
+            await asyncio.sleep(self.poll_s)
+            for job_id, waiting in list(jobs.items()):
+                try:
+                    status = await self.firecrawl.get_batch_scrape_status(job_id)
+                except Exception:
+                    # Transient API errors are retried on the next poll, up to the deadline
+                    continue
+                for doc in getattr(status, "data", None) or []:
+                    # Earlier polls' pages come back too; they were already taken out of waiting
+                    for i in waiting.pop(_url_key(_source_url(doc)), []):
+                        yield i, self._document_result(urls[i], run_id, doc)
+                state = str(getattr(status, "status", "") or "")
+                if state in BATCH_TERMINAL or not waiting:
+                    for indexes in waiting.values():
+                        for i in indexes:
+                            yield i, self._error_result(urls[i], run_id, 500, f"Missing from batch job {job_id} ({state or 'unknown status'})")
+                    del jobs[job_id]
+            if jobs and time.monotonic() > deadline:
+                for job_id, waiting in jobs.items():
+                    with contextlib.suppress(Exception):
+                        await self.firecrawl.cancel_batch_scrape(job_id)
+                    for indexes in waiting.values():
+                        for i in indexes:
+                            yield i, self._error_result(
+                                urls[i], run_id, 408, f"Timeout: batch job exceeded {self.batch_timeout_s:g}s", timed_out=True
+                            )
+                break
@@ -1,11 +1,29 @@
+import contextlib
 import os
+import time
 from datetime import datetime
+from urllib.parse import urlsplit
 from .base import Scraper, ScrapeResult
+from .shared.body import cap_text
+from .shared.browser_cache import browser_cache_from_env, cache_stats
+from .shared.browser_farm import farm_url, lease_browser_async
+from .shared.browser_profiles import DOM_STABLE_JS, TEXT_JS, blocked_url_patterns, profile_from_env, should_block
 
 class PlaywrightScraper(Scraper):
     """
     Scrapes web pages using Playwright (headless browser).
+
+    PLAYWRIGHT_PROFILE selects what is blocked, when the page is read and whether HTML or
+    text is returned: default | fast | lean | path to a JSON profile (engines/shared/browser_profiles.py).
     """
+    self_hosted = True
+    resource_class = "browser"
+    timeout = 30
+
+    def __init__(self):
+        self.profile = profile_from_env("PLAYWRIGHT_PROFILE")
+        self.cache = browser_cache_from_env("playwright_scraper")
+
     def check_environment(self) -> bool:
         try:
             import playwright.async_api
@@ -14,31 +32,103 @@ class PlaywrightScraper(Scraper):
             return False
 
     async def scrape(self, url: str, run_id: str) -> ScrapeResult:
+        profile = self.profile
+        stats = {"profile": profile.name, "requests": 0, "blocked_requests": 0, "transfer_bytes": 0}
         try:
             from playwright.async_api import async_playwright
 
-            async with async_playwright() as p:
-                headful_env = os.getenv("PLAYWRIGHT_HEADFUL", "0")
-                is_headful = headful_env in ["1", "true", "True"]
-                browser = await p.chromium.launch(headless=not is_headful, devtools=is_headful, slow_mo=100 if is_headful else 0)
-                page = await browser.new_page()
-                response = await page.goto(url, wait_until="networkidle", timeout=30000)
-                status_code = response.status if response else None
-                html = await page.content()
-                content_size = len(html.encode('utf-8')) if html else 0
-                await browser.close()
-
-                return ScrapeResult(
-                    run_id=run_id,
-                    scraper="playwright_scraper",
-                    url=url,
-                    status_code=status_code or 200,
-                    error=None if status_code and status_code < 400 else f"HTTP error: {status_code}",
-                    content_size=content_size,
-                    format="html",
-                    created_at=datetime.now().isoformat(),
-                    content=html or None,
-                )
+            farm = farm_url() is not None
+            with (self.cache.lease() if self.cache is not None and not farm else contextlib.nullcontext()) as slot:
+                async with (lease_browser_async("playwright_scraper", self.timeout) if farm else contextlib.nullcontext()) as lease, \
+                        async_playwright() as p:
+                    headful_env = os.getenv("PLAYWRIGHT_HEADFUL", "0")
+                    is_headful = headful_env in ["1", "true", "True"]
+                    launch = {"headless": not is_headful, "devtools": is_headful, "slow_mo": 100 if is_headful else 0}
+                    if lease is not None:
+                        # Farm browsers are shared: the page gets its own context, and closing
+                        # it leaves the browser running for the next lease
+                        browser = await p.chromium.connect_over_cdp(lease.http_endpoint)
+                        owner = await browser.new_context()
+                    elif slot is not None:
+                        # A persistent context keeps its HTTP cache in the leased slot for later pages
+                        owner = await p.chromium.launch_persistent_context(str(slot), args=self.cache.chromium_args(), **launch)
+                    else:
+                        owner = await p.chromium.launch(**launch)
+                    try:
+                        page = (owner.pages[0] if slot is not None and owner.pages else None) or await owner.new_page()
+                        page_host = (urlsplit(url).hostname or "").lower()
+
+                        async def _route(route):
+                            request = route.request
+                            if should_block(profile, request.resource_type, request.url, page_host):
+                                stats["blocked_requests"] += 1
+                                await route.abort()
+                            else:
+                                await route.continue_()
+
+                        # Request interception turns the HTTP cache off, so with a cache the
+                        # profile is applied as blocked URL patterns when it can be
+                        url_patterns = blocked_url_patterns(profile) if slot is not None and profile.intercepts else None
+                        if profile.intercepts and url_patterns is None:
+                            await page.route("**/*", _route)
+
+                        cache_hits = set()
+
+                        # Bytes on the wire, as Chromium's network stack reports them
+                        def _finished(event):
+                            stats["requests"] += 1
+                            stats["transfer_bytes"] += int(event.get("encodedDataLength") or 0)
+
+                        def _failed(event):
+                            if event.get("blockedReason"):
+                                stats["blocked_requests"] += 1
+
+                        def _received(event):
+                            if event.get("response", {}).get("fromDiskCache"):
+                                cache_hits.add(event.get("requestId"))
+
+                        try:
+                            cdp = await page.context.new_cdp_session(page)
+                            await cdp.send("Network.enable")
+                            cdp.on("Network.loadingFinished", _finished)
+                            cdp.on("Network.loadingFailed", _failed)
+                            cdp.on("Network.responseReceived", _received)
+                            cdp.on("Network.requestServedFromCache", lambda event: cache_hits.add(event.get("requestId")))
+                            if url_patterns:
+                                await cdp.send("Network.setBlockedURLs", {"urls": url_patterns})
+                        except Exception:
+                            stats.pop("transfer_bytes")
+                            if url_patterns:
+                                await page.route("**/*", _route)
+
+                        started = time.perf_counter()
+                        response = await page.goto(url, wait_until=profile.wait_until, timeout=self.timeout * 1000)
+                        status_code = response.status if response else None
+                        if profile.dom_stable_ms > 0:
+                            await page.evaluate(DOM_STABLE_JS, [profile.dom_stable_ms, profile.dom_stable_cap_ms])
+                        stats["load_ms"] = round((time.perf_counter() - started) * 1000)
+                        if slot is not None:
+                            stats.update(cache_stats(stats["requests"], len(cache_hits)))
+                        # innerText is computed in the page, so only the text crosses the CDP connection
+                        raw = await (page.evaluate(TEXT_JS) if profile.extract == "text" else page.content())
+                        html, content_size, truncated = cap_text(raw)
+                    finally:
+                        # Also runs when ScrapeEngine cancels the task at its deadline
+                        await owner.close()
+
+                    return ScrapeResult(
+                        run_id=run_id,
+                        scraper="playwright_scraper",
+                        url=url,
+                        status_code=status_code or 200,
+                        error=None if status_code and status_code < 400 else f"HTTP error: {status_code}",
+                        content_size=content_size,
+                        format="text" if profile.extract == "text" else "html",
+                        created_at=datetime.now().isoformat(),
+                        content=html or None,
+                        truncated=truncated,
+                        engine_stats=stats,
+                    )
         except Exception as e:
             return ScrapeResult(
                 run_id=run_id,
@@ -50,4 +140,5 @@ class PlaywrightScraper(Scraper):
                 format="html",
                 created_at=datetime.now().isoformat(),
                 content=None,
-            ) 
+                engine_stats=stats,
+            )
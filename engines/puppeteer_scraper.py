@@ -1,12 +1,25 @@
+import asyncio
+import contextlib
 import os
 from datetime import datetime
 import subprocess
 from .base import Scraper, ScrapeResult
+from .shared.body import cap_text
+from .shared.browser_cache import browser_cache_from_env, cache_stats
+from .shared.browser_farm import farm_url, lease_browser_async
+from .shared.proc import run_killable
 
 class PuppeteerScraper(Scraper):
     """
     Scrapes web pages using Puppeteer (Node.js headless browser).
     """
+    self_hosted = True
+    resource_class = "browser"
+    timeout = 60
+
+    def __init__(self):
+        self.cache = browser_cache_from_env("puppeteer_scraper")
+
     def check_environment(self) -> bool:
         try:
             # Check Node.js
@@ -18,7 +31,7 @@ class PuppeteerScraper(Scraper):
         except Exception:
             return False
 
-    def scrape(self, url: str, run_id: str) -> ScrapeResult:
+    async def scrape(self, url: str, run_id: str) -> ScrapeResult:
         scripts_dir = os.path.join(os.path.dirname(__file__), "scripts")
         script_path = os.path.join(scripts_dir, "puppeteer_single.js")
         try:
@@ -27,32 +40,43 @@ class PuppeteerScraper(Scraper):
             error = None
             html = None
             content_size = 0
-            result = subprocess.run(
-                ["node", "puppeteer_single.js", url],
-                capture_output=True,
-                text=True,
-                timeout=60,
-                cwd=scripts_dir
-            )
+            truncated = False
+            engine_stats = None
+            env = {**os.environ, "PUPPETEER_TIMEOUT_MS": str(int(min(30, self.timeout) * 1000))}
+            farm = farm_url() is not None
+            async with contextlib.AsyncExitStack() as stack:
+                if farm:
+                    lease = await stack.enter_async_context(lease_browser_async("puppeteer_scraper", self.timeout))
+                    env["PUPPETEER_BROWSER_WS_ENDPOINT"] = lease.ws_endpoint
+                elif self.cache is not None:
+                    slot = stack.enter_context(self.cache.lease())
+                    env["PUPPETEER_USER_DATA_DIR"] = str(slot)
+                    env["PUPPETEER_DISK_CACHE_BYTES"] = str(self.cache.max_bytes)
+                returncode, stdout, stderr = await run_killable(
+                    ["node", "puppeteer_single.js", url],
+                    timeout=self.timeout,
+                    cwd=scripts_dir,
+                    env=env,
+                )
             created_at = datetime.now().isoformat()
             
-            if result.returncode == 0:
+            if returncode == 0:
                 import json
                 try:
-                    data = json.loads(result.stdout.strip().split('\n')[-1])
+                    data = json.loads(stdout.strip().split('\n')[-1])
                     status_code = data.get("status_code") or 200
                     error = data.get("error")
                     html = data.get("html")
-                    if html:
-                        content_size = len(html.encode('utf-8'))
-                    content_text = html if html else ""
+                    content_text, content_size, truncated = cap_text(html)
+                    if data.get("cache"):
+                        engine_stats = cache_stats(data["cache"].get("measured"), data["cache"].get("cache_hits"))
                 except Exception:
                     status_code = 500
                     error = "Failed to parse Puppeteer output"
                     content_text = ""
             else:
                 status_code = 500
-                error = f"Puppeteer process failed: {result.stderr}"
+                error = f"Puppeteer process failed: {stderr}"
                 content_text = ""
             
             return ScrapeResult(
@@ -65,19 +89,22 @@ class PuppeteerScraper(Scraper):
                 format="html",
                 created_at=created_at,
                 content=content_text or None,
+                truncated=truncated,
+                engine_stats=engine_stats,
             )
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             created_at = datetime.now().isoformat()
             return ScrapeResult(
                 run_id=run_id,
                 scraper="puppeteer_scraper",
                 url=url,
                 status_code=408,
-                error="Timeout: Puppeteer process took longer than 60 seconds",
+                error=f"Timeout: Puppeteer process took longer than {self.timeout:g} seconds",
                 content_size=0,
                 format="html",
                 created_at=created_at,
                 content=None,
+                timed_out=True,
             )
         except Exception as e:
             created_at = datetime.now().isoformat()
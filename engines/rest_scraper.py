@@ -1,19 +1,22 @@
 from __future__ import annotations
 from .base import ScrapeResult, Scraper
+from .shared.body import read_response
 import requests
 from datetime import datetime
 
 class RestScraper(Scraper):
+    self_hosted = True
+    timeout = 30
+
     def scrape(self, url: str, run_id: str) -> ScrapeResult:
         try:
-            response = requests.get(url, timeout=30)
-            created_at = datetime.now().isoformat()
+            response = requests.get(url, timeout=self.timeout, stream=True)
             status_code = response.status_code
             error = None
-            content = response.text or ""
+            content, content_size, truncated = read_response(response)
+            created_at = datetime.now().isoformat()
             if response.status_code >= 400:
                 error = f"HTTP {response.status_code}: {response.reason}"
-            content_size = len(content.encode('utf-8')) if content else 0
             return ScrapeResult(
                 run_id=run_id,
                 scraper="rest_scraper",
@@ -24,6 +27,7 @@ class RestScraper(Scraper):
                 format="html",
                 created_at=created_at,
                 content=content or None,
+                truncated=truncated,
             )
         except requests.exceptions.Timeout:
             created_at = datetime.now().isoformat()
@@ -32,11 +36,12 @@ class RestScraper(Scraper):
                 scraper="rest_scraper",
                 url=url,
                 status_code=408,
-                error="Timeout: Request took longer than 30 seconds",
+                error=f"Timeout: Request took longer than {self.timeout:g} seconds",
                 content_size=0,
                 format="html",
                 created_at=created_at,
                 content=None,
+                timed_out=True,
             )
         except requests.exceptions.ConnectionError as e:
             created_at = datetime.now().isoformat()
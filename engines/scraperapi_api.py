@@ -1,8 +1,10 @@
+import json
 import os
 import requests
 from datetime import datetime
 from dotenv import load_dotenv
 from .base import Scraper, ScrapeResult
+from .shared.body import read_response, utf8_len
 
 load_dotenv()
 
@@ -10,6 +12,8 @@ class ScraperAPIAPIScraper(Scraper):
     """
     Scraper implementation for ScraperAPI.
     """
+    timeout = 180
+
     def __init__(self):
         self.api_key = os.getenv("SCRAPERAPI_API_KEY")
         if not self.api_key:
@@ -20,6 +24,7 @@ class ScraperAPIAPIScraper(Scraper):
         error = None
         status_code = 500
         content_size = 0
+        truncated = False
         try:
             payload = {
                 "api_key": self.api_key,
@@ -27,19 +32,20 @@ class ScraperAPIAPIScraper(Scraper):
             }
             headers = {}
             headers["x-sapi-api_key"] = self.api_key
-            resp = requests.get(self.base_url, headers=headers, params=payload, timeout=180)
+            resp = requests.get(self.base_url, headers=headers, params=payload, timeout=self.timeout, stream=True)
             status_code = resp.status_code
-            html = resp.text or ""
+            html, content_size, truncated = read_response(resp)
             
             # Try to parse JSON response to extract html if present
             try:
-                if resp.headers.get("Content-Type", "").startswith("application/json"):
-                    data = resp.json()
+                if resp.headers.get("Content-Type", "").startswith("application/json") and not truncated:
+                    data = json.loads(html)
                     # Some JSON responses may include rendered html
-                    html = data.get("html") or html
+                    if data.get("html"):
+                        html = data["html"]
+                        content_size = utf8_len(html)
             except Exception:
                 pass
-            content_size = len(html.encode("utf-8")) if html else 0
         except Exception as e:
             html = ""
             content_size = 0
@@ -56,4 +62,5 @@ class ScraperAPIAPIScraper(Scraper):
             format="html",
             created_at=datetime.now().isoformat(),
             content=html or None,
+            truncated=truncated,
         )
@@ -3,6 +3,7 @@ from datetime import datetime
 from scrapingbee import ScrapingBeeClient
 from dotenv import load_dotenv
 from .base import Scraper, ScrapeResult
+from .shared.body import cap_bytes
 
 load_dotenv()
 
@@ -21,14 +22,13 @@ class ScrapingBeeAPIScraper(Scraper):
         status_code = 500
         html = ""
         content_size = 0
+        truncated = False
 
         params: dict[str, str | list | dict[str, list]]  = { "transparent_status_code": "True" }
         try:
             response = self.client.get(url, params=params)
             status_code = response.status_code
-            html = response.content.decode("utf-8", errors="replace") if response.content else ""
-            
-            content_size = len(response.content) if response.content else 0
+            html, content_size, truncated = cap_bytes(response.content)
         except Exception as e:
             html = ""
             content_size = 0
@@ -45,4 +45,5 @@ class ScrapingBeeAPIScraper(Scraper):
             format="html",
             created_at=datetime.now().isoformat(),
             content=html or None,
+            truncated=truncated,
         ) 
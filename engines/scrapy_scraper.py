@@ -5,39 +5,45 @@
 # By running each crawl in a separate subprocess (calling scrapers/scrapy_single.py), we ensure a fresh reactor
 # for every URL, avoid all reactor restart errors, and maintain robust, isolated benchmarking.
 
+import asyncio
 import json
 import os
-import subprocess
 import sys
 from datetime import datetime
 
 from .base import Scraper, ScrapeResult
+from .shared.body import cap_text
+from .shared.proc import run_killable
 
 class ScrapyScraper(Scraper):
     """Scrapes web pages using Scrapy."""
+    self_hosted = True
+    resource_class = "cpu"
+    timeout = 60
 
-    def scrape(self, url: str, run_id: str) -> ScrapeResult:
+    async def scrape(self, url: str, run_id: str) -> ScrapeResult:
         error = None
         status_code = 500
         html = ""
         content_size = 0
+        truncated = False
+        timed_out = False
         
         try:
             script_path = os.path.join(os.path.dirname(__file__), "scripts/scrapy_single.py")
-            result = subprocess.run(
+            env = {**os.environ, "SCRAPY_DOWNLOAD_TIMEOUT": str(min(30, self.timeout))}
+            returncode, stdout, stderr = await run_killable(
                 [sys.executable, script_path, url],
-                capture_output=True,
-                text=True,
-                timeout=60
+                timeout=self.timeout,
+                env=env,
             )
             
-            if result.returncode == 0:
+            if returncode == 0:
                 try:
-                    spider_result = json.loads(result.stdout.strip().split('\n')[-1])
+                    spider_result = json.loads(stdout.strip().split('\n')[-1])
                     status_code = spider_result.get("status_code")
                     error = spider_result.get("error")
-                    html = spider_result.get("html") or ""
-                    content_size = len(html.encode('utf-8')) if html else 0
+                    html, content_size, truncated = cap_text(spider_result.get("html"))
                 except (json.JSONDecodeError, IndexError):
                     status_code = 500
                     error = "Failed to parse Scrapy output"
@@ -45,7 +51,7 @@ class ScrapyScraper(Scraper):
                     content_size = 0
             else:
                 status_code = 500
-                error = f"Scrapy process failed: {result.stderr}"
+                error = f"Scrapy process failed: {stderr}"
                 html = ""
                 content_size = 0
                 
@@ -53,11 +59,13 @@ class ScrapyScraper(Scraper):
                 error = "No response received (possible network or DNS error)"
                 status_code = 500
                 
-        except subprocess.TimeoutExpired:
-            status_code = 500
-            error = "Timeout: Scrapy process took longer than 60 seconds"
+        except asyncio.TimeoutError:
+            # 408 like Puppeteer and ScrapeEngine's own deadline
+            status_code = 408
+            error = f"Timeout: Scrapy process took longer than {self.timeout:g} seconds"
             html = ""
             content_size = 0
+            timed_out = True
             
         except Exception as e:
             status_code = 500
@@ -75,4 +83,6 @@ class ScrapyScraper(Scraper):
             format="html",
             created_at=datetime.now().isoformat(),
             content=html or None,
+            timed_out=timed_out,
+            truncated=truncated,
         )   
@@ -1,6 +1,20 @@
 const puppeteer = require('puppeteer');
 
 const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+const NAV_TIMEOUT_MS = Number(process.env.PUPPETEER_TIMEOUT_MS) || 30000;
+// Set by puppeteer_scraper.py when run_eval.py --browser-cache-mb is on: a profile directory
+// leased for this page, reused by later pages so their HTTP cache is warm
+const USER_DATA_DIR = process.env.PUPPETEER_USER_DATA_DIR || undefined;
+const DISK_CACHE_BYTES = Number(process.env.PUPPETEER_DISK_CACHE_BYTES) || 0;
+// Set when BROWSER_FARM_URL is: a leased farm browser to connect to instead of launching one
+const BROWSER_WS_ENDPOINT = process.env.PUPPETEER_BROWSER_WS_ENDPOINT || null;
+
+// Same measure as CACHE_STATS_JS in engines/shared/browser_cache.py
+function cacheStats() {
+    const entries = [...performance.getEntriesByType('navigation'), ...performance.getEntriesByType('resource')];
+    const known = entries.filter((e) => e.decodedBodySize > 0);
+    return { measured: known.length, cache_hits: known.filter((e) => e.transferSize === 0).length };
+}
 
 async function main() {
     const url = process.argv[2];
@@ -19,11 +33,31 @@ async function main() {
         process.exit(1);
     }
     let browser;
+    let context = null;
+    // A farm browser outlives this process: close only our context and disconnect
+    const done = async () => {
+        if (!browser) return;
+        if (BROWSER_WS_ENDPOINT) {
+            if (context) await context.close().catch(() => {});
+            browser.disconnect();
+        } else {
+            await browser.close();
+        }
+    };
     try {
         const headful = process.env.PUPPETEER_HEADFUL === '1' || process.env.PUPPETEER_HEADFUL === 'true';
-        browser = await puppeteer.launch({ headless: !headful, devtools: headful, args: headful ? [] : undefined });
-        const page = await browser.newPage();
-        const response = await page.goto(url, { waitUntil: 'domcontentloaded', timeout: 30000 });
+        let page;
+        if (BROWSER_WS_ENDPOINT) {
+            browser = await puppeteer.connect({ browserWSEndpoint: BROWSER_WS_ENDPOINT });
+            // createIncognitoBrowserContext before Puppeteer 22
+            context = await (browser.createBrowserContext || browser.createIncognitoBrowserContext).call(browser);
+            page = await context.newPage();
+        } else {
+            const args = DISK_CACHE_BYTES ? [`--disk-cache-size=${DISK_CACHE_BYTES}`] : (headful ? [] : undefined);
+            browser = await puppeteer.launch({ headless: !headful, devtools: headful, args, userDataDir: USER_DATA_DIR });
+            page = await browser.newPage();
+        }
+        const response = await page.goto(url, { waitUntil: 'domcontentloaded', timeout: NAV_TIMEOUT_MS });
         const status = response ? response.status() : null;
         // Execute actions sequentially
         if (Array.isArray(actions) && actions.length > 0) {
@@ -135,15 +169,17 @@ async function main() {
             }
             await sleep(600);
         }
+        const cache = USER_DATA_DIR ? await page.evaluate(cacheStats) : null;
         const html = await page.content();
-        await browser.close();
+        await done();
         console.log(JSON.stringify({
             status_code: status,
             error: status && status < 400 ? null : `HTTP error: ${status}`,
             html: html,
+            cache: cache,
         }));
     } catch (e) {
-        if (browser) await browser.close();
+        await done();
         console.log(JSON.stringify({
             status_code: null,
             error: e.toString(),
@@ -1,3 +1,4 @@
+import os
 import sys
 import json
 import scrapy
@@ -7,12 +8,14 @@ from scrapy.utils.project import get_project_settings
 from scrapy.utils.log import configure_logging
 from typing import Optional, Dict, Union
 
+DOWNLOAD_TIMEOUT = float(os.environ.get("SCRAPY_DOWNLOAD_TIMEOUT", "30"))
+
 class StatusSpider(Spider):
     name = "status_spider"
     custom_settings = {
         "LOG_ENABLED": False,
         "LOG_LEVEL": "CRITICAL",
-        "DOWNLOAD_TIMEOUT": 30,
+        "DOWNLOAD_TIMEOUT": DOWNLOAD_TIMEOUT,
         "RETRY_ENABLED": False,
         "USER_AGENT": "Mozilla/5.0 (compatible; ScrapersBenchmark/1.0)",
         "HTTPERROR_ALLOW_ALL": True,
@@ -47,7 +50,7 @@ def main():
         **get_project_settings(),
         "LOG_ENABLED": False,
         "LOG_LEVEL": "CRITICAL",
-        "DOWNLOAD_TIMEOUT": 30,
+        "DOWNLOAD_TIMEOUT": DOWNLOAD_TIMEOUT,
         "RETRY_ENABLED": False,
         "USER_AGENT": "Mozilla/5.0 (compatible; ScrapersBenchmark/1.0)",
         "HTTPERROR_ALLOW_ALL": True,
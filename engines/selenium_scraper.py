@@ -1,12 +1,23 @@
+import contextlib
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from .base import Scraper, ScrapeResult
+from .shared.body import cap_text
+from .shared.browser_cache import CACHE_STATS_JS, browser_cache_from_env, cache_stats
+from .shared.browser_farm import farm_url, lease_browser
 
 class SeleniumScraper(Scraper):
     """
     Scrapes web pages using Selenium (headless Chrome browser).
     """
+    self_hosted = True
+    resource_class = "browser"
+    timeout = 30
+
+    def __init__(self):
+        self.cache = browser_cache_from_env("selenium_scraper")
+
     def check_environment(self) -> bool:
         try:
             opts = Options()
@@ -22,30 +33,60 @@ class SeleniumScraper(Scraper):
         status_code = 500
         html = ""
         content_size = 0
+        truncated = False
+        engine_stats = None
         driver = None
         
-        try:
-            opts = Options()
-            opts.add_argument("--headless")
-            driver = webdriver.Chrome(options=opts)
-            driver.set_page_load_timeout(30)
-            driver.get(url)
-            html = driver.page_source
-            
-            # Get the actual HTTP status code from the browser
-            status_code = driver.execute_script("return window.performance.getEntriesByType('navigation')[0].responseStatus;")
-            if status_code is None:
-                status_code = 200 if html else 500
-            
-            content_size = len(html.encode('utf-8')) if html else 0
-            
-            driver.quit()
-            
-        except Exception as e:
-            html = ""
-            content_size = 0
-            status_code = 500
-            error = f"{type(e).__name__}: {str(e)}"
+        farm = farm_url() is not None
+        with contextlib.ExitStack() as stack:
+            slot = stack.enter_context(self.cache.lease()) if self.cache is not None and not farm else None
+            try:
+                opts = Options()
+                if farm:
+                    # Attach chromedriver to the leased farm browser instead of launching one
+                    lease = stack.enter_context(lease_browser("selenium_scraper", self.timeout))
+                    opts.debugger_address = lease.debugger_address
+                else:
+                    opts.add_argument("--headless")
+                if slot is not None:
+                    # Reuse the leased profile directory, and with it the HTTP cache of earlier pages
+                    opts.add_argument(f"--user-data-dir={slot}")
+                    for arg in self.cache.chromium_args():
+                        opts.add_argument(arg)
+                driver = webdriver.Chrome(options=opts)
+                if farm:
+                    # A tab of its own, without cookies left by earlier lessees of this browser
+                    driver.switch_to.new_window("tab")
+                    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+                driver.set_page_load_timeout(self.timeout)
+                driver.set_script_timeout(self.timeout)
+                driver.get(url)
+                html = driver.page_source
+                
+                # Get the actual HTTP status code from the browser
+                status_code = driver.execute_script("return window.performance.getEntriesByType('navigation')[0].responseStatus;")
+                if status_code is None:
+                    status_code = 200 if html else 500
+                if slot is not None:
+                    measured = driver.execute_script(f"return ({CACHE_STATS_JS})();") or {}
+                    engine_stats = cache_stats(measured.get("measured"), measured.get("cache_hits"))
+                
+                html, content_size, truncated = cap_text(html)
+                
+            except Exception as e:
+                html = ""
+                content_size = 0
+                status_code = 500
+                error = f"{type(e).__name__}: {str(e)}"
+            finally:
+                if driver is not None:
+                    try:
+                        if farm:
+                            # Closes only our tab; quitting an attached session leaves the browser running
+                            driver.close()
+                        driver.quit()
+                    except Exception:
+                        pass
 
         return ScrapeResult(
             run_id=run_id,
@@ -57,4 +98,6 @@ class SeleniumScraper(Scraper):
             format="html",
             created_at=datetime.now().isoformat(),
             content=html or None,
+            truncated=truncated,
+            engine_stats=engine_stats,
         ) 
@@ -0,0 +1 @@
+# helpers shared by engine wrappers (not engines themselves)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import os
+from typing import Optional, Tuple
+
+DEFAULT_MAX_BODY_BYTES = 20 * 1024 * 1024
+CHUNK_BYTES = 64 * 1024
+# Slice size when counting UTF-8 bytes of non-ASCII text, so no full-size copy is made
+_COUNT_SLICE_CHARS = 1 << 20
+
+
+def max_body_bytes() -> int:
+    """Body cap from SCRAPE_MAX_BODY_BYTES (run_eval.py --max-body-bytes); 0 means no cap."""
+    try:
+        return max(0, int(os.getenv("SCRAPE_MAX_BODY_BYTES", DEFAULT_MAX_BODY_BYTES)))
+    except ValueError:
+        return DEFAULT_MAX_BODY_BYTES
+
+
+def utf8_len(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    if text.isascii():
+        return len(text)
+    return sum(
+        len(text[i:i + _COUNT_SLICE_CHARS].encode("utf-8", errors="surrogatepass"))
+        for i in range(0, len(text), _COUNT_SLICE_CHARS)
+    )
+
+
+def cap_text(text: Optional[str], limit: Optional[int] = None) -> Tuple[str, int, bool]:
+    """(text cut to at most `limit` UTF-8 bytes, its byte size, truncated) for bodies already in memory."""
+    text = text or ""
+    limit = max_body_bytes() if limit is None else limit
+    # Every char is at most 4 bytes, so short texts can't exceed the cap; ASCII is 1 byte/char
+    if not limit or len(text) * 4 <= limit or (text.isascii() and len(text) <= limit):
+        return text, utf8_len(text), False
+    if text.isascii():
+        return text[:limit], limit, True
+    size = utf8_len(text)
+    if size <= limit:
+        return text, size, False
+    cut = text[: limit].encode("utf-8", errors="surrogatepass")[:limit].decode("utf-8", errors="ignore")
+    return cut, utf8_len(cut), True
+
+
+def cap_bytes(data: Optional[bytes], encoding: str = "utf-8", limit: Optional[int] = None) -> Tuple[str, int, bool]:
+    """Decode at most `limit` bytes of a body; size is the number of bytes kept."""
+    data = data or b""
+    limit = max_body_bytes() if limit is None else limit
+    truncated = bool(limit) and len(data) > limit
+    if truncated:
+        data = data[:limit]
+    return _decode(data, encoding), len(data), truncated
+
+
+def read_response(response, limit: Optional[int] = None) -> Tuple[str, int, bool]:
+    """Stream a `requests` response opened with stream=True, stopping at `limit` bytes.
+
+    Returns (text, bytes read, truncated). Text is decoded the way Response.text does it,
+    but from the capped buffer, and the connection is released either way.
+    """
+    limit = max_body_bytes() if limit is None else limit
+    buf = bytearray()
+    truncated = False
+    try:
+        for chunk in response.iter_content(chunk_size=CHUNK_BYTES):
+            if limit and len(buf) + len(chunk) > limit:
+                buf += chunk[: limit - len(buf)]
+                truncated = True
+                break
+            buf += chunk
+    finally:
+        response.close()
+    data = bytes(buf)
+    encoding = response.encoding
+    if encoding is None:
+        try:
+            from requests.compat import chardet  # type: ignore
+
+            encoding = (chardet.detect(data) or {}).get("encoding") if chardet is not None else None
+        except ImportError:
+            encoding = None
+    return _decode(data, encoding or "utf-8"), len(data), truncated
+
+
+def _decode(data: bytes, encoding: str) -> str:
+    try:
+        return str(data, encoding, errors="replace")
+    except (LookupError, TypeError):
+        return str(data, "utf-8", errors="replace")
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Set by run_eval.py --browser-cache-mb: the cache root (cleared at the start and end of a run)
+# and the per-slot size cap
+CACHE_DIR_ENV = "BROWSER_CACHE_DIR"
+CACHE_MB_ENV = "BROWSER_CACHE_MB"
+
+# Share of the page's subresources (plus the document) served without network transfer, from
+# Resource Timing. Cross-origin entries without Timing-Allow-Origin report no sizes at all
+# and are left out of both counts.
+CACHE_STATS_JS = """
+() => {
+  const entries = [...performance.getEntriesByType('navigation'), ...performance.getEntriesByType('resource')];
+  const known = entries.filter((e) => e.decodedBodySize > 0);
+  return { measured: known.length, cache_hits: known.filter((e) => e.transferSize === 0).length };
+}
+"""
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class BrowserCache:
+    """Persistent Chromium user-data directories for one engine, reused from page to page.
+
+    A user-data directory can only be open in one browser at a time, so each concurrent
+    scrape leases its own slot; slots are handed back warm, so pages of the same site reuse
+    cached scripts, stylesheets and fonts. The number of slots grows to the engine's
+    concurrency. Chromium keeps its HTTP cache under max_bytes (--disk-cache-size); a slot
+    whose whole profile still grows past twice that is wiped when it is returned.
+    """
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._free: List[Path] = []
+        self._slots = 0
+
+    def chromium_args(self) -> List[str]:
+        return [f"--disk-cache-size={self.max_bytes}"]
+
+    @contextmanager
+    def lease(self) -> Iterator[Path]:
+        with self._lock:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = self.root / f"slot-{self._slots}"
+                self._slots += 1
+        slot.mkdir(parents=True, exist_ok=True)
+        try:
+            yield slot
+        finally:
+            if _dir_size(slot) > 2 * self.max_bytes:
+                shutil.rmtree(slot, ignore_errors=True)
+            with self._lock:
+                self._free.append(slot)
+
+
+def browser_cache_from_env(engine_name: str) -> Optional[BrowserCache]:
+    """The engine's cache under $BROWSER_CACHE_DIR/<engine>, or None when caching is off."""
+    root = os.getenv(CACHE_DIR_ENV)
+    try:
+        max_mb = int(os.getenv(CACHE_MB_ENV, "0"))
+    except ValueError:
+        max_mb = 0
+    if not root or max_mb <= 0:
+        return None
+    return BrowserCache(Path(root) / engine_name, max_mb * 1024 * 1024)
+
+
+def reset_cache_root(root: Path) -> None:
+    """Start a run with cold caches, so engines are compared on equal terms."""
+    shutil.rmtree(root, ignore_errors=True)
+
+
+def cache_stats(measured: Any, hits: Any) -> Dict[str, Any]:
+    """engine_stats entries for a page: cache hits and hit ratio (None when nothing was measurable)."""
+    measured, hits = int(measured or 0), int(hits or 0)
+    return {"cache_hits": hits, "cache_hit_ratio": round(hits / measured, 3) if measured else None}
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import urllib.error
+import urllib.parse
+import urllib.request
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional
+
+# Control API of `python -m evals.browser_farm.server serve`; when set, browser engines
+# lease a running Chromium from the farm instead of launching their own
+FARM_URL_ENV = "BROWSER_FARM_URL"
+
+
+class BrowserFarmError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class FarmLease:
+    lease_id: str
+    # http://127.0.0.1:<port>, for Playwright connect_over_cdp and Crawl4AI
+    http_endpoint: str
+    # ws://.../devtools/browser/<id>, for Puppeteer connect
+    ws_endpoint: str
+
+    @property
+    def debugger_address(self) -> str:
+        """host:port, for Selenium's debuggerAddress."""
+        return urllib.parse.urlsplit(self.http_endpoint).netloc
+
+
+def farm_url() -> Optional[str]:
+    url = os.getenv(FARM_URL_ENV, "").strip()
+    return url.rstrip("/") or None
+
+
+def _post(url: str, timeout: float) -> dict:
+    request = urllib.request.Request(url, method="POST", data=b"")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        try:
+            detail = json.loads(e.read() or b"{}").get("error")
+        except ValueError:
+            detail = None
+        raise BrowserFarmError(f"Browser farm: {detail or e}") from None
+    except (urllib.error.URLError, OSError) as e:
+        raise BrowserFarmError(f"Browser farm unreachable at {url}: {e}") from None
+
+
+def acquire(engine: str, wait_s: float) -> FarmLease:
+    base = farm_url()
+    if base is None:
+        raise BrowserFarmError(f"{FARM_URL_ENV} is not set")
+    query = urllib.parse.urlencode({"engine": engine, "wait_s": f"{wait_s:g}"})
+    data = _post(f"{base}/lease?{query}", timeout=wait_s + 10)
+    return FarmLease(data["lease_id"], data["http_endpoint"], data["ws_endpoint"])
+
+
+def release(lease: FarmLease) -> None:
+    base = farm_url()
+    if base is None:
+        return
+    try:
+        _post(f"{base}/release/{lease.lease_id}", timeout=10)
+    except BrowserFarmError:
+        # The farm reclaims unreleased leases after their TTL
+        pass
+
+
+@contextmanager
+def lease_browser(engine: str, wait_s: float) -> Iterator[FarmLease]:
+    """Hold one farm browser for the duration of the block; wait_s bounds the wait for a free one."""
+    lease = acquire(engine, wait_s)
+    try:
+        yield lease
+    finally:
+        release(lease)
+
+
+@asynccontextmanager
+async def lease_browser_async(engine: str, wait_s: float) -> AsyncIterator[FarmLease]:
+    lease = await asyncio.to_thread(acquire, engine, wait_s)
+    try:
+        yield lease
+    finally:
+        # Shielded, so a deadline cancellation still hands the browser back
+        await asyncio.shield(asyncio.to_thread(release, lease))
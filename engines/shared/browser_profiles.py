@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Analytics/ads hosts that never carry page content
+TRACKER_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "adservice.google.com", "facebook.net", "connect.facebook.net", "hotjar.com", "segment.io",
+    "segment.com", "mixpanel.com", "amplitude.com", "clarity.ms", "scorecardresearch.com",
+    "quantserve.com", "taboola.com", "outbrain.com", "criteo.com", "adnxs.com", "newrelic.com",
+    "nr-data.net", "optimizely.com", "fullstory.com", "intercom.io", "bat.bing.com",
+)
+WAIT_UNTIL = ("commit", "domcontentloaded", "load", "networkidle")
+EXTRACT = ("html", "text")
+
+
+@dataclass(frozen=True)
+class BrowserProfile:
+    """How a browser engine loads a page: what it blocks, when it reads, and what it returns."""
+
+    name: str = "default"
+    # Playwright resource types to abort, e.g. image, font, media, stylesheet
+    block_resource_types: Tuple[str, ...] = ()
+    block_trackers: bool = False
+    # Abort subresources whose site (last two host labels) differs from the page's
+    block_third_party: bool = False
+    wait_until: str = "networkidle"
+    # After wait_until, wait for this long without DOM mutations (0 = don't), at most dom_stable_cap_ms
+    dom_stable_ms: int = 0
+    dom_stable_cap_ms: int = 5000
+    # "text" returns document.body.innerText instead of the serialized DOM
+    extract: str = "html"
+
+    @property
+    def intercepts(self) -> bool:
+        return bool(self.block_resource_types or self.block_trackers or self.block_third_party)
+
+
+PROFILES = {
+    # What the engine always did: everything loads, read at network idle
+    "default": BrowserProfile(),
+    "fast": BrowserProfile(
+        name="fast",
+        block_resource_types=("image", "font", "media"),
+        block_trackers=True,
+        wait_until="domcontentloaded",
+        dom_stable_ms=500,
+    ),
+    "lean": BrowserProfile(
+        name="lean",
+        block_resource_types=("image", "font", "media", "stylesheet"),
+        block_trackers=True,
+        block_third_party=True,
+        wait_until="domcontentloaded",
+        dom_stable_ms=300,
+        dom_stable_cap_ms=3000,
+        extract="text",
+    ),
+}
+
+
+def _validate(profile: BrowserProfile) -> BrowserProfile:
+    if profile.wait_until not in WAIT_UNTIL:
+        raise ValueError(f"Profile {profile.name}: wait_until must be one of {', '.join(WAIT_UNTIL)}")
+    if profile.extract not in EXTRACT:
+        raise ValueError(f"Profile {profile.name}: extract must be one of {', '.join(EXTRACT)}")
+    return profile
+
+
+def load_profile(spec: str) -> BrowserProfile:
+    """A built-in profile name, or a JSON file whose keys override the profile named in its
+    "base" key (default "default")."""
+    spec = (spec or "default").strip()
+    if spec in PROFILES:
+        return PROFILES[spec]
+    path = Path(spec)
+    if not path.is_file():
+        raise ValueError(f"Unknown browser profile '{spec}'; expected one of {', '.join(PROFILES)} or a JSON file")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    base = PROFILES[data.pop("base", "default")]
+    known = {f.name for f in fields(BrowserProfile)}
+    unknown = set(data) - known
+    if unknown:
+        raise ValueError(f"{path}: unknown profile keys {sorted(unknown)}")
+    if "block_resource_types" in data:
+        data["block_resource_types"] = tuple(data["block_resource_types"])
+    return _validate(replace(base, name=data.pop("name", path.stem), **data))
+
+
+def profile_from_env(var: str, default: str = "default") -> BrowserProfile:
+    return load_profile(os.getenv(var, default))
+
+
+def _site(host: str) -> str:
+    return ".".join(host.split(".")[-2:])
+
+
+def should_block(profile: BrowserProfile, resource_type: str, url: str, page_host: str) -> bool:
+    if resource_type == "document":
+        return False
+    if resource_type in profile.block_resource_types:
+        return True
+    host = (urlsplit(url).hostname or "").lower()
+    if profile.block_trackers and any(host == d or host.endswith("." + d) for d in TRACKER_DOMAINS):
+        return True
+    return profile.block_third_party and bool(host) and _site(host) != _site(page_host)
+
+
+# Extensions per resource type, for blocking by URL pattern (Chromium's Network.setBlockedURLs)
+# where request interception can't be used because it turns off the HTTP cache
+RESOURCE_TYPE_EXTENSIONS = {
+    "image": ("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "media": ("mp4", "webm", "mp3", "m4a", "ogg", "wav"),
+    "stylesheet": ("css",),
+}
+
+
+def blocked_url_patterns(profile: BrowserProfile) -> Optional[List[str]]:
+    """URL patterns approximating the profile's blocking, or None when it needs per-request
+    decisions (third-party blocking, resource types with no file extension)."""
+    if profile.block_third_party or any(t not in RESOURCE_TYPE_EXTENSIONS for t in profile.block_resource_types):
+        return None
+    patterns = []
+    for resource_type in profile.block_resource_types:
+        for ext in RESOURCE_TYPE_EXTENSIONS[resource_type]:
+            patterns += [f"*.{ext}", f"*.{ext}?*"]
+    if profile.block_trackers:
+        for domain in TRACKER_DOMAINS:
+            patterns += [f"*://{domain}/*", f"*://*.{domain}/*"]
+    return patterns
+
+
+# Resolves once the DOM has had no mutations for quietMs, or after capMs regardless
+DOM_STABLE_JS = """
+([quietMs, capMs]) => new Promise((resolve) => {
+  let quiet;
+  const done = () => { observer.disconnect(); clearTimeout(quiet); clearTimeout(cap); resolve(); };
+  const observer = new MutationObserver(() => { clearTimeout(quiet); quiet = setTimeout(done, quietMs); });
+  observer.observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+  quiet = setTimeout(done, quietMs);
+  const cap = setTimeout(done, capMs);
+})
+"""
+
+TEXT_JS = "() => (document.body || document.documentElement).innerText"
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import signal
+import sys
+from typing import Dict, List, Optional, Tuple
+
+
+def _kill_tree(proc: asyncio.subprocess.Process) -> None:
+    # The child runs in its own session, so killing the group also takes down browsers it spawned
+    with contextlib.suppress(ProcessLookupError, PermissionError):
+        if sys.platform != "win32":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+
+
+async def run_killable(
+    cmd: List[str],
+    timeout: Optional[float],
+    cwd: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> Tuple[int, str, str]:
+    """Run cmd and return (returncode, stdout, stderr).
+
+    Raises asyncio.TimeoutError after `timeout` seconds. On timeout or task
+    cancellation the whole process group is killed before the error propagates.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        env=env,
+        start_new_session=sys.platform != "win32",
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except BaseException:
+        _kill_tree(proc)
+        with contextlib.suppress(Exception):
+            await proc.wait()
+        raise
+    return (
+        proc.returncode if proc.returncode is not None else -1,
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+    )
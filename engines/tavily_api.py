@@ -11,6 +11,7 @@ sys.path.insert(0, str(project_root / "src"))
 from tavily import TavilyClient
 from dotenv import load_dotenv
 from .base import Scraper, ScrapeResult
+from .shared.body import utf8_len
 
 load_dotenv()
 
@@ -73,7 +74,7 @@ class TavilyAPIScraper(Scraper):
 
             # Choose what to use: prefer HTML, else markdown/text if available
             html = html_content or markdown_or_text or ""
-            content_size = len(html.encode('utf-8')) if html else 0
+            content_size = utf8_len(html)
 
             if not html:
                 status_code = 500
@@ -11,6 +11,7 @@ sys.path.insert(0, str(project_root / "src"))
 
 from dotenv import load_dotenv
 from .base import Scraper, ScrapeResult
+from .shared.body import utf8_len
 
 try:
     import httpx
@@ -83,7 +84,7 @@ class TeracrawlAPIScraper(Scraper):
 
                 # Extract markdown content
                 markdown = data.get("markdown", "")
-                content_size = len(markdown.encode("utf-8")) if markdown else 0
+                content_size = utf8_len(markdown)
 
                 return ScrapeResult(
                     run_id=run_id,
@@ -108,6 +109,7 @@ class TeracrawlAPIScraper(Scraper):
                 format="markdown",
                 created_at=datetime.now().isoformat(),
                 content=None,
+                timed_out=True,
             )
         except httpx.TimeoutException:
             return ScrapeResult(
@@ -120,6 +122,7 @@ class TeracrawlAPIScraper(Scraper):
                 format="markdown",
                 created_at=datetime.now().isoformat(),
                 content=None,
+                timed_out=True,
             )
         except Exception as e:
             return ScrapeResult(
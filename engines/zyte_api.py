@@ -5,11 +5,13 @@ from base64 import b64decode
 import requests
 from dotenv import load_dotenv
 from .base import Scraper, ScrapeResult
+from .shared.body import cap_bytes
 
 load_dotenv()
 
 class ZyteAPIScraper(Scraper):
     """Scrapes web pages using the Zyte API."""
+    timeout = 90
     
     def __init__(self):
         self.api_key = os.getenv("ZYTE_API_KEY")
@@ -22,6 +24,7 @@ class ZyteAPIScraper(Scraper):
         status_code = 500
         html = ""
         content_size = 0
+        truncated = False
 
         try:
             payload: dict = {
@@ -35,7 +38,7 @@ class ZyteAPIScraper(Scraper):
                 self.api_url,
                 auth=(self.api_key or "", ""),
                 json=payload,
-                timeout=90
+                timeout=self.timeout
             )
             status_code = response.status_code
 
@@ -44,9 +47,7 @@ class ZyteAPIScraper(Scraper):
                     response_data = response.json()
                     
                     http_response_body = b64decode(response_data["httpResponseBody"])
-                    html = http_response_body.decode('utf-8', errors='ignore')
-                    
-                    content_size = len(html.encode('utf-8')) if html else 0
+                    html, content_size, truncated = cap_bytes(http_response_body)
                 except (KeyError, ValueError) as e:
                     error = f"Failed to decode response: {str(e)}"
             
@@ -66,4 +67,5 @@ class ZyteAPIScraper(Scraper):
             format="html",
             created_at=datetime.now().isoformat(),
             content=html or None,
+            truncated=truncated,
         ) 
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import collections
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+SIGNATURES_DIR = Path(__file__).with_name("block_signatures")
+# Block and challenge pages are small; a real page that mentions a vendor deep in its
+# body must not be flagged, and scanning a multi-MB body costs more than grading it
+BODY_SCAN_CHARS = 64 * 1024
+# <title>/<meta> are looked for this far in, in case a large <head> pushes them past the prefix
+HEAD_SCAN_CHARS = 256 * 1024
+REGIONS = ("title", "body")
+
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_META_RE = re.compile(r"<meta\b[^>]*?\bcontent\s*=\s*[\"']([^\"']*)", re.IGNORECASE)
+
+
+class Signature(NamedTuple):
+    vendor: str
+    block_type: str
+    region: str
+    pattern: str
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: one pass over the text finds every pattern occurrence."""
+
+    def __init__(self, patterns: List[str]) -> None:
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[Tuple[int, ...]] = [()]
+        for i, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                state = nxt
+            self.out[state] += (i,)
+        # Breadth-first, so a state's failure link is final before its children need it
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] += self.out[self.fail[nxt]]
+        # Resolve failure links into a full transition table (characters outside every
+        # pattern go back to the root), so the scan is one dict lookup per character
+        self.delta: List[Dict[str, int]] = [dict(self.goto[0])]
+        self.delta += [{} for _ in range(len(self.goto) - 1)]
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            row = dict(self.delta[self.fail[state]])
+            row.update(self.goto[state])
+            self.delta[state] = row
+            queue.extend(self.goto[state].values())
+
+    def matches(self, text: str) -> Set[int]:
+        delta, out = self.delta, self.out
+        found: Set[int] = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+def load_signatures(directory: Path = SIGNATURES_DIR) -> List[Signature]:
+    """Signatures from one JSON file per vendor: {"vendor", "signatures": [{"type", "region", "patterns"}]}.
+
+    File order (by name) then entry order is the match priority.
+    """
+    signatures: List[Signature] = []
+    for path in sorted(directory.glob("*.json")):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        vendor = str(data.get("vendor") or path.stem)
+        for entry in data.get("signatures", []):
+            region = entry.get("region", "body")
+            if region not in REGIONS:
+                raise ValueError(f"{path.name}: unknown region '{region}'; expected one of {', '.join(REGIONS)}")
+            for pattern in entry.get("patterns", []):
+                signatures.append(Signature(vendor, str(entry["type"]), region, pattern.lower()))
+    return signatures
+
+
+def _title_region(text: str, fmt: Optional[str]) -> str:
+    fmt = (fmt or "").lower()
+    if fmt in ("markdown", "text"):
+        # No <title>; converters put it on the first non-empty line (a heading, in markdown)
+        for line in text[:BODY_SCAN_CHARS].splitlines():
+            if line.strip():
+                return line.strip("#* \t") if fmt == "text" or line.lstrip().startswith("#") else ""
+        return ""
+    head = text[:HEAD_SCAN_CHARS]
+    parts = [m.group(1) for m in _TITLE_RE.finditer(head)]
+    parts += [m.group(1) for m in _META_RE.finditer(head)]
+    return "\n".join(parts)
+
+
+class BlockDetector:
+    def __init__(self, signatures: List[Signature]) -> None:
+        self.signatures = signatures
+        self._matcher = AhoCorasick([s.pattern for s in signatures])
+
+    def detect(self, text: Optional[str], fmt: Optional[str] = None) -> Optional[str]:
+        """'<vendor>:<type>' of the highest-priority signature found, or None."""
+        if not text:
+            return None
+        title = _title_region(text, fmt).lower()
+        hits = self._matcher.matches(title)
+        # Title hits count for every region; body patterns also search the bounded prefix
+        candidates = hits | {i for i in self._matcher.matches(text[:BODY_SCAN_CHARS].lower()) if self.signatures[i].region == "body"}
+        if not candidates:
+            return None
+        sig = self.signatures[min(candidates)]
+        return f"{sig.vendor}:{sig.block_type}"
+
+
+@lru_cache(maxsize=1)
+def default_detector() -> BlockDetector:
+    return BlockDetector(load_signatures())
+
+
+def detect_block(text: Optional[str], fmt: Optional[str] = None) -> Optional[str]:
+    return default_detector().detect(text, fmt)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from typing import Dict, Iterator, List, Optional, Sequence
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore
+
+from ..suites.types import AnalyzerResult
+
+# Summary key -> AnalyzerResult field
+METRICS = {
+    "success_rate": "success",
+    "avg_recall": "recall",
+    "avg_precision": "precision",
+    "avg_f1": "f1",
+    "avg_ordered_recall": "ordered_recall",
+    "avg_ordered_precision": "ordered_precision",
+    "avg_ordered_f1": "ordered_f1",
+    "avg_order_score": "order_score",
+}
+DEFAULT_RESAMPLES = 10_000
+DEFAULT_CONFIDENCE = 0.95
+# Resample-by-task count cells built per chunk (~8 MB of int64)
+_CHUNK_CELLS = 1 << 20
+
+
+def available() -> bool:
+    return np is not None
+
+
+def metric_matrix(results: Sequence[AnalyzerResult]) -> "np.ndarray":
+    """(metrics x tasks) float array in METRICS order."""
+    return np.array([[float(getattr(r, field)) for r in results] for field in METRICS.values()], dtype=np.float64)
+
+
+def _resample_weights(rng: "np.random.Generator", n: int, resamples: int) -> Iterator["np.ndarray"]:
+    # Each row counts how often each task was drawn; means are then one matmul per chunk
+    chunk = max(1, min(resamples, _CHUNK_CELLS // max(n, 1)))
+    done = 0
+    while done < resamples:
+        rows = min(chunk, resamples - done)
+        draws = rng.integers(0, n, size=(rows, n)) + (np.arange(rows) * n)[:, None]
+        yield np.bincount(draws.ravel(), minlength=rows * n).reshape(rows, n)
+        done += rows
+
+
+def resampled_means(values: "np.ndarray", resamples: int, seed: int) -> "np.ndarray":
+    """Bootstrap means of each row of `values` (k x n) -> (resamples x k), tasks resampled jointly."""
+    n = values.shape[1]
+    rng = np.random.default_rng(seed)
+    parts = [weights @ values.T for weights in _resample_weights(rng, n, resamples)]
+    return np.concatenate(parts) / n
+
+
+def _interval(samples: "np.ndarray", confidence: float) -> "np.ndarray":
+    tail = (1.0 - confidence) / 2
+    return np.quantile(samples, [tail, 1.0 - tail], axis=0)
+
+
+def bootstrap_cis(
+    results: Sequence[AnalyzerResult],
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = 0,
+) -> Optional[Dict]:
+    """Percentile confidence intervals for every summary metric, or None without numpy or data."""
+    if np is None or len(results) < 2 or resamples <= 0:
+        return None
+    bounds = _interval(resampled_means(metric_matrix(results), resamples, seed), confidence)
+    return {
+        "confidence": confidence,
+        "resamples": resamples,
+        "seed": seed,
+        "ci": {key: [round(float(lo), 6), round(float(hi), 6)] for key, lo, hi in zip(METRICS, bounds[0], bounds[1])},
+    }
+
+
+def paired_comparisons(
+    per_engine: Dict[str, Dict[str, AnalyzerResult]],
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = 0,
+) -> Dict:
+    """Paired bootstrap of metric differences between every pair of engines.
+
+    Only tasks graded for every engine are used, and all engines share the same resampled
+    task sets, so each difference is paired per task. p_value is the two-sided share of
+    resampled differences on the far side of zero.
+    """
+    if np is None:
+        raise RuntimeError("Paired comparisons need numpy (pip install numpy)")
+    engines = sorted(per_engine)
+    common = sorted(set.intersection(*(set(r) for r in per_engine.values()))) if engines else []
+    report: Dict = {
+        "confidence": confidence,
+        "resamples": resamples,
+        "seed": seed,
+        "engines": engines,
+        "tasks": len(common),
+        "pairs": [],
+    }
+    if len(engines) < 2 or len(common) < 2:
+        return report
+    k = len(METRICS)
+    # (engines * metrics) x tasks, so one pass over the resample weights covers every engine
+    values = np.concatenate([metric_matrix([per_engine[e][t] for t in common]) for e in engines])
+    observed = values.mean(axis=1).reshape(len(engines), k)
+    means = resampled_means(values, resamples, seed).reshape(resamples, len(engines), k)
+    pairs: List[Dict] = []
+    for a in range(len(engines)):
+        for b in range(a + 1, len(engines)):
+            diffs = means[:, a, :] - means[:, b, :]
+            bounds = _interval(diffs, confidence)
+            below = (diffs <= 0).mean(axis=0)
+            above = (diffs >= 0).mean(axis=0)
+            p_values = np.minimum(1.0, 2 * np.minimum(below, above))
+            pairs.append({
+                "a": engines[a],
+                "b": engines[b],
+                "metrics": {
+                    key: {
+                        "diff": round(float(observed[a, i] - observed[b, i]), 6),
+                        "ci": [round(float(bounds[0, i]), 6), round(float(bounds[1, i]), 6)],
+                        "p_value": round(float(p_values[i]), 6),
+                    }
+                    for i, key in enumerate(METRICS)
+                },
+            })
+    report["pairs"] = pairs
+    return report
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_FILENAME = "grade_cache.sqlite"
+# Seconds a statement waits for another process's write lock before giving up on the cache
+BUSY_TIMEOUT_S = 5.0
+
+
+def cache_key(content_hash: str, fmt: Optional[str], truth_hash: str, grader: str) -> str:
+    """Everything the content-derived scores depend on; grader carries analyzer version and lie weight."""
+    raw = f"{content_hash}\x00{(fmt or '').lower()}\x00{truth_hash}\x00{grader}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def resolve_cache_path(option: Optional[str], output_dir: Path) -> Optional[Path]:
+    """--grade-cache value -> cache file: default <output-dir>/grade_cache.sqlite, "off" disables."""
+    if option is None or option == "":
+        return output_dir / DEFAULT_CACHE_FILENAME
+    if option.lower() == "off":
+        return None
+    return Path(option)
+
+
+class GradeCache:
+    """Persistent content-score cache shared by every engine and run that points at the same file.
+
+    Byte-identical bodies (same content hash and format) graded against the same task texts
+    by the same analyzer get the same scores, so they are computed once. Success is not
+    cached: it also depends on the status code and error of each scrape.
+
+    Several processes share one file (run_all engines, regrade workers), so every put is its
+    own short autocommit transaction and no lock is held between calls. A cache that stays
+    locked or breaks is skipped: get() misses and put() drops the row, and grading goes on.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: autocommit, so a put never leaves a write transaction open
+        self._conn = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT_S, isolation_level=None, check_same_thread=False)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: a commit is a WAL append without fsync, cheap enough per put
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS grades (key TEXT PRIMARY KEY, scores TEXT NOT NULL, created_at REAL NOT NULL)")
+        except sqlite3.DatabaseError:
+            self.errors += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            row = self._conn.execute("SELECT scores FROM grades WHERE key = ?", (key,)).fetchone()
+        except sqlite3.DatabaseError:
+            self.errors += 1
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, scores: Dict[str, Any]) -> None:
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO grades (key, scores, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(scores, separators=(",", ":")), time.time()),
+            )
+        except sqlite3.DatabaseError:
+            self.errors += 1
+
+    def close(self) -> None:
+        self._conn.close()
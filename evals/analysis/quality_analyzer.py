@@ -1,40 +1,201 @@
 from __future__ import annotations
 
+import hashlib
 import re
 import statistics
-from typing import List, Tuple
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Set
 
+from ..io_utils import content_hash, truth_hash
+from .block_detector import detect_block
+from .bootstrap import bootstrap_cis
+from .grade_cache import GradeCache, cache_key
 from ..suites.types import AnalyzerResult, Task, ScrapeOutput
 
+# Bump whenever a change here can alter grades; stored grades from other versions are recomputed
+ANALYZER_VERSION = "4"
+
+
+def _source_fingerprint() -> str:
+    # Any edit to this module, the block detector or its signatures also invalidates stored
+    # grades, even without a version bump
+    here = Path(__file__).parent
+    h = hashlib.blake2b(digest_size=6)
+    try:
+        for path in [Path(__file__), here / "block_detector.py", *sorted((here / "block_signatures").glob("*.json"))]:
+            h.update(path.name.encode("utf-8"))
+            h.update(path.read_bytes())
+    except OSError:
+        return "unknown"
+    return h.hexdigest()
+
+
+ANALYZER_FINGERPRINT = f"{ANALYZER_VERSION}+{_source_fingerprint()}"
+
 
 def smart_tokenize(text: str) -> list[str]:
     return re.findall(r"\d+/\d+|[\w'-]+", (text or "").lower())
 
 
+def strip_markdown(md: str) -> str:
+    if not md:
+        return ""
+    text = md
+    # Remove code fences and inline code
+    text = re.sub(r"```[\s\S]*?```", " ", text)
+    text = re.sub(r"`[^`]+`", " ", text)
+    # Images ![alt](url) -> alt
+    text = re.sub(r"!\[([^\]]*)\]\([^)]*\)", r"\1", text)
+    # Links [text](url) -> text
+    text = re.sub(r"\[([^\]]+)\]\([^)]*\)", r"\1", text)
+    # Strip markdown emphasis and headings markers
+    text = re.sub(r"^[#>\-\*\+\s]+", "", text, flags=re.MULTILINE)
+    text = re.sub(r"[*_]{1,3}([^*_]+)[*_]{1,3}", r"\1", text)
+    # Tables: drop pipes
+    text = re.sub(r"\|", " ", text)
+    # Collapse multiple spaces/newlines
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+class ContentScores(NamedTuple):
+    recall: float
+    precision: float
+    f1: float
+    ordered_recall: float
+    ordered_precision: float
+    ordered_f1: float
+    order_score: float
+
+
+def _f1(precision: float, recall: float) -> float:
+    return 2 * (precision * recall) / (precision + recall) if precision + recall > 0 else 0.0
+
+
+def lcs_length(pattern: List[int], text: List[int]) -> int:
+    """Longest common subsequence length, bit-parallel (Hyyro): one add/or/and per text token.
+
+    Bit i of v is cleared once pattern[i] can extend the LCS; Python ints make the pattern
+    length unbounded.
+    """
+    if not pattern or not text:
+        return 0
+    masks: Dict[int, int] = {}
+    for i, tid in enumerate(pattern):
+        masks[tid] = masks.get(tid, 0) | (1 << i)
+    full = (1 << len(pattern)) - 1
+    v = full
+    for tid in text:
+        u = v & masks.get(tid, 0)
+        v = ((v + u) | (v - u)) & full
+    return len(pattern) - v.bit_count()
+
+
+def _bigram_keys(ids: List[int], base: int) -> Set[int]:
+    return {a * base + b for a, b in zip(ids, ids[1:])}
+
+
+def score_content(
+    content_tokens: List[str], truth_tokens: List[str], lie_tokens: List[str], lie_weight: float = 4.0
+) -> ContentScores:
+    """Window and ordered-bigram metrics in one pass over the content tokens.
+
+    Window metrics: recall and noise on the best-matching window (length ~= truth snippet),
+    compared as token sets. Ordered metrics: share of truth bigrams found anywhere in the
+    content, with precision penalized by lie_weight per lie bigram (nav/footer text) found.
+    order_score is the LCS of the truth tokens and the best window over the truth length, so
+    shuffled truth words score low even with perfect recall.
+    """
+    if not content_tokens or not truth_tokens:
+        return ContentScores(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+    # Intern tokens: truth ids are 0..n_truth-1 and lie ids follow, so membership is an int compare
+    vocab: Dict[str, int] = {}
+    truth_ids = [vocab.setdefault(t, len(vocab)) for t in truth_tokens]
+    n_truth = len(vocab)
+    lie_ids = [vocab.setdefault(t, len(vocab)) for t in lie_tokens]
+    n_known = len(vocab)
+    ids = [vocab.setdefault(t, len(vocab)) for t in content_tokens]
+
+    truth_bigrams = _bigram_keys(truth_ids, n_known)
+    lie_bigrams = _bigram_keys(lie_ids, n_known) - truth_bigrams
+    truth_hits: Set[int] = set()
+    lie_hits: Set[int] = set()
+
+    n = len(ids)
+    win = max(len(truth_tokens), 1)
+    counts = [0] * len(vocab)
+    distinct = 0
+    matched = 0
+    best_recall = 0.0
+    best_precision = 0.0
+    best_start = 0
+
+    def add(j: int) -> None:
+        nonlocal distinct, matched
+        tid = ids[j]
+        if counts[tid] == 0:
+            distinct += 1
+            matched += tid < n_truth
+        counts[tid] += 1
+        if j and tid < n_known and ids[j - 1] < n_known:
+            key = ids[j - 1] * n_known + tid
+            if key in truth_bigrams:
+                truth_hits.add(key)
+            elif key in lie_bigrams:
+                lie_hits.add(key)
+
+    for j in range(min(win, n)):
+        add(j)
+    for i in range(0, max(n - win + 1, 1)):
+        if i:
+            tid = ids[i - 1]
+            counts[tid] -= 1
+            if counts[tid] == 0:
+                distinct -= 1
+                matched -= tid < n_truth
+            add(i + win - 1)
+        recall = matched / n_truth
+        precision = matched / max(distinct, 1)
+        # Prefer higher recall; if tie, higher precision
+        if (recall > best_recall) or (abs(recall - best_recall) < 1e-9 and precision > best_precision):
+            best_recall = recall
+            best_precision = precision
+            best_start = i
+
+    f1 = _f1(best_precision, best_recall)
+    order_score = lcs_length(truth_ids, ids[best_start:best_start + win]) / len(truth_ids)
+    if not truth_bigrams:
+        # Single-token truth has no bigrams; order can't matter, so reuse the window metrics
+        return ContentScores(best_recall, best_precision, f1, best_recall, best_precision, f1, order_score)
+    ordered_recall = len(truth_hits) / len(truth_bigrams)
+    penalty = len(truth_hits) + lie_weight * len(lie_hits)
+    ordered_precision = len(truth_hits) / penalty if penalty > 0 else 0.0
+    return ContentScores(
+        best_recall, best_precision, f1, ordered_recall, ordered_precision, _f1(ordered_precision, ordered_recall), order_score
+    )
+
+
+def window_scores(content_tokens: list[str], imp_tokens: list[str]) -> tuple[float, float, float]:
+    scores = score_content(content_tokens, imp_tokens, [])
+    return scores.recall, scores.precision, scores.f1
+
+
+def is_block_page(text: str, fmt: Optional[str] = None) -> bool:
+    return detect_block(text, fmt) is not None
 
 
 class QualityAnalyzer:
-    def analyze_one(self, task: Task, output: ScrapeOutput, lie_weight: float = 4.0) -> AnalyzerResult:
-        def strip_markdown(md: str) -> str:
-            if not md:
-                return ""
-            text = md
-            # Remove code fences and inline code
-            text = re.sub(r"```[\s\S]*?```", " ", text)
-            text = re.sub(r"`[^`]+`", " ", text)
-            # Images ![alt](url) -> alt
-            text = re.sub(r"!\[([^\]]*)\]\([^)]*\)", r"\1", text)
-            # Links [text](url) -> text
-            text = re.sub(r"\[([^\]]+)\]\([^)]*\)", r"\1", text)
-            # Strip markdown emphasis and headings markers
-            text = re.sub(r"^[#>\-\*\+\s]+", "", text, flags=re.MULTILINE)
-            text = re.sub(r"[*_]{1,3}([^*_]+)[*_]{1,3}", r"\1", text)
-            # Tables: drop pipes
-            text = re.sub(r"\|", " ", text)
-            # Collapse multiple spaces/newlines
-            text = re.sub(r"\s+", " ", text).strip()
-            return text
+    version = ANALYZER_FINGERPRINT
+
+    def __init__(self, cache: Optional[GradeCache] = None) -> None:
+        self.cache = cache
 
+    def grader_key(self, lie_weight: float) -> str:
+        return f"{self.version}|lie_weight={lie_weight:g}"
+
+    def content_scores(self, task: Task, output: ScrapeOutput, lie_weight: float = 4.0) -> Dict[str, Any]:
+        """Everything in a grade that depends only on the content, format and task texts."""
         content_text = output.content or ""
         if (output.format or "").lower() == "markdown":
             content_text = strip_markdown(content_text)
@@ -43,52 +204,27 @@ class QualityAnalyzer:
         truth_words = smart_tokenize(task.truth_text or "")
         lie_words = smart_tokenize(task.lie_text or "")
 
-        # Snippet-mode metrics: recall and noise on best-matching window (length ~= important snippet)
-        def window_scores(content_tokens: list[str], imp_tokens: list[str]) -> tuple[float, float, float]:
-            if not content_tokens or not imp_tokens:
-                return 0.0, 0.0, 0.0
-            win = max(len(imp_tokens), 1)
-            best_recall = 0.0
-            best_precision = 0.0
-            imp_set = set(imp_tokens)
-            for i in range(0, max(len(content_tokens) - win + 1, 1)):
-                window = content_tokens[i:i+win]
-                wset = set(window)
-                recall = len(wset & imp_set) / max(len(imp_set), 1)
-                precision = len(wset & imp_set) / max(len(wset), 1)
-                # Prefer higher recall; if tie, higher precision
-                if (recall > best_recall) or (abs(recall - best_recall) < 1e-9 and precision > best_precision):
-                    best_recall = recall
-                    best_precision = precision
-            # F1 from best window
-            if best_recall + best_precision > 0:
-                f1 = 2 * (best_precision * best_recall) / (best_precision + best_recall)
-            else:
-                f1 = 0.0
-            return best_recall, best_precision, f1
-
-        recall_snippet, precision_snippet, f1_snippet = window_scores(content_words, truth_words)
-
-        def is_block_page(text: str) -> bool:
-            if not text:
-                return False
-            t = text.lower()
-            # Common block-page markers
-            needles = [
-                "attention required",
-                "cloudflare",
-                "verify you are a human",
-                "access denied",
-                "bot detection",
-                "datadome",
-                "akamai bot manager",
-                "imperva",
-                "sucuri website firewall",
-            ]
-            return any(n in t for n in needles)
+        scores = score_content(content_words, truth_words, lie_words, lie_weight)
+        return {
+            **scores._asdict(),
+            "block_type": detect_block(output.content, output.format),
+            "has_reference": bool(truth_words or lie_words),
+        }
+
+    def analyze_one(self, task: Task, output: ScrapeOutput, lie_weight: float = 4.0) -> AnalyzerResult:
+        chash = output.content_hash or content_hash(output.content)
+        thash = truth_hash(task)
+        key = cache_key(chash, output.format, thash, self.grader_key(lie_weight)) if self.cache is not None else None
+        scores = self.cache.get(key) if key is not None else None
+        if scores is None:
+            scores = self.content_scores(task, output, lie_weight)
+            if key is not None:
+                self.cache.put(key, scores)
+        scores = dict(scores)
+        has_reference = scores.pop("has_reference")
 
         # If both important and not-important snippets are empty (e.g., known 4xx pages), force success rate False
-        if not truth_words and not lie_words:
+        if not has_reference:
             success = 0.0
         else:
             success = bool(
@@ -96,14 +232,15 @@ class QualityAnalyzer:
                 and not output.error
                 and bool(output.content)
                 and (output.content_size is not None and int(output.content_size) > 0)
-                and not is_block_page(output.content or "")
+                and scores["block_type"] is None
             )
 
         return AnalyzerResult(
             success=success,
-            recall=recall_snippet,
-            precision=precision_snippet,
-            f1=f1_snippet,
+            **scores,
+            content_hash=chash,
+            truth_hash=thash,
+            analyzer_version=self.version,
         )
 
     def summarize(self, results: List[AnalyzerResult]) -> dict:
@@ -113,12 +250,30 @@ class QualityAnalyzer:
                 "avg_recall": 0.0,
                 "avg_precision": 0.0,
                 "avg_f1": 0.0,
+                "avg_ordered_recall": 0.0,
+                "avg_ordered_precision": 0.0,
+                "avg_ordered_f1": 0.0,
+                "avg_order_score": 0.0,
             }
-        return {
+        summary = {
             "success_rate": sum(1 for r in results if r.success) / len(results),
             "avg_recall": sum(r.recall for r in results) / len(results),
             "avg_precision": sum(r.precision for r in results) / len(results),
             "avg_f1": sum(r.f1 for r in results) / len(results),
+            "avg_ordered_recall": sum(r.ordered_recall for r in results) / len(results),
+            "avg_ordered_precision": sum(r.ordered_precision for r in results) / len(results),
+            "avg_ordered_f1": sum(r.ordered_f1 for r in results) / len(results),
+            "avg_order_score": sum(r.order_score for r in results) / len(results),
         }
+        block_types: Dict[str, int] = {}
+        for r in results:
+            if r.block_type:
+                block_types[r.block_type] = block_types.get(r.block_type, 0) + 1
+        if block_types:
+            summary["block_types"] = dict(sorted(block_types.items(), key=lambda kv: -kv[1]))
+        bootstrap = bootstrap_cis(results)
+        if bootstrap is not None:
+            summary["bootstrap"] = bootstrap
+        return summary
 
 
@@ -0,0 +1,277 @@
+"""Micro-benchmarks for the grading hot path in evals/analysis/quality_analyzer.py.
+
+    python -m evals.benchmarks.grading_bench --sizes 1k,100k,1m
+    python -m evals.benchmarks.grading_bench --save-baseline evals/benchmarks/baselines/grading.json
+    python -m evals.benchmarks.grading_bench --compare evals/benchmarks/baselines/grading.json --threshold 0.15
+
+Times are the best of --repeat runs; peak memory comes from a separate tracemalloc pass
+so it does not skew the timings. --compare exits with code 1 when any case's ns/token
+regresses by more than --threshold against the baseline.
+
+No baseline is committed: timings only compare on the same machine, so record one with
+--save-baseline (e.g. on the main branch) before the first --compare.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import typer  # type: ignore
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+if str(PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(PACKAGE_ROOT))
+
+from evals.analysis.quality_analyzer import (  # type: ignore
+    QualityAnalyzer,
+    is_block_page,
+    smart_tokenize,
+    strip_markdown,
+    window_scores,
+)
+from evals.io_utils import read_json, read_scrape_output  # type: ignore
+from evals.suites.types import ScrapeOutput, Task  # type: ignore
+
+FORMATS = ("markdown", "html", "text")
+SIZE_UNITS = {"k": 1024, "m": 1024 * 1024}
+DEFAULT_SIZES = "1k,10k,100k,1m,5m"
+
+_WORDS = (
+    "the of and to in is for on that with as was by at from this are be or an it which "
+    "benchmark content scraper engine quality recall precision window token page crawl "
+    "navigation footer article section paragraph comorbidities gestion étape données 2024 3/4"
+).split()
+
+app = typer.Typer()
+
+
+@dataclass
+class BenchCase:
+    name: str
+    format: str
+    size_bytes: int
+    tokens: int
+    stage: str
+    best_s: float
+    ns_per_token: float
+    peak_kb: float
+
+
+def parse_size(s: str) -> int:
+    s = s.strip().lower()
+    if s and s[-1] in SIZE_UNITS:
+        return int(float(s[:-1]) * SIZE_UNITS[s[-1]])
+    return int(s)
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n))
+
+
+def synthetic_page(fmt: str, size: int, truth: str, seed: int = 0) -> str:
+    """Build a page of ~size bytes in the given format with the truth snippet in the middle."""
+    rng = random.Random(f"{seed}:{fmt}:{size}")
+    parts: List[str] = []
+    total = 0
+    inserted = False
+    while total < size:
+        sentence = _sentence(rng, rng.randint(8, 30))
+        if fmt == "markdown":
+            block = rng.choice([
+                f"## {sentence[:40]}\n\n",
+                f"{sentence} [{sentence[:12]}](https://example.com/{rng.randint(0, 9999)}) **{sentence[:20]}**.\n\n",
+                f"- {sentence}\n",
+                f"| {sentence[:20]} | {sentence[20:40]} |\n",
+            ])
+        elif fmt == "html":
+            block = rng.choice([
+                f"<h2>{sentence[:40]}</h2>\n",
+                f"<p>{sentence} <a href=\"https://example.com/{rng.randint(0, 9999)}\">{sentence[:12]}</a></p>\n",
+                f"<div class=\"nav\"><ul><li>{sentence[:20]}</li></ul></div>\n",
+            ])
+        else:
+            block = sentence + "\n"
+        if not inserted and total >= size // 2:
+            block = (f"<p>{truth}</p>\n" if fmt == "html" else f"{truth}\n\n") + block
+            inserted = True
+        parts.append(block)
+        total += len(block.encode("utf-8"))
+    if not inserted:
+        parts.append(truth)
+    return "".join(parts)
+
+
+# The pre-signature block check (lowercase everything, one substring scan per needle), kept
+# as the reference the bounded detector is compared against
+_LEGACY_BLOCK_NEEDLES = (
+    "attention required", "cloudflare", "verify you are a human", "access denied", "bot detection",
+    "datadome", "akamai bot manager", "imperva", "sucuri website firewall",
+)
+
+
+def legacy_is_block_page(text: str) -> bool:
+    t = (text or "").lower()
+    return any(n in t for n in _LEGACY_BLOCK_NEEDLES)
+
+
+def _time_best(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _peak_kb(fn: Callable[[], object]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def _stages(content: str, fmt: str, task: Task) -> Dict[str, Callable[[], object]]:
+    text = strip_markdown(content) if fmt == "markdown" else content
+    tokens = smart_tokenize(text)
+    truth = smart_tokenize(task.truth_text)
+    output = ScrapeOutput(
+        scraper="bench", url=task.url, status_code=200, error=None, created_at=None,
+        format=fmt, content_size=len(content.encode("utf-8")), content=content,  # type: ignore[arg-type]
+    )
+    analyzer = QualityAnalyzer()
+    stages: Dict[str, Callable[[], object]] = {
+        "smart_tokenize": lambda: smart_tokenize(text),
+        "window_scores": lambda: window_scores(tokens, truth),
+        "is_block_page": lambda: is_block_page(content, fmt),
+        "is_block_page_legacy": lambda: legacy_is_block_page(content),
+        "analyze_one": lambda: analyzer.analyze_one(task, output),
+    }
+    if fmt == "markdown":
+        stages["strip_markdown"] = lambda: strip_markdown(content)
+    return stages
+
+
+Page = Tuple[str, str, str, Task]
+
+
+def iter_real_pages(runs_dir: Path, limit: int, fallback: Task) -> Iterator[Page]:
+    """Yield (name, format, content, task) for scraped pages found under runs_dir/*_quality/."""
+    n = 0
+    for scrape_path in sorted(runs_dir.glob("*_quality/*/scrape_output.json")):
+        if n >= limit:
+            return
+        out = read_scrape_output(scrape_path, scrape_path.parent.parent.name, "")
+        if not (out.content and out.format in FORMATS):
+            continue
+        task_path = scrape_path.parent / "task.json"
+        task = Task(**read_json(task_path)) if task_path.exists() else fallback
+        n += 1
+        yield f"real:{scrape_path.parent.parent.name}/{scrape_path.parent.name}", out.format, out.content, task
+
+
+def run_cases(pages: List[Page], repeat: int, memory: bool) -> List[BenchCase]:
+    cases: List[BenchCase] = []
+    for name, fmt, content, task in pages:
+        size = len(content.encode("utf-8"))
+        n_tokens = max(len(smart_tokenize(strip_markdown(content) if fmt == "markdown" else content)), 1)
+        for stage, fn in _stages(content, fmt, task).items():
+            best = _time_best(fn, repeat)
+            peak = _peak_kb(fn) if memory else 0.0
+            cases.append(BenchCase(
+                name=name, format=fmt, size_bytes=size, tokens=n_tokens, stage=stage,
+                best_s=best, ns_per_token=best * 1e9 / n_tokens, peak_kb=peak,
+            ))
+            typer.echo(
+                f"{name:<40} {fmt:<9} {stage:<15} size={size:>9} tokens={n_tokens:>8} "
+                f"best={best * 1000:>10.2f}ms ns/token={best * 1e9 / n_tokens:>9.1f} peak={peak:>10.1f}KiB"
+            )
+    return cases
+
+
+def compare_to_baseline(cases: List[BenchCase], baseline: Dict, threshold: float, min_time_s: float) -> List[str]:
+    base = {(c["name"], c["format"], c["stage"]): c for c in baseline.get("cases", [])}
+    regressions: List[str] = []
+    for c in cases:
+        ref = base.get((c.name, c.format, c.stage))
+        if not ref or not ref.get("ns_per_token"):
+            continue
+        # Sub-millisecond cases are dominated by timer noise
+        if max(c.best_s, ref.get("best_s", 0.0)) < min_time_s:
+            continue
+        ratio = c.ns_per_token / ref["ns_per_token"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{c.name} {c.format} {c.stage}: {ref['ns_per_token']:.1f} -> {c.ns_per_token:.1f} ns/token (x{ratio:.2f})")
+    return regressions
+
+
+@app.command()
+def main(
+    sizes: str = typer.Option(DEFAULT_SIZES, "--sizes", help="Comma-separated synthetic page sizes (e.g. 1k,100k,5m)."),
+    formats: str = typer.Option(",".join(FORMATS), "--formats", help="Comma-separated formats: markdown,html,text."),
+    runs_dir: Optional[str] = typer.Option(None, "--runs-dir", help="Also benchmark real scraped pages from <runs-dir>/*_quality/."),
+    real_limit: int = typer.Option(20, "--real-limit", help="Max real pages to include."),
+    repeat: int = typer.Option(3, "--repeat", help="Timing repetitions per case (best is kept)."),
+    memory: bool = typer.Option(True, "--memory/--no-memory", help="Measure peak memory with tracemalloc."),
+    seed: int = typer.Option(0, "--seed"),
+    out: Optional[str] = typer.Option(None, "--out", help="Write results JSON here."),
+    save_baseline: Optional[str] = typer.Option(None, "--save-baseline", help="Write results as the new baseline."),
+    compare: Optional[str] = typer.Option(None, "--compare", help="Baseline JSON to check against."),
+    threshold: float = typer.Option(0.15, "--threshold", help="Allowed ns/token regression vs baseline (0.15 = 15%)."),
+    min_time_ms: float = typer.Option(1.0, "--min-time-ms", help="Ignore cases faster than this when comparing."),
+):
+    if compare and not Path(compare).exists():
+        typer.echo(f"[bench] no baseline at {compare}; record one on this machine first with --save-baseline {compare}")
+        raise typer.Exit(code=1)
+    task = Task(
+        id="bench",
+        url="https://example.com/bench",
+        truth_text=_sentence(random.Random(seed), 100),
+        lie_text="home about contact privacy policy terms of service login",
+    )
+    pages: List[Page] = []
+    for fmt in [f.strip() for f in formats.split(",") if f.strip()]:
+        for size_s in [s for s in sizes.split(",") if s.strip()]:
+            pages.append((f"synthetic:{size_s.strip()}", fmt, synthetic_page(fmt, parse_size(size_s), task.truth_text, seed), task))
+    if runs_dir:
+        pages.extend(iter_real_pages(Path(runs_dir), real_limit, task))
+
+    cases = run_cases(pages, repeat, memory)
+    payload = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cases": [asdict(c) for c in cases],
+    }
+    for path in (out, save_baseline):
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            Path(path).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            typer.echo(f"[bench] wrote {path}")
+
+    if compare:
+        baseline = json.loads(Path(compare).read_text(encoding="utf-8"))
+        regressions = compare_to_baseline(cases, baseline, threshold, min_time_ms / 1000)
+        if regressions:
+            typer.echo(f"[bench] {len(regressions)} regression(s) over {threshold:.0%}:")
+            for r in regressions:
+                typer.echo(f"  {r}")
+            raise typer.Exit(code=1)
+        typer.echo(f"[bench] no regressions over {threshold:.0%} vs {compare}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,576 @@
+"""Local pool of Chromium browsers that browser engines lease over CDP instead of launching their own.
+
+    python -m evals.browser_farm.server --browsers 4 --port 9300
+    BROWSER_FARM_URL=http://127.0.0.1:9300 python run_all.py --engines playwright_scraper,selenium_scraper
+
+Each browser is one Chromium process with its own profile and remote-debugging port. An
+engine leases a whole browser (POST /lease), drives it over CDP, and hands it back
+(POST /release/<lease_id>); browsers stay warm across pages, engines and runs. On release
+the lessee's tabs and contexts are closed and the HTTP cache, cookies and site storage are
+cleared, so nothing carries over to the next lease. A health loop probes idle browsers,
+restarts dead ones, reclaims leases past their TTL and recycles a browser after
+--max-uses leases so memory growth stays bounded. GET /status reports the pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import contextlib
+import json
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import typer  # type: ignore
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+if str(PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(PACKAGE_ROOT))
+
+CHROMIUM_CANDIDATES = ("chromium", "chromium-browser", "google-chrome", "google-chrome-stable", "chrome")
+_STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 503: "Service Unavailable"}
+
+app = typer.Typer()
+
+
+@dataclass
+class FarmConfig:
+    browsers: int = 4
+    chromium: Optional[str] = None
+    # Debugging ports are base_port .. base_port + browsers - 1
+    base_port: int = 9400
+    lease_ttl_s: float = 600.0
+    max_uses: int = 200
+    health_interval_s: float = 10.0
+    startup_timeout_s: float = 30.0
+    headless: bool = True
+    profiles_dir: Optional[Path] = None
+
+
+@dataclass
+class FarmStats:
+    leases: int = 0
+    releases: int = 0
+    waited: int = 0
+    wait_s: float = 0.0
+    lease_timeouts: int = 0
+    expired: int = 0
+    restarts: int = 0
+    resets: int = 0
+    reset_failures: int = 0
+    started_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class FarmBrowser:
+    index: int
+    port: int
+    profile_dir: Path
+    state: str = "starting"  # starting | idle | leased | resetting | restarting | failed
+    process: Optional[asyncio.subprocess.Process] = None
+    lease_id: Optional[str] = None
+    engine: Optional[str] = None
+    lease_expires: float = 0.0
+    uses: int = 0
+    restarts: int = 0
+
+    @property
+    def http_endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "index": self.index, "port": self.port, "state": self.state, "engine": self.engine,
+            "uses": self.uses, "restarts": self.restarts, "pid": self.process.pid if self.process else None,
+        }
+
+
+def find_chromium(explicit: Optional[str] = None) -> str:
+    if explicit:
+        return explicit
+    for name in CHROMIUM_CANDIDATES:
+        path = shutil.which(name)
+        if path:
+            return path
+    # Playwright's bundled Chromium, when its browsers are installed
+    with contextlib.suppress(Exception):
+        from playwright.sync_api import sync_playwright  # type: ignore
+
+        with sync_playwright() as p:
+            return p.chromium.executable_path
+    raise RuntimeError(f"No Chromium found; pass --chromium or install one of {', '.join(CHROMIUM_CANDIDATES)}")
+
+
+async def http_json(port: int, path: str, timeout: float = 2.0) -> Optional[Dict[str, Any]]:
+    """GET a DevTools HTTP endpoint of a local browser; None when it does not answer."""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nConnection: close\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+        raw = await asyncio.wait_for(reader.read(), timeout)
+        head, _, body = raw.partition(b"\r\n\r\n")
+        if b" 200 " not in head.split(b"\r\n", 1)[0]:
+            return None
+        return json.loads(body)
+    except (OSError, asyncio.TimeoutError, ValueError):
+        return None
+    finally:
+        with contextlib.suppress(Exception):
+            writer.close()
+
+
+class CDPSession:
+    """Minimal CDP client over the browser-level WebSocket (text frames, no extensions)."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+
+    @classmethod
+    async def connect(cls, ws_url: str, timeout: float = 5.0) -> "CDPSession":
+        parts = urlsplit(ws_url)
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(parts.hostname, parts.port or 80), timeout)
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        writer.write(
+            (
+                f"GET {parts.path} HTTP/1.1\r\nHost: {parts.netloc}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+            ).encode("latin-1")
+        )
+        await writer.drain()
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+        if b" 101 " not in head.split(b"\r\n", 1)[0]:
+            writer.close()
+            raise ConnectionError(f"WebSocket upgrade refused by {ws_url}")
+        return cls(reader, writer)
+
+    async def _send_frame(self, payload: bytes) -> None:
+        # Client frames are masked (RFC 6455 5.3)
+        mask = os.urandom(4)
+        n = len(payload)
+        if n < 126:
+            header = bytes([0x81, 0x80 | n])
+        elif n < 1 << 16:
+            header = bytes([0x81, 0x80 | 126]) + n.to_bytes(2, "big")
+        else:
+            header = bytes([0x81, 0x80 | 127]) + n.to_bytes(8, "big")
+        self._writer.write(header + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload)))
+        await self._writer.drain()
+
+    async def _read_message(self) -> bytes:
+        message = b""
+        while True:
+            b0, b1 = await self._reader.readexactly(2)
+            n = b1 & 0x7F
+            if n == 126:
+                n = int.from_bytes(await self._reader.readexactly(2), "big")
+            elif n == 127:
+                n = int.from_bytes(await self._reader.readexactly(8), "big")
+            mask = await self._reader.readexactly(4) if b1 & 0x80 else None
+            payload = await self._reader.readexactly(n)
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            opcode = b0 & 0x0F
+            if opcode == 0x8:
+                raise ConnectionError("CDP connection closed")
+            if opcode in (0x0, 0x1, 0x2):
+                message += payload
+                if b0 & 0x80:
+                    return message
+
+    async def send(self, method: str, params: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None, timeout: float = 5.0) -> Dict[str, Any]:
+        self._next_id += 1
+        msg_id = self._next_id
+        msg: Dict[str, Any] = {"id": msg_id, "method": method, "params": params or {}}
+        if session_id:
+            msg["sessionId"] = session_id
+        await self._send_frame(json.dumps(msg).encode("utf-8"))
+
+        async def _reply() -> Dict[str, Any]:
+            while True:
+                data = json.loads(await self._read_message())
+                # Events interleave with replies; only our reply matters
+                if data.get("id") == msg_id:
+                    return data
+
+        reply = await asyncio.wait_for(_reply(), timeout)
+        if "error" in reply:
+            raise RuntimeError(f"{method}: {reply['error'].get('message')}")
+        return reply.get("result", {})
+
+    async def close(self) -> None:
+        with contextlib.suppress(Exception):
+            self._writer.close()
+
+
+async def reset_browser(ws_url: str) -> None:
+    """Return a browser to a blank state: one about:blank tab, no extra contexts, empty HTTP
+    cache and cookies, and no storage left for the origins of the pages that were open."""
+    cdp = await CDPSession.connect(ws_url)
+    try:
+        targets = (await cdp.send("Target.getTargets"))["targetInfos"]
+        for context_id in (await cdp.send("Target.getBrowserContexts")).get("browserContextIds", []):
+            await cdp.send("Target.disposeBrowserContext", {"browserContextId": context_id})
+        blank = (await cdp.send("Target.createTarget", {"url": "about:blank"}))["targetId"]
+        origins = set()
+        for t in targets:
+            if t.get("type") == "page" and t.get("targetId") != blank:
+                parts = urlsplit(t.get("url", ""))
+                if parts.scheme in ("http", "https") and parts.netloc:
+                    origins.add(f"{parts.scheme}://{parts.netloc}")
+                with contextlib.suppress(RuntimeError):
+                    await cdp.send("Target.closeTarget", {"targetId": t["targetId"]})
+        session = (await cdp.send("Target.attachToTarget", {"targetId": blank, "flatten": True}))["sessionId"]
+        await cdp.send("Network.clearBrowserCache", session_id=session)
+        await cdp.send("Storage.clearCookies")
+        for origin in sorted(origins):
+            await cdp.send("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    finally:
+        await cdp.close()
+
+
+class BrowserFarm:
+    def __init__(self, config: FarmConfig) -> None:
+        self.config = config
+        self.stats = FarmStats()
+        self.chromium = find_chromium(config.chromium)
+        self._own_profiles = config.profiles_dir is None
+        root = config.profiles_dir or Path(tempfile.mkdtemp(prefix="scrape_evals_browser_farm_"))
+        self.browsers = [
+            FarmBrowser(index=i, port=config.base_port + i, profile_dir=root / f"browser-{i}") for i in range(config.browsers)
+        ]
+        self._root = root
+        self._leases: Dict[str, FarmBrowser] = {}
+        self._cond = asyncio.Condition()
+        self._health_task: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+
+    # Browser processes -----------------------------------------------
+
+    async def _launch(self, b: FarmBrowser) -> bool:
+        b.profile_dir.mkdir(parents=True, exist_ok=True)
+        args = [
+            self.chromium,
+            f"--remote-debugging-port={b.port}",
+            "--remote-debugging-address=127.0.0.1",
+            f"--user-data-dir={b.profile_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--disable-background-networking",
+        ]
+        if self.config.headless:
+            args.append("--headless=new")
+        args.append("about:blank")
+        b.process = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        deadline = time.monotonic() + self.config.startup_timeout_s
+        while time.monotonic() < deadline:
+            if b.process.returncode is not None:
+                return False
+            if await http_json(b.port, "/json/version") is not None:
+                return True
+            await asyncio.sleep(0.2)
+        return False
+
+    async def _stop(self, b: FarmBrowser) -> None:
+        proc, b.process = b.process, None
+        if proc is None or proc.returncode is not None:
+            return
+        proc.terminate()
+        try:
+            await asyncio.wait_for(proc.wait(), 5.0)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _schedule_restart(self, b: FarmBrowser) -> None:
+        # Marked first, so the browser can't be leased before the restart task runs
+        b.state = "restarting"
+        self._spawn(self._restart(b))
+
+    async def _reset(self, b: FarmBrowser) -> None:
+        """Clear what the last lessee left behind before the browser is leased again."""
+        version = await http_json(b.port, "/json/version")
+        try:
+            if version is None or not version.get("webSocketDebuggerUrl"):
+                raise ConnectionError("browser not answering")
+            await reset_browser(version["webSocketDebuggerUrl"])
+        except (OSError, EOFError, RuntimeError, KeyError, ValueError, asyncio.TimeoutError):
+            # A browser that can't be cleaned is replaced instead
+            self.stats.reset_failures += 1
+            await self._restart(b)
+            return
+        self.stats.resets += 1
+        async with self._cond:
+            b.state = "idle"
+            self._cond.notify_all()
+
+    async def _restart(self, b: FarmBrowser) -> None:
+        """Replace the browser process, on an empty profile: a restarted browser may have been
+        left mid-lease, so nothing in its profile is trusted."""
+        b.lease_id = b.engine = None
+        await self._stop(b)
+        shutil.rmtree(b.profile_dir, ignore_errors=True)
+        ok = await self._launch(b)
+        b.restarts += 1
+        self.stats.restarts += 1
+        b.uses = 0
+        async with self._cond:
+            b.state = "idle" if ok else "failed"
+            self._cond.notify_all()
+
+    async def start(self) -> "BrowserFarm":
+        results = await asyncio.gather(*(self._launch(b) for b in self.browsers))
+        async with self._cond:
+            for b, ok in zip(self.browsers, results):
+                b.state = "idle" if ok else "failed"
+        if not any(results):
+            raise RuntimeError(f"No browser came up with {self.chromium}")
+        self._health_task = asyncio.create_task(self._health_loop())
+        return self
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._health_task
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*(self._stop(b) for b in self.browsers))
+        if self._own_profiles:
+            shutil.rmtree(self._root, ignore_errors=True)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.health_interval_s)
+            await self.check_health()
+
+    async def check_health(self) -> None:
+        now = time.monotonic()
+        for b in self.browsers:
+            if b.state == "leased" and now > b.lease_expires:
+                # The lessee died or hung; its pages may still be open, so start fresh
+                self._leases.pop(b.lease_id or "", None)
+                self.stats.expired += 1
+                self._schedule_restart(b)
+            elif b.state in ("idle", "failed"):
+                alive = b.process is not None and b.process.returncode is None
+                if not alive or await http_json(b.port, "/json/version") is None:
+                    self._schedule_restart(b)
+
+    # Leasing -----------------------------------------------------------
+
+    async def lease(self, engine: str, wait_s: float) -> Optional[Dict[str, Any]]:
+        """Hand out an idle, responsive browser, waiting up to wait_s for one to free up."""
+        started = time.monotonic()
+        deadline = started + max(0.0, wait_s)
+        waited = False
+        while True:
+            async with self._cond:
+                b = next((b for b in self.browsers if b.state == "idle"), None)
+                while b is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats.lease_timeouts += 1
+                        return None
+                    waited = True
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(self._cond.wait(), remaining)
+                    b = next((b for b in self.browsers if b.state == "idle"), None)
+                b.state = "leased"
+            # Probe outside the lock; a browser that stopped answering is restarted and skipped
+            version = await http_json(b.port, "/json/version")
+            if version is None or not version.get("webSocketDebuggerUrl"):
+                self._schedule_restart(b)
+                continue
+            lease_id = uuid.uuid4().hex
+            b.lease_id, b.engine = lease_id, engine
+            b.lease_expires = time.monotonic() + self.config.lease_ttl_s
+            b.uses += 1
+            self._leases[lease_id] = b
+            self.stats.leases += 1
+            if waited:
+                self.stats.waited += 1
+                self.stats.wait_s += time.monotonic() - started
+            return {
+                "lease_id": lease_id,
+                "browser": b.index,
+                "http_endpoint": b.http_endpoint,
+                "ws_endpoint": version["webSocketDebuggerUrl"],
+                "ttl_s": self.config.lease_ttl_s,
+            }
+
+    async def release(self, lease_id: str) -> bool:
+        b = self._leases.pop(lease_id, None)
+        if b is None:
+            return False
+        self.stats.releases += 1
+        if b.uses >= self.config.max_uses:
+            self._schedule_restart(b)
+            return True
+        b.state, b.lease_id, b.engine = "resetting", None, None
+        self._spawn(self._reset(b))
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for b in self.browsers:
+            counts[b.state] = counts.get(b.state, 0) + 1
+        return {"chromium": self.chromium, "states": counts, "stats": asdict(self.stats), "browsers": [b.describe() for b in self.browsers]}
+
+
+class FarmServer:
+    """Minimal HTTP/1.1 control API (one request per connection) in front of a BrowserFarm."""
+
+    def __init__(self, farm: BrowserFarm, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.farm = farm
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "FarmServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _route(self, method: str, target: str) -> Tuple[int, Dict[str, Any]]:
+        parts = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        path = parts.path.rstrip("/")
+        if path == "/__health":
+            return 200, {"ok": True}
+        if path == "/status":
+            return 200, self.farm.status()
+        if method != "POST":
+            return 405, {"error": "use POST for /lease and /release"}
+        if path == "/lease":
+            try:
+                wait_s = float(query.get("wait_s", "30"))
+            except ValueError:
+                return 400, {"error": "wait_s must be a number"}
+            lease = await self.farm.lease(query.get("engine", "unknown"), wait_s)
+            if lease is None:
+                return 503, {"error": f"no browser free within {wait_s:g}s"}
+            return 200, lease
+        if path.startswith("/release/"):
+            released = await self.farm.release(path[len("/release/"):])
+            return (200, {"released": True}) if released else (404, {"error": "unknown or expired lease"})
+        return 404, {"error": "not found"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            request_line = head.decode("latin-1").split("\r\n", 1)[0].split(" ")
+            if len(request_line) < 3:
+                return
+            status, payload = await self._route(request_line[0], request_line[1])
+            body = json.dumps(payload).encode("utf-8")
+            writer.write(
+                (
+                    f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, 'Status')}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+                ).encode("latin-1")
+                + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            return
+        finally:
+            with contextlib.suppress(Exception):
+                writer.close()
+
+
+@app.command()
+def main(
+    browsers: int = typer.Option(4, "--browsers", help="Chromium processes in the pool."),
+    host: str = typer.Option("127.0.0.1", "--host"),
+    port: int = typer.Option(9300, "--port", help="Control API port (BROWSER_FARM_URL=http://<host>:<port>)."),
+    base_port: int = typer.Option(9400, "--base-port", help="First remote-debugging port; browser i listens on base + i."),
+    chromium: Optional[str] = typer.Option(None, "--chromium", help="Chromium/Chrome executable (default: first on PATH, else Playwright's)."),
+    lease_ttl_s: float = typer.Option(600.0, "--lease-ttl-s", help="Leases not released within this time are reclaimed and the browser restarted."),
+    max_uses: int = typer.Option(200, "--max-uses", help="Restart a browser after this many leases."),
+    health_interval_s: float = typer.Option(10.0, "--health-interval-s", help="Seconds between health checks of idle browsers."),
+    profiles_dir: Optional[str] = typer.Option(None, "--profiles-dir", help="Directory for the browser profiles (default: temporary, removed on exit)."),
+    headful: bool = typer.Option(False, "--headful", help="Show the browser windows."),
+):
+    try:
+        # Before the event loop starts: Playwright's lookup uses its sync API
+        chromium = find_chromium(chromium)
+    except RuntimeError as e:
+        typer.echo(f"[browser-farm] {e}")
+        raise typer.Exit(code=1)
+    config = FarmConfig(
+        browsers=browsers,
+        chromium=chromium,
+        base_port=base_port,
+        lease_ttl_s=lease_ttl_s,
+        max_uses=max_uses,
+        health_interval_s=health_interval_s,
+        headless=not headful,
+        profiles_dir=Path(profiles_dir) if profiles_dir else None,
+    )
+
+    async def _main():
+        # SIGTERM (e.g. from a process manager) shuts down like Ctrl-C, so no browser is orphaned
+        with contextlib.suppress(NotImplementedError):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        farm = BrowserFarm(config)
+        await farm.start()
+        server = FarmServer(farm, host=host, port=port)
+        try:
+            await server.start()
+            states = farm.status()["states"]
+            typer.echo(f"[browser-farm] {farm.chromium} browsers={states} serving {server.base_url}")
+            await server.serve_forever()
+        finally:
+            await server.close()
+            await farm.close()
+
+    try:
+        asyncio.run(_main())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    except RuntimeError as e:
+        typer.echo(f"[browser-farm] {e}")
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,105 @@
+"""Paired bootstrap comparison of every engine pair in an output directory.
+
+    python -m evals.compare --output-dir runs
+    python -m evals.compare --output-dir runs --engines scraperapi_api,zyte_api --metric avg_f1
+
+Grades are read from each engine's run index and compared on the tasks every engine
+graded with the current analyzer and --lie-weight (stale grades are left out; regrade
+first). Results go to <output-dir>/results/comparisons.quality.json, a name the
+notebook's *_quality.json glob does not pick up; pairs whose difference is significant
+at --confidence are also printed.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import typer  # type: ignore
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+if str(PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(PACKAGE_ROOT))
+
+from evals.analysis.quality_analyzer import QualityAnalyzer  # type: ignore
+from evals.analysis.bootstrap import (  # type: ignore
+    DEFAULT_CONFIDENCE,
+    DEFAULT_RESAMPLES,
+    METRICS,
+    available,
+    paired_comparisons,
+)
+from evals.io_utils import write_json  # type: ignore
+from evals.manifest import RunManifest  # type: ignore
+from evals.regrade import SUITE_KEY, engine_dirs  # type: ignore
+from evals.suites.types import AnalyzerResult  # type: ignore
+
+app = typer.Typer()
+
+
+def comparisons_path(output_dir: Path) -> Path:
+    return output_dir / "results" / f"comparisons.{SUITE_KEY}.json"
+
+
+def load_grades(engine_dir: Path, grader: str) -> Dict[str, AnalyzerResult]:
+    """Grades computed by `grader` from the run's current scrape outputs."""
+    manifest = RunManifest.load(engine_dir)
+    try:
+        return {task_id: manifest.grade_result(task_id) for task_id in manifest.entries if manifest.grade_is_current(task_id, grader)}
+    finally:
+        manifest.close()
+
+
+def compare_engines(
+    output_dir: Path,
+    engines: Optional[List[str]] = None,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = 0,
+    lie_weight: float = 4.0,
+) -> Dict:
+    grader = QualityAnalyzer().grader_key(lie_weight)
+    per_engine = {
+        d.name[: -len(f"_{SUITE_KEY}")]: grades
+        for d in engine_dirs(output_dir, engines)
+        if (grades := load_grades(d, grader))
+    }
+    report = paired_comparisons(per_engine, resamples=resamples, confidence=confidence, seed=seed)
+    report["grader"] = grader
+    return report
+
+
+@app.command()
+def main(
+    output_dir: str = typer.Option("runs", "--output-dir", help="Directory holding <engine>_quality/ runs."),
+    engines: Optional[str] = typer.Option(None, "--engines", help="Comma-separated engine names (default: every engine found)."),
+    metric: str = typer.Option("avg_f1", "--metric", help=f"Metric to print ({', '.join(METRICS)}); all are written."),
+    resamples: int = typer.Option(DEFAULT_RESAMPLES, "--resamples", help="Bootstrap resamples."),
+    confidence: float = typer.Option(DEFAULT_CONFIDENCE, "--confidence", help="Confidence level of the intervals."),
+    seed: int = typer.Option(0, "--seed", help="Seed for resampling."),
+    lie_weight: float = typer.Option(4.0, "--lie-weight", help="Lie weight the compared grades must have been computed with."),
+):
+    if not available():
+        typer.echo("[compare] numpy is required (pip install numpy)")
+        raise typer.Exit(code=1)
+    if metric not in METRICS:
+        typer.echo(f"[compare] unknown metric '{metric}'; expected one of {', '.join(METRICS)}")
+        raise typer.Exit(code=1)
+    base = Path(output_dir)
+    engine_list = [e.strip() for e in engines.split(",") if e.strip()] if engines else None
+    report = compare_engines(base, engine_list, resamples=resamples, confidence=confidence, seed=seed, lie_weight=lie_weight)
+    if len(report["engines"]) < 2:
+        typer.echo(f"[compare] need current grades of at least two engines under {base} (run python -m evals.regrade on stale runs)")
+        raise typer.Exit(code=1)
+    write_json(comparisons_path(base), report)
+    typer.echo(f"[compare] engines={len(report['engines'])} common_tasks={report['tasks']} pairs={len(report['pairs'])} -> {comparisons_path(base)}")
+    alpha = 1.0 - confidence
+    for pair in sorted(report["pairs"], key=lambda p: -abs(p["metrics"][metric]["diff"])):
+        m = pair["metrics"][metric]
+        flag = "*" if m["p_value"] < alpha else " "
+        typer.echo(f"{flag} {pair['a']:<24} - {pair['b']:<24} {metric}={m['diff']:+.4f} ci=[{m['ci'][0]:+.4f}, {m['ci'][1]:+.4f}] p={m['p_value']:.4f}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,188 @@
+"""Per-task differences between two runs, e.g. before and after an engine upgrade.
+
+    python -m evals.diff runs-old/zyte_api_quality runs/zyte_api_quality
+    python -m evals.diff scraperapi_api zyte_api --output-dir runs --top 50 --json diff.json
+
+Each side is a run directory or an engine name under --output-dir. Runs are joined by
+task id using their run indexes; runs without an index are read from the per-task files
+in parallel. Tasks are listed by impact (lost/gained success first, then |F1 change|).
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import typer  # type: ignore
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+if str(PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(PACKAGE_ROOT))
+
+from evals.io_utils import read_json, write_json  # type: ignore
+from evals.manifest import MANIFEST_FILENAME, RunManifest  # type: ignore
+from evals.regrade import SUITE_KEY  # type: ignore
+
+app = typer.Typer()
+
+
+@dataclass
+class TaskRow:
+    success: Optional[bool]
+    f1: Optional[float]
+    elapsed_s: Optional[float]
+    status_code: Optional[int]
+
+
+@dataclass
+class TaskDelta:
+    task_id: str
+    change: str  # regressed | improved | unchanged | only_a | only_b
+    success_a: Optional[bool]
+    success_b: Optional[bool]
+    f1_a: Optional[float]
+    f1_b: Optional[float]
+    f1_delta: Optional[float]
+    elapsed_delta_s: Optional[float]
+    status_a: Optional[int]
+    status_b: Optional[int]
+
+    @property
+    def impact(self) -> Tuple[int, float]:
+        flipped = self.success_a is not None and self.success_b is not None and self.success_a != self.success_b
+        return int(flipped), abs(self.f1_delta or 0.0)
+
+
+def resolve_run(spec: str, output_dir: Path) -> Path:
+    path = Path(spec)
+    if path.is_dir():
+        return path
+    named = output_dir / f"{spec}_{SUITE_KEY}"
+    if named.is_dir():
+        return named
+    raise FileNotFoundError(f"{spec} is neither a run directory nor an engine under {output_dir}")
+
+
+def _row_from_files(task_dir: Path) -> Optional[TaskRow]:
+    try:
+        scrape = read_json(task_dir / "scrape_output.json")
+    except (OSError, ValueError):
+        return None
+    try:
+        grade = read_json(task_dir / "grader_output.json")
+    except (OSError, ValueError):
+        grade = {}
+    return TaskRow(grade.get("success"), grade.get("f1"), scrape.get("elapsed_s"), scrape.get("status_code"))
+
+
+def load_run(engine_dir: Path, workers: int = 16) -> Dict[str, TaskRow]:
+    rows: Dict[str, TaskRow] = {}
+    if (engine_dir / MANIFEST_FILENAME).exists():
+        manifest = RunManifest.load(engine_dir)
+        try:
+            for task_id, entry in manifest.entries.items():
+                scrape = entry.get("scrape")
+                if not scrape:
+                    continue
+                result = (entry.get("grade") or {}).get("result") or {}
+                rows[task_id] = TaskRow(result.get("success"), result.get("f1"), scrape.get("elapsed_s"), scrape.get("status_code"))
+        finally:
+            manifest.close()
+        return rows
+    # Older run without an index: read the small per-task JSON files concurrently (I/O bound)
+    task_dirs = [p for p in engine_dir.iterdir() if p.is_dir()]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for task_dir, row in zip(task_dirs, pool.map(_row_from_files, task_dirs)):
+            if row is not None:
+                rows[task_dir.name] = row
+    return rows
+
+
+def diff_runs(a: Dict[str, TaskRow], b: Dict[str, TaskRow], f1_threshold: float) -> List[TaskDelta]:
+    deltas: List[TaskDelta] = []
+    for task_id in sorted(a.keys() | b.keys()):
+        ra, rb = a.get(task_id), b.get(task_id)
+        if ra is None or rb is None:
+            deltas.append(TaskDelta(
+                task_id, "only_b" if ra is None else "only_a",
+                ra.success if ra else None, rb.success if rb else None, ra.f1 if ra else None, rb.f1 if rb else None,
+                None, None, ra.status_code if ra else None, rb.status_code if rb else None,
+            ))
+            continue
+        f1_delta = rb.f1 - ra.f1 if ra.f1 is not None and rb.f1 is not None else None
+        if (ra.success and rb.success is False) or (f1_delta is not None and f1_delta < -f1_threshold):
+            change = "regressed"
+        elif (rb.success and ra.success is False) or (f1_delta is not None and f1_delta > f1_threshold):
+            change = "improved"
+        else:
+            change = "unchanged"
+        elapsed_delta = rb.elapsed_s - ra.elapsed_s if ra.elapsed_s is not None and rb.elapsed_s is not None else None
+        deltas.append(TaskDelta(
+            task_id, change, ra.success, rb.success, ra.f1, rb.f1, f1_delta, elapsed_delta, ra.status_code, rb.status_code,
+        ))
+    deltas.sort(key=lambda d: d.impact, reverse=True)
+    return deltas
+
+
+def aggregate(deltas: List[TaskDelta]) -> Dict:
+    counts = {c: 0 for c in ("regressed", "improved", "unchanged", "only_a", "only_b")}
+    for d in deltas:
+        counts[d.change] += 1
+    paired = [d for d in deltas if d.change not in ("only_a", "only_b")]
+    f1_deltas = [d.f1_delta for d in paired if d.f1_delta is not None]
+    latency = [d.elapsed_delta_s for d in paired if d.elapsed_delta_s is not None]
+    return {
+        **counts,
+        "success_lost": sum(1 for d in paired if d.success_a and d.success_b is False),
+        "success_gained": sum(1 for d in paired if d.success_b and d.success_a is False),
+        "mean_f1_delta": round(statistics.fmean(f1_deltas), 6) if f1_deltas else None,
+        "median_elapsed_delta_s": round(statistics.median(latency), 3) if latency else None,
+    }
+
+
+def _fmt(value, spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+@app.command()
+def main(
+    run_a: str = typer.Argument(..., help="Baseline run directory or engine name."),
+    run_b: str = typer.Argument(..., help="Candidate run directory or engine name."),
+    output_dir: str = typer.Option("runs", "--output-dir", help="Where engine names are looked up."),
+    top: int = typer.Option(20, "--top", help="Tasks to print, by impact (0 = none)."),
+    f1_threshold: float = typer.Option(0.05, "--f1-threshold", help="F1 change that counts as a regression/improvement."),
+    json_path: Optional[str] = typer.Option(None, "--json", help="Write the aggregate and every task delta to this file."),
+    workers: int = typer.Option(16, "--workers", help="Threads for reading runs without an index."),
+):
+    try:
+        dir_a, dir_b = resolve_run(run_a, Path(output_dir)), resolve_run(run_b, Path(output_dir))
+    except FileNotFoundError as e:
+        typer.echo(f"[diff] {e}")
+        raise typer.Exit(code=1)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        fut_a, fut_b = pool.submit(load_run, dir_a, workers), pool.submit(load_run, dir_b, workers)
+        rows_a, rows_b = fut_a.result(), fut_b.result()
+
+    deltas = diff_runs(rows_a, rows_b, f1_threshold)
+    summary = aggregate(deltas)
+    typer.echo(f"[diff] a={dir_a} ({len(rows_a)} tasks)  b={dir_b} ({len(rows_b)} tasks)")
+    typer.echo("[diff] " + " ".join(f"{k}={v}" for k, v in summary.items()))
+    shown = [d for d in deltas if d.change != "unchanged"][:top]
+    if shown:
+        typer.echo(f"{'task':<10} {'change':<10} {'success':<13} {'f1 a':>7} {'f1 b':>7} {'df1':>8} {'dt(s)':>8} {'status':<9}")
+    for d in shown:
+        typer.echo(
+            f"{d.task_id:<10} {d.change:<10} {_fmt(d.success_a, ''):>5}->{_fmt(d.success_b, ''):<6} "
+            f"{_fmt(d.f1_a, '.3f'):>7} {_fmt(d.f1_b, '.3f'):>7} {_fmt(d.f1_delta, '+.3f'):>8} "
+            f"{_fmt(d.elapsed_delta_s, '+.2f'):>8} {_fmt(d.status_a, '')}->{_fmt(d.status_b, '')}"
+        )
+    if json_path:
+        write_json(Path(json_path), {"a": str(dir_a), "b": str(dir_b), "summary": summary, "tasks": [asdict(d) for d in deltas]})
+
+
+if __name__ == "__main__":
+    app()
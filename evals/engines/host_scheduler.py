@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Iterator, List, Tuple
+from urllib.parse import urlsplit
+
+from evals.suites.types import Task
+
+
+def host_of(url: str) -> str:
+    try:
+        return (urlsplit(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+def host_targets(tasks: List[Task]) -> List[Tuple[str, int]]:
+    seen: "OrderedDict[Tuple[str, int], None]" = OrderedDict()
+    for t in tasks:
+        try:
+            parts = urlsplit(t.url)
+            port = parts.port or (80 if parts.scheme == "http" else 443)
+        except ValueError:
+            continue
+        if parts.hostname:
+            seen[(parts.hostname.lower(), port)] = None
+    return list(seen)
+
+
+class HostScheduler:
+    """Interleaves tasks across hosts and caps in-flight requests per host."""
+
+    def __init__(self, max_per_host: int) -> None:
+        self.max_per_host = max(1, max_per_host)
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+    def interleave(self, tasks: List[Task]) -> List[Task]:
+        # Round-robin across hosts, keeping the original order within each host
+        by_host: "OrderedDict[str, List[Task]]" = OrderedDict()
+        for t in tasks:
+            by_host.setdefault(host_of(t.url), []).append(t)
+        queues = [list(reversed(q)) for q in by_host.values()]
+        ordered: List[Task] = []
+        while queues:
+            for q in queues:
+                ordered.append(q.pop())
+            queues = [q for q in queues if q]
+        return ordered
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        host = host_of(url)
+        sem = self._slots.get(host)
+        if sem is None:
+            sem = self._slots[host] = asyncio.Semaphore(self.max_per_host)
+        async with sem:
+            yield
+
+
+class DNSCache:
+    """Process-wide getaddrinfo cache shared by every in-process HTTP client.
+
+    Browser and subprocess engines resolve names in their own processes, so only
+    in-process clients (requests, httpx, urllib) benefit from it.
+    """
+
+    def __init__(self, ttl_s: float = 300.0, negative_ttl_s: float = 30.0) -> None:
+        self.ttl_s = ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple, Tuple[float, object]] = {}
+        self._lock = threading.Lock()
+        # The resolver being wrapped; kept after uninstall, since sync scrapers abandoned at
+        # their deadline can still be resolving on their threads
+        self._original = socket.getaddrinfo
+        self._installed = False
+
+    def _getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                value = entry[1]
+                if isinstance(value, socket.gaierror):
+                    raise value
+                return list(value)  # type: ignore[call-overload]
+            self.misses += 1
+        try:
+            value = self._original(host, port, family, type, proto, flags)
+        except socket.gaierror as e:
+            with self._lock:
+                self._entries[key] = (now + self.negative_ttl_s, e)
+            raise
+        with self._lock:
+            self._entries[key] = (now + self.ttl_s, tuple(value))
+        return value
+
+    @contextlib.contextmanager
+    def installed(self) -> Iterator["DNSCache"]:
+        if self._installed:
+            yield self
+            return
+        self._original = socket.getaddrinfo
+        socket.getaddrinfo = self._getaddrinfo  # type: ignore[assignment]
+        self._installed = True
+        try:
+            yield self
+        finally:
+            socket.getaddrinfo = self._original  # type: ignore[assignment]
+            self._installed = False
+
+    async def prefetch(self, targets: List[Tuple[str, int]], concurrency: int = 32) -> None:
+        # Resolve every host once up front; loop.getaddrinfo goes through the patched socket.getaddrinfo
+        loop = asyncio.get_running_loop()
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _one(host: str, port: int) -> None:
+            async with sem:
+                with contextlib.suppress(Exception):
+                    await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+
+        await asyncio.gather(*[_one(h, p) for h, p in targets])
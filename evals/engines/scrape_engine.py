@@ -1,17 +1,92 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import inspect
 import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from types import ModuleType
-from typing import List, Optional, Tuple, Type, cast, Callable
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, cast
 
 from evals.suites.types import ScrapeOutput, Task
+from evals.engines.host_scheduler import DNSCache, HostScheduler, host_targets
 from engines.base import Scraper as EngineScraper
 
 
+class _SyncPool:
+    """Thread pool for sync scrapers with per-call deadlines.
+
+    The deadline starts when a thread picks the call up, not while it waits in the queue.
+    Threads can't be cancelled, so a call abandoned at its deadline keeps its thread until it
+    returns; once abandoned calls hold more than half of a pool's threads, later calls go to
+    a fresh pool instead of queueing behind them.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._lock = threading.Lock()
+        self._stuck: Dict[ThreadPoolExecutor, int] = {}
+        self._pools: List[ThreadPoolExecutor] = []
+        self._executor = self._new_pool()
+
+    def _new_pool(self) -> ThreadPoolExecutor:
+        pool = ThreadPoolExecutor(max_workers=self.size)
+        self._pools.append(pool)
+        self._stuck[pool] = 0
+        return pool
+
+    async def run(self, fn: Callable[[], Any], timeout: Optional[float]) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._stuck[self._executor] * 2 > self.size:
+                self._executor.shutdown(wait=False)
+                self._executor = self._new_pool()
+            pool = self._executor
+        started = asyncio.Event()
+        state = {"abandoned": False, "finished": False}
+
+        def call() -> Any:
+            loop.call_soon_threadsafe(started.set)
+            try:
+                return fn()
+            finally:
+                with self._lock:
+                    state["finished"] = True
+                    if state["abandoned"]:
+                        self._stuck[pool] -= 1
+
+        fut = loop.run_in_executor(pool, call)
+        waiter = asyncio.ensure_future(started.wait())
+        try:
+            await asyncio.wait({fut, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if not state["finished"]:
+                    state["abandoned"] = True
+                    self._stuck[pool] += 1
+            raise
+
+    def shutdown(self) -> None:
+        for pool in self._pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
 class ScrapeEngine:
-    def __init__(self, engine_name: str, max_workers: int) -> None:
+    def __init__(
+        self,
+        engine_name: str,
+        max_workers: int,
+        max_per_host: int = 0,
+        dns_cache: bool = True,
+        task_timeout: Optional[float] = None,
+    ) -> None:
         scraper_cls: Optional[Type] = None
         try:
             mod: ModuleType = importlib.import_module(f"engines.{engine_name}")
@@ -37,10 +112,13 @@ class ScrapeEngine:
         self.scraper_cls: Type = cast(Type, scraper_cls)
         self.engine_name = engine_name
         self.max_workers = max_workers
+        # Politeness only matters for engines that hit the target sites themselves
+        self.self_hosted = bool(getattr(self.scraper_cls, "self_hosted", False))
+        self.max_per_host = max_per_host
+        self.dns_cache: Optional[DNSCache] = DNSCache() if (dns_cache and self.self_hosted) else None
+        self.task_timeout = task_timeout if task_timeout and task_timeout > 0 else None
 
-    async def _scrape_async(self, scraper, task: Task, run_id: str) -> ScrapeOutput:
-        res = await scraper.scrape(task.url, run_id)
-        content = res.get("content")
+    def _to_output(self, res, task: Task) -> ScrapeOutput:
         return ScrapeOutput(
             scraper=str(res.get("scraper") or self.engine_name),
             url=str(res.get("url") or task.url),
@@ -49,64 +127,142 @@ class ScrapeEngine:
             created_at=res.get("created_at"),
             format=res.get("format"),
             content_size=res.get("content_size"),
-            content=content,
+            content=res.get("content"),
+            timed_out=bool(res.get("timed_out")),
+            truncated=bool(res.get("truncated")),
+            engine_stats=res.get("engine_stats") or None,
         )
 
-    def _scrape_sync(self, scraper, task: Task, run_id: str) -> ScrapeOutput:
-        res = scraper.scrape(task.url, run_id)
-        content = res.get("content")
+    def _timeout_output(self, task: Task) -> ScrapeOutput:
         return ScrapeOutput(
-            scraper=str(res.get("scraper") or self.engine_name),
-            url=str(res.get("url") or task.url),
-            status_code=res.get("status_code"),
-            error=res.get("error"),
-            created_at=res.get("created_at"),
-            format=res.get("format"),
-            content_size=res.get("content_size"),
-            content=content,
+            scraper=self.engine_name,
+            url=task.url,
+            status_code=408,
+            error=f"Timeout: task exceeded {self.task_timeout:g}s deadline",
+            created_at=datetime.now().isoformat(),
+            format=None,
+            content_size=0,
+            content=None,
+            timed_out=True,
         )
 
+    async def _scrape_async(self, scraper, task: Task, run_id: str) -> ScrapeOutput:
+        res = await scraper.scrape(task.url, run_id)
+        return self._to_output(res, task)
+
+    def _scrape_sync(self, scraper, task: Task, run_id: str) -> ScrapeOutput:
+        res = scraper.scrape(task.url, run_id)
+        return self._to_output(res, task)
+
+    def _make_scraper(self):
+        scraper = self.scraper_cls()
+        # Align the engine's own request/process timeouts with the hard deadline
+        if self.task_timeout is not None and hasattr(scraper, "timeout"):
+            scraper.timeout = self.task_timeout
+        return scraper
+
+    async def _scrape_batch(
+        self,
+        scraper,
+        tasks: List[Task],
+        run_id: str,
+        on_result: Optional[Callable[[Task, ScrapeOutput], None]],
+        on_start: Optional[Callable[[Task], None]],
+    ) -> List[Tuple[Task, ScrapeOutput]]:
+        """Engine-side batching: the engine owns concurrency and deadlines, so --max-workers and
+        --task-timeout don't apply. elapsed_s is the time from submission to delivery."""
+        started = time.perf_counter()
+        if on_start is not None:
+            for t in tasks:
+                with contextlib.suppress(Exception):
+                    on_start(t)
+        results: List[Tuple[Task, ScrapeOutput]] = []
+        done = set()
+
+        def deliver(t: Task, out: ScrapeOutput) -> None:
+            out.elapsed_s = round(time.perf_counter() - started, 3)
+            results.append((t, out))
+            if on_result is not None:
+                with contextlib.suppress(Exception):
+                    on_result(t, out)
+
+        async for index, res in scraper.scrape_many([t.url for t in tasks], run_id):
+            if index in done:
+                continue
+            done.add(index)
+            deliver(tasks[index], self._to_output(res, tasks[index]))
+        for index, t in enumerate(tasks):
+            if index not in done:
+                deliver(t, self._to_output({"status_code": 500, "error": "Not returned by the engine's batch", "content_size": 0}, t))
+        return results
+
     async def scrape_tasks(
         self,
         tasks: List[Task],
         run_id: str,
         resume_lookup: Optional[dict[str, bool]] = None,
         on_result: Optional[Callable[[Task, ScrapeOutput], None]] = None,
+        on_start: Optional[Callable[[Task], None]] = None,
     ) -> List[Tuple[Task, ScrapeOutput]]:
-        scraper = self.scraper_cls()
+        scraper = self._make_scraper()
+        if getattr(scraper, "batch_mode", False) and hasattr(scraper, "scrape_many"):
+            return await self._scrape_batch(scraper, tasks, run_id, on_result, on_start)
         is_async = inspect.iscoroutinefunction(getattr(scraper, "scrape", None))
 
+        scheduler: Optional[HostScheduler] = None
+        if self.self_hosted and self.max_per_host > 0:
+            scheduler = HostScheduler(self.max_per_host)
+            tasks = scheduler.interleave(tasks)
+
         results: List[Tuple[Task, ScrapeOutput]] = []
+        sem = asyncio.Semaphore(self.max_workers)
+        # Sync scrapers run on a bounded thread pool so --max-workers applies to them too.
+        # Threads can't be cancelled, so the pool has headroom for calls abandoned at the deadline.
+        sync_pool = None if is_async else _SyncPool(self.max_workers * 2)
 
-        if is_async:
-            sem = asyncio.Semaphore(self.max_workers)
+        async def run_one(t: Task) -> ScrapeOutput:
+            started = time.perf_counter()
+            try:
+                if sync_pool is None:
+                    # wait_for cancels async scrapers, which closes their browsers/subprocesses
+                    out = await asyncio.wait_for(self._scrape_async(scraper, t, run_id), self.task_timeout)
+                else:
+                    out = await sync_pool.run(lambda: self._scrape_sync(scraper, t, run_id), self.task_timeout)
+            except asyncio.TimeoutError:
+                out = self._timeout_output(t)
+            out.elapsed_s = round(time.perf_counter() - started, 3)
+            return out
 
-            async def worker(t: Task) -> Tuple[Task, ScrapeOutput]:
+        async def worker(t: Task) -> Tuple[Task, ScrapeOutput]:
+            # Take the per-host slot before the global one so blocked hosts don't hold workers
+            async with (scheduler.slot(t.url) if scheduler is not None else contextlib.nullcontext()):
                 async with sem:
-                    out = await self._scrape_async(scraper, t, run_id)
+                    if on_start is not None:
+                        with contextlib.suppress(Exception):
+                            on_start(t)
+                    out = await run_one(t)
                     return (t, out)
-            results: List[Tuple[Task, ScrapeOutput]] = []
-            coros = [worker(t) for t in tasks]
-            for coro in asyncio.as_completed(coros):
-                t_out = await coro
-                results.append(t_out)
-                if on_result is not None:
-                    try:
-                        on_result(*t_out)
-                    except Exception:
-                        pass
-        else:
-            # For sync scrapers, sequential or future: could add ThreadPool here if needed
-            for t in tasks:
-                out = self._scrape_sync(scraper, t, run_id)
-                pair = (t, out)
-                results.append(pair)
-                if on_result is not None:
-                    try:
-                        on_result(*pair)
-                    except Exception:
-                        pass
-
-        return results
 
+        pending: List[asyncio.Task] = []
+        with (self.dns_cache.installed() if self.dns_cache is not None else contextlib.nullcontext()):
+            try:
+                if self.dns_cache is not None:
+                    await self.dns_cache.prefetch(host_targets(tasks))
+                # Created in list order, so tasks reach the host and worker semaphores (both FIFO)
+                # in the interleaved/--task-order order; as_completed would start them in set order
+                pending = [asyncio.create_task(worker(t)) for t in tasks]
+                for fut in asyncio.as_completed(pending):
+                    t_out = await fut
+                    results.append(t_out)
+                    if on_result is not None:
+                        try:
+                            on_result(*t_out)
+                        except Exception:
+                            pass
+            finally:
+                for fut in pending:
+                    fut.cancel()
+                if sync_pool is not None:
+                    sync_pool.shutdown()
 
+        return results
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import collections
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional, TextIO
+
+LEVELS = {"debug": 10, "info": 20, "notice": 25, "warning": 30, "error": 40, "off": 100}
+
+
+def level_value(name: str) -> int:
+    try:
+        return LEVELS[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown log level '{name}'; expected one of {', '.join(LEVELS)}") from None
+
+
+class EventLog:
+    """Structured run events: JSON lines to a file, optionally echoed as key=value lines.
+
+    emit() only builds a dict and appends it to a deque; encoding and writing happen on a
+    background thread that flushes every flush_interval_s, so per-task logging stays cheap.
+    Levels: per-task progress is debug/info, run milestones are notice.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path],
+        level: str = "info",
+        console_level: str = "notice",
+        context: Optional[Dict[str, Any]] = None,
+        console: TextIO = sys.stdout,
+        flush_interval_s: float = 0.5,
+    ) -> None:
+        self.path = path
+        self.level = level_value(level) if path is not None else LEVELS["off"]
+        self.console_level = level_value(console_level)
+        self.context = dict(context or {})
+        self.console = console
+        self.flush_interval_s = flush_interval_s
+        self._pending: Deque[Dict[str, Any]] = collections.deque()
+        self._wake = threading.Event()
+        self._closed = False
+        self._fh: Optional[TextIO] = None
+        self._thread: Optional[threading.Thread] = None
+        if path is not None and self.level < LEVELS["off"]:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = path.open("a", encoding="utf-8", buffering=1 << 16)
+            self._thread = threading.Thread(target=self._writer, name="event-log", daemon=True)
+            self._thread.start()
+
+    def enabled(self, level: str) -> bool:
+        return LEVELS[level] >= min(self.level, self.console_level)
+
+    def emit(self, event: str, level: str = "info", **fields: Any) -> None:
+        lv = LEVELS[level]
+        if lv < self.level and lv < self.console_level:
+            return
+        ts = time.time()
+        if lv >= self.level and self._fh is not None:
+            self._pending.append({"ts": ts, "level": level, "event": event, **self.context, **fields})
+        if lv >= self.console_level:
+            parts = " ".join(f"{k}={v}" for k, v in {**self.context, **fields}.items())
+            self.console.write(f"{datetime.fromtimestamp(ts).isoformat()} phase={event} {parts}\n")
+
+    def _drain(self) -> None:
+        assert self._fh is not None
+        lines = []
+        while self._pending:
+            lines.append(json.dumps(self._pending.popleft(), ensure_ascii=False, default=str))
+        if lines:
+            self._fh.write("\n".join(lines) + "\n")
+            self._fh.flush()
+
+    def _writer(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            self._drain()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._fh is not None:
+            self._drain()
+            self._fh.close()
+            self._fh = None
+        self.console.flush()
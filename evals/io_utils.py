@@ -1,31 +1,54 @@
 from __future__ import annotations
 
 import csv
+import gzip
+import hashlib
+import itertools
 import json
+import mmap
+import os
 import shutil
-from dataclasses import asdict
+import zlib
+from dataclasses import asdict, replace
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 from .suites.types import Task, ScrapeOutput, AnalyzerResult
 
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
 
-def load_tasks_from_csv(csv_path: Path, limit: Optional[int] = None) -> List[Task]:
-    tasks: List[Task] = []
-    with csv_path.open("r", encoding="utf-8") as f:
+# Codecs for scraped bodies stored next to scrape_output.json; "inline" keeps them in the JSON
+CONTENT_CODECS = ("auto", "zstd", "gzip", "inline")
+_BLOB_NAMES = {"zstd": "content.zst", "gzip": "content.gz"}
+
+
+class UnreadableContentError(ValueError):
+    """A stored body blob is truncated, corrupt or does not match its recorded content hash."""
+
+
+# What reading a stored task/scrape output raises when it is missing (OSError), or is bad
+# JSON or an UnreadableContentError blob (ValueError); graders treat these tasks as unscraped
+UNREADABLE_OUTPUT_ERRORS = (OSError, ValueError)
+
+
+def iter_tasks_from_csv(csv_path: Path) -> Iterator[Task]:
+    """Yield tasks one row at a time; the file is never held in memory as a whole."""
+    with csv_path.open("r", encoding="utf-8", newline="") as f:
         reader = csv.DictReader(f)
         for i, row in enumerate(reader):
-            if limit is not None and i >= limit:
-                break
-            tasks.append(
-                Task(
-                    id=str(row.get("id") or i),
-                    url=row["url"].strip(),
-                    truth_text=(row.get("truth_text") or "").strip(),
-                    lie_text=(row.get("lie_text") or "").strip(),
-                )
+            yield Task(
+                id=str(row.get("id") or i),
+                url=row["url"].strip(),
+                truth_text=(row.get("truth_text") or "").strip(),
+                lie_text=(row.get("lie_text") or "").strip(),
             )
-    return tasks
+
+
+def load_tasks_from_csv(csv_path: Path, limit: Optional[int] = None) -> List[Task]:
+    return list(itertools.islice(iter_tasks_from_csv(csv_path), limit))
 
 
 def ensure_output_dir(output_dir: Path, rerun: bool, resume: bool) -> None:
@@ -60,14 +83,109 @@ def write_task(path: Path, task: Task) -> None:
     write_json(path, asdict(task))
 
 
-def write_scrape_output(path: Path, output: ScrapeOutput) -> None:
-    write_json(path, asdict(output))
+def resolve_codec(codec: str) -> str:
+    if codec not in CONTENT_CODECS:
+        raise ValueError(f"Unknown content codec '{codec}'; expected one of {', '.join(CONTENT_CODECS)}")
+    if codec == "auto":
+        return "zstd" if zstandard is not None else "gzip"
+    if codec == "zstd" and zstandard is None:
+        raise RuntimeError("Content codec 'zstd' requires the zstandard package (pip install zstandard)")
+    return codec
+
+
+def _write_blob(path: Path, data: bytes, codec: str) -> None:
+    if codec == "zstd":
+        packed = zstandard.ZstdCompressor(level=3).compress(data)
+    else:
+        packed = gzip.compress(data, compresslevel=6, mtime=0)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(packed)
+    os.replace(tmp, path)
+
+
+def _read_blob(path: Path) -> bytes:
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise UnreadableContentError(f"{path} is empty")
+        # Decompress straight from the page cache instead of copying the compressed file first
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if path.suffix == ".zst":
+                if zstandard is None:
+                    raise RuntimeError(f"{path} is zstd-compressed; install the zstandard package to read it")
+                try:
+                    # One-shot decompress checks the frame against the size compress() recorded,
+                    # so a truncated file fails instead of yielding a short body
+                    return zstandard.ZstdDecompressor().decompress(mm)
+                except zstandard.ZstdError as e:
+                    raise UnreadableContentError(f"{path}: {e}") from None
+            try:
+                return gzip.decompress(mm)
+            except (OSError, EOFError, zlib.error) as e:
+                raise UnreadableContentError(f"{path}: {e}") from None
+
+
+def write_scrape_output(path: Path, output: ScrapeOutput, codec: str = "auto") -> None:
+    codec = resolve_codec(codec)
+    if codec == "inline" or not output.content:
+        write_json(path, asdict(replace(output, content_ref=None, content_hash=content_hash(output.content))))
+        return
+    blob_name = _BLOB_NAMES[codec]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Blob first, so the metadata record never points at a missing or partial file
+    _write_blob(path.parent / blob_name, output.content.encode("utf-8"), codec)
+    write_json(path, asdict(replace(output, content=None, content_ref=blob_name, content_hash=content_hash(output.content))))
+
+
+def read_scrape_output(path: Path, engine: str, url: str, load_content: bool = True) -> ScrapeOutput:
+    """Read a scrape record; with load_content=False a blob-backed body is not read (content stays None)."""
+    d = read_json(path)
+    content = d.get("content")
+    content_ref = d.get("content_ref")
+    if content_ref and load_content:
+        content = load_scrape_content(path, content_ref, d.get("content_hash"))
+    return ScrapeOutput(
+        scraper=str(d.get("scraper") or engine),
+        url=str(d.get("url") or url),
+        status_code=d.get("status_code"),
+        error=d.get("error"),
+        created_at=d.get("created_at"),
+        format=d.get("format"),
+        content_size=d.get("content_size"),
+        content=content,
+        elapsed_s=d.get("elapsed_s"),
+        timed_out=bool(d.get("timed_out")),
+        truncated=bool(d.get("truncated")),
+        engine_stats=d.get("engine_stats"),
+        content_ref=content_ref,
+        content_hash=d.get("content_hash") or (content_hash(content) if content_ref is None else None),
+    )
+
+
+def load_scrape_content(path: Path, content_ref: str, expected_hash: Optional[str] = None) -> str:
+    """Read a body blob; raises UnreadableContentError when it can't be decoded or, given
+    expected_hash, when it is not the body that was written."""
+    blob = path.parent / content_ref
+    try:
+        content = _read_blob(blob).decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise UnreadableContentError(f"{blob}: {e}") from None
+    if expected_hash and content_hash(content) != expected_hash:
+        raise UnreadableContentError(f"{blob} does not match its recorded content hash")
+    return content
 
 
 def write_analyzer_output(path: Path, result: AnalyzerResult) -> None:
     write_json(path, asdict(result))
 
 
+def content_hash(text: Optional[str]) -> str:
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).hexdigest()
+
+
+def truth_hash(task: Task) -> str:
+    return content_hash(f"{task.truth_text}\x00{task.lie_text}")
+
+
 def summary_results_path(base: Path, engine: str, suite: str) -> Path:
     return base / "results" / f"{engine}_{suite}.json"
 
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import bisect
+import collections
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+from .profiling import peak_rss_mb
+from .suites.types import ScrapeOutput
+
+LATENCY_BUCKETS_S = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+THROUGHPUT_WINDOW_S = 60.0
+
+
+def current_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = peak_rss_mb()
+        return int(peak * 1024 * 1024) if peak is not None else None
+
+
+class LiveMetrics:
+    """Progress counters for one engine run, safe to read from another thread."""
+
+    def __init__(self, engine: str, suite: str) -> None:
+        self.engine = engine
+        self.suite = suite
+        self.phase = "startup"
+        self.total = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.in_flight = 0
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS_S) + 1)
+        self.latency_sum_s = 0.0
+        self.started_at = time.time()
+        self.last_progress_at = self.started_at
+        self._recent: Deque[float] = collections.deque()
+        self._lock = threading.Lock()
+
+    # Updates (event loop thread) --------------------------------------
+
+    def set_phase(self, phase: str) -> None:
+        with self._lock:
+            self.phase = phase
+            self.last_progress_at = time.time()
+
+    def add_planned(self, n: int) -> None:
+        with self._lock:
+            self.total += n
+
+    def task_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def task_finished(self, out: ScrapeOutput) -> None:
+        now = time.time()
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self.completed += 1
+            if out.error or out.status_code is None or int(out.status_code) >= 400:
+                self.failed += 1
+            self.timed_out += int(out.timed_out)
+            if out.elapsed_s is not None:
+                self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS_S, out.elapsed_s)] += 1
+                self.latency_sum_s += out.elapsed_s
+            self._recent.append(now)
+            self.last_progress_at = now
+
+    # Reads (any thread) -----------------------------------------------
+
+    def snapshot(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            while self._recent and now - self._recent[0] > THROUGHPUT_WINDOW_S:
+                self._recent.popleft()
+            window = min(THROUGHPUT_WINDOW_S, max(now - self.started_at, 1e-9))
+            throughput = len(self._recent) / window
+            remaining = max(self.total - self.completed, 0)
+            cumulative: List[int] = []
+            running = 0
+            for n in self.bucket_counts:
+                running += n
+                cumulative.append(running)
+            return {
+                "engine": self.engine,
+                "suite": self.suite,
+                "phase": self.phase,
+                "pid": os.getpid(),
+                "tasks_total": self.total,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timed_out": self.timed_out,
+                "in_flight": self.in_flight,
+                "throughput_per_s": round(throughput, 4),
+                "eta_s": round(remaining / throughput, 1) if throughput > 0 else None,
+                "elapsed_s": round(now - self.started_at, 1),
+                "seconds_since_progress": round(now - self.last_progress_at, 1),
+                "latency_buckets_s": {**{f"{b:g}": c for b, c in zip(LATENCY_BUCKETS_S, cumulative)}, "+Inf": cumulative[-1]},
+                "latency_sum_s": round(self.latency_sum_s, 3),
+                "rss_bytes": current_rss_bytes(),
+                "updated_at": now,
+            }
+
+    def prometheus(self) -> str:
+        s = self.snapshot()
+        labels = f'engine="{self.engine}",suite="{self.suite}"'
+        lines = [
+            "# HELP scrape_evals_tasks Tasks planned for this run.",
+            "# TYPE scrape_evals_tasks gauge",
+            f"scrape_evals_tasks{{{labels}}} {s['tasks_total']}",
+            "# TYPE scrape_evals_tasks_completed_total counter",
+            f"scrape_evals_tasks_completed_total{{{labels}}} {s['completed']}",
+            "# TYPE scrape_evals_tasks_failed_total counter",
+            f"scrape_evals_tasks_failed_total{{{labels}}} {s['failed']}",
+            "# TYPE scrape_evals_tasks_timed_out_total counter",
+            f"scrape_evals_tasks_timed_out_total{{{labels}}} {s['timed_out']}",
+            "# TYPE scrape_evals_tasks_in_flight gauge",
+            f"scrape_evals_tasks_in_flight{{{labels}}} {s['in_flight']}",
+            "# HELP scrape_evals_throughput_per_second Completions per second over the last minute.",
+            "# TYPE scrape_evals_throughput_per_second gauge",
+            f"scrape_evals_throughput_per_second{{{labels}}} {s['throughput_per_s']}",
+            "# TYPE scrape_evals_eta_seconds gauge",
+            f"scrape_evals_eta_seconds{{{labels}}} {s['eta_s'] if s['eta_s'] is not None else 'NaN'}",
+            "# HELP scrape_evals_seconds_since_progress Seconds since the last completed task or phase change.",
+            "# TYPE scrape_evals_seconds_since_progress gauge",
+            f"scrape_evals_seconds_since_progress{{{labels}}} {s['seconds_since_progress']}",
+            "# TYPE scrape_evals_phase gauge",
+            f'scrape_evals_phase{{{labels},phase="{s["phase"]}"}} 1',
+            "# TYPE scrape_evals_scrape_duration_seconds histogram",
+        ]
+        for le, count in s["latency_buckets_s"].items():
+            lines.append(f'scrape_evals_scrape_duration_seconds_bucket{{{labels},le="{le}"}} {count}')
+        lines.append(f"scrape_evals_scrape_duration_seconds_sum{{{labels}}} {s['latency_sum_s']}")
+        lines.append(f"scrape_evals_scrape_duration_seconds_count{{{labels}}} {s['latency_buckets_s']['+Inf']}")
+        if s["rss_bytes"] is not None:
+            lines += [
+                "# TYPE process_resident_memory_bytes gauge",
+                f"process_resident_memory_bytes{{{labels}}} {s['rss_bytes']}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsPublisher:
+    """Serves /metrics (Prometheus text) and /status (JSON) on localhost and/or rewrites a
+    JSON status file every interval_s, from background threads so a busy event loop
+    doesn't silence it."""
+
+    def __init__(self, metrics: LiveMetrics, port: int = 0, status_path: Optional[Path] = None, interval_s: float = 10.0) -> None:
+        self.metrics = metrics
+        self.port = port
+        self.status_path = status_path
+        self.interval_s = interval_s
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        if self.port:
+            metrics = self.metrics
+
+            class _Handler(BaseHTTPRequestHandler):
+                def do_GET(self) -> None:  # noqa: N802
+                    if self.path.startswith("/metrics"):
+                        body, ctype = metrics.prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+                    elif self.path.startswith("/status"):
+                        body, ctype = json.dumps(metrics.snapshot()).encode("utf-8"), "application/json"
+                    else:
+                        self.send_error(404)
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", ctype)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format: str, *args) -> None:  # keep run logs clean
+                    pass
+
+            self._server = ThreadingHTTPServer(("127.0.0.1", self.port), _Handler)
+            self._server.daemon_threads = True
+            self._threads.append(threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True))
+        if self.status_path is not None and self.interval_s > 0:
+            self._threads.append(threading.Thread(target=self._status_loop, name="metrics-status", daemon=True))
+        for t in self._threads:
+            t.start()
+
+    def _write_status(self) -> None:
+        assert self.status_path is not None
+        self.status_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.status_path.with_name(self.status_path.name + ".tmp")
+        tmp.write_text(json.dumps(self.metrics.snapshot(), indent=2), encoding="utf-8")
+        os.replace(tmp, self.status_path)
+
+    def _status_loop(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self._write_status()
+            except OSError:
+                pass
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self.status_path is not None and self.interval_s > 0:
+            # Final state, so a finished run doesn't look stalled
+            try:
+                self._write_status()
+            except OSError:
+                pass
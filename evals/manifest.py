@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, IO, Iterable, List, Optional
+
+from .io_utils import content_hash, read_scrape_output
+from .suites.types import AnalyzerResult, ScrapeOutput
+
+MANIFEST_FILENAME = "index.jsonl"
+
+
+def output_hash(output: ScrapeOutput, chash: Optional[str] = None) -> str:
+    # Everything the grader looks at besides the task itself
+    meta = [output.status_code, output.error, output.format, output.content_size, chash or content_hash(output.content)]
+    return content_hash(json.dumps(meta, ensure_ascii=False))
+
+
+def scrape_stats(records: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Latency percentiles and averaged engine_stats over manifest scrape records, for summaries."""
+    elapsed: List[float] = []
+    numeric: Dict[str, List[float]] = {}
+    labels: Dict[str, set] = {}
+    for rec in records:
+        if not rec:
+            continue
+        if rec.get("elapsed_s") is not None:
+            elapsed.append(float(rec["elapsed_s"]))
+        for key, value in (rec.get("engine_stats") or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                numeric.setdefault(key, []).append(float(value))
+            elif isinstance(value, str):
+                labels.setdefault(key, set()).add(value)
+    stats: Dict[str, Any] = {}
+    if elapsed:
+        elapsed.sort()
+        stats["latency_s"] = {
+            "mean": round(sum(elapsed) / len(elapsed), 3),
+            "p50": round(elapsed[(len(elapsed) - 1) // 2], 3),
+            "p95": round(elapsed[min(len(elapsed) - 1, int(len(elapsed) * 0.95))], 3),
+        }
+    if numeric or labels:
+        stats["engine_stats"] = {
+            **{key: ",".join(sorted(values)) for key, values in labels.items()},
+            **{f"avg_{key}": round(sum(values) / len(values), 3) for key, values in numeric.items()},
+        }
+    return stats
+
+
+class RunManifest:
+    """Per-engine task index (task_id -> scrape status, content hash, grade) kept in index.jsonl.
+
+    Records are appended as they happen, so a crash loses at most the record being written;
+    load() replays the journal once and compact() rewrites it to one line per task.
+    A run directory without an index (older runs) is rebuilt by scanning it once.
+    """
+
+    def __init__(self, engine_dir: Path) -> None:
+        self.engine_dir = engine_dir
+        self.path = engine_dir / MANIFEST_FILENAME
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._fh: Optional[IO[str]] = None
+
+    @classmethod
+    def load(cls, engine_dir: Path) -> "RunManifest":
+        manifest = cls(engine_dir)
+        if manifest.path.exists():
+            with manifest.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line after a crash
+                    manifest.entries.setdefault(str(rec.pop("task_id")), {}).update(rec)
+            manifest._drop_tombstones()
+        elif engine_dir.exists():
+            manifest._rebuild()
+        return manifest
+
+    def _rebuild(self) -> None:
+        for scrape_path in self.engine_dir.glob("*/scrape_output.json"):
+            task_id = scrape_path.parent.name
+            try:
+                out = read_scrape_output(scrape_path, self.engine_dir.name, "", load_content=False)
+            except (OSError, ValueError):
+                continue
+            # Grades of unknown analyzer versions are not trusted; they are recomputed
+            self.entries[task_id] = {"scrape": self._scrape_record(out)}
+        if self.entries:
+            self.compact()
+
+    # Queries ------------------------------------------------------------
+
+    def scraped(self, task_id: str) -> bool:
+        return bool(self.entries.get(task_id, {}).get("scrape"))
+
+    def scrape_record(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(task_id, {}).get("scrape")
+
+    def grade_is_current(self, task_id: str, grader: str, truth: Optional[str] = None) -> bool:
+        """True when the stored grade was computed by `grader` from the current scrape output
+        (and, when `truth` is given, from the same truth/lie texts)."""
+        entry = self.entries.get(task_id, {})
+        scrape, grade = entry.get("scrape"), entry.get("grade")
+        if not (scrape and grade and grade.get("grader") == grader and grade.get("output_hash") == scrape.get("output_hash")):
+            return False
+        return truth is None or grade["result"].get("truth_hash") == truth
+
+    def grade_result(self, task_id: str) -> AnalyzerResult:
+        return AnalyzerResult(**self.entries[task_id]["grade"]["result"])
+
+    def metadata_output(self, task_id: str, engine: str, url: str) -> ScrapeOutput:
+        """ScrapeOutput rebuilt from the index alone (content is not loaded)."""
+        rec = self.scrape_record(task_id) or {}
+        return ScrapeOutput(
+            scraper=engine,
+            url=url,
+            status_code=rec.get("status_code"),
+            error=rec.get("error"),
+            created_at=rec.get("created_at"),
+            format=rec.get("format"),
+            content_size=rec.get("content_size"),
+            content=None,
+            elapsed_s=rec.get("elapsed_s"),
+            timed_out=bool(rec.get("timed_out")),
+            truncated=bool(rec.get("truncated")),
+            engine_stats=rec.get("engine_stats"),
+        )
+
+    def scrape_stats(self, task_ids: Iterable[str]) -> Dict[str, Any]:
+        return scrape_stats(self.scrape_record(task_id) for task_id in task_ids)
+
+    # Updates ------------------------------------------------------------
+
+    @staticmethod
+    def _scrape_record(output: ScrapeOutput) -> Dict[str, Any]:
+        chash = output.content_hash or content_hash(output.content)
+        return {
+            "status_code": output.status_code,
+            "error": output.error,
+            "format": output.format,
+            "content_size": output.content_size,
+            "created_at": output.created_at,
+            "elapsed_s": output.elapsed_s,
+            "timed_out": output.timed_out,
+            "truncated": output.truncated,
+            "engine_stats": output.engine_stats,
+            "content_hash": chash,
+            "output_hash": output_hash(output, chash),
+        }
+
+    def record_scrape(self, task_id: str, output: ScrapeOutput) -> None:
+        # A new scrape invalidates any previous grade
+        self.entries[task_id] = {"scrape": self._scrape_record(output)}
+        self._append({"task_id": task_id, **self.entries[task_id], "grade": None})
+
+    def record_grade(self, task_id: str, result: AnalyzerResult, grader: str) -> None:
+        scrape = self.scrape_record(task_id) or {}
+        grade = {"grader": grader, "output_hash": scrape.get("output_hash"), "result": asdict(result)}
+        self.entries.setdefault(task_id, {})["grade"] = grade
+        self._append({"task_id": task_id, "grade": grade})
+
+    def forget(self, task_id: str) -> None:
+        if self.entries.pop(task_id, None) is not None:
+            self._append({"task_id": task_id, "scrape": None, "grade": None})
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = self.path.open("a", encoding="utf-8")
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+
+    def _drop_tombstones(self) -> None:
+        # None values are written by forget() and by record_scrape() to clear a stale grade
+        for task_id in list(self.entries):
+            entry = {k: v for k, v in self.entries[task_id].items() if v is not None}
+            if entry:
+                self.entries[task_id] = entry
+            else:
+                del self.entries[task_id]
+
+    def compact(self) -> None:
+        self.close()
+        self._drop_tombstones()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".jsonl.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for task_id, entry in self.entries.items():
+                f.write(json.dumps({"task_id": task_id, **entry}, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
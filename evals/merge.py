@@ -0,0 +1,124 @@
+"""Combine the outputs of sharded runs (run_eval.py --shard i/N) into one summary per engine.
+
+    python -m evals.merge runs-shard0 runs-shard1 runs-shard2 runs-shard3 --output-dir runs
+
+Per-task grades are taken from each shard's run index, so the merged summary is computed
+over all tasks exactly as if they had been graded in one run. Missing or duplicated shards
+and grades from different analyzer versions are reported.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import typer  # type: ignore
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+if str(PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(PACKAGE_ROOT))
+
+from evals.analysis.quality_analyzer import QualityAnalyzer  # type: ignore
+from evals.io_utils import read_json, summary_results_path, write_json  # type: ignore
+from evals.manifest import RunManifest, scrape_stats  # type: ignore
+from evals.regrade import SUITE_KEY, engine_dirs  # type: ignore
+from evals.suites.types import AnalyzerResult  # type: ignore
+from evals.task_source import parse_shard  # type: ignore
+
+app = typer.Typer()
+
+
+def _shard_label(shard_dir: Path, engine_name: str) -> Optional[str]:
+    path = summary_results_path(shard_dir, engine_name, SUITE_KEY)
+    return read_json(path).get("shard") if path.exists() else None
+
+
+def _coverage_problems(labels: List[Optional[str]]) -> List[str]:
+    parsed: List[Tuple[int, int]] = []
+    for label in labels:
+        if label is None:
+            return ["a shard summary has no shard label (not a --shard run?)"]
+        parsed.append(parse_shard(label))
+    counts = {n for _, n in parsed}
+    if len(counts) > 1:
+        return [f"shards come from different splits: {sorted(counts)}"]
+    n = counts.pop()
+    seen = [i for i, _ in parsed]
+    problems = [f"missing shard {i}/{n}" for i in range(n) if i not in seen]
+    problems += [f"shard {i}/{n} given more than once" for i in sorted(set(seen)) if seen.count(i) > 1]
+    return problems
+
+
+@app.command()
+def main(
+    shard_dirs: List[str] = typer.Argument(..., help="Output directories of the shard runs."),
+    output_dir: str = typer.Option("runs", "--output-dir", help="Where to write results/<engine>_quality.json."),
+    engines: Optional[str] = typer.Option(None, "--engines", help="Comma-separated engine names (default: every engine found)."),
+    strict: bool = typer.Option(False, "--strict", help="Exit with code 1 on missing/duplicate shards or mixed analyzer versions."),
+):
+    engine_list = [e.strip() for e in engines.split(",") if e.strip()] if engines else None
+    by_engine: Dict[str, List[Path]] = {}
+    for shard_dir in map(Path, shard_dirs):
+        for engine_dir in engine_dirs(shard_dir, engine_list):
+            by_engine.setdefault(engine_dir.name[: -len(f"_{SUITE_KEY}")], []).append(engine_dir)
+    if not by_engine:
+        typer.echo(f"[merge] no *_{SUITE_KEY} run directories under {', '.join(shard_dirs)}")
+        raise typer.Exit(code=1)
+
+    analyzer = QualityAnalyzer()
+    failed = False
+    for engine_name, dirs in sorted(by_engine.items()):
+        results: Dict[str, AnalyzerResult] = {}
+        timed_out: Set[str] = set()
+        scrapes: Dict[str, Dict] = {}
+        graders: Set[str] = set()
+        duplicates = ungraded = 0
+        labels: List[Optional[str]] = []
+        for engine_dir in dirs:
+            labels.append(_shard_label(engine_dir.parent, engine_name))
+            manifest = RunManifest.load(engine_dir)
+            for task_id, entry in manifest.entries.items():
+                if not entry.get("scrape"):
+                    continue
+                if not entry.get("grade"):
+                    ungraded += 1
+                    continue
+                duplicates += int(task_id in results)
+                results[task_id] = manifest.grade_result(task_id)
+                graders.add(entry["grade"]["grader"])
+                scrapes[task_id] = entry["scrape"]
+                if entry["scrape"].get("timed_out"):
+                    timed_out.add(task_id)
+                else:
+                    timed_out.discard(task_id)
+            manifest.close()
+
+        problems = _coverage_problems(labels)
+        if duplicates:
+            problems.append(f"{duplicates} task(s) graded in more than one shard (last one kept)")
+        if ungraded:
+            problems.append(f"{ungraded} scraped task(s) have no grade (run the analysis for that shard)")
+        if len(graders) > 1:
+            problems.append(f"grades from {len(graders)} analyzer versions/lie weights; run python -m evals.regrade on each shard first")
+
+        summary = analyzer.summarize(list(results.values()))
+        summary["timeouts"] = len(timed_out)
+        summary.update(scrape_stats(scrapes.values()))
+        summary["shards"] = [label for label in labels if label]
+        summary["tasks"] = len(results)
+        write_json(summary_results_path(Path(output_dir), engine_name, SUITE_KEY), summary)
+        typer.echo(
+            f"[merge] {engine_name}: shards={len(dirs)} tasks={len(results)} "
+            f"success_rate={summary.get('success_rate')} avg_f1={summary.get('avg_f1')}"
+        )
+        for problem in problems:
+            typer.echo(f"[merge]   warning: {problem}")
+        failed = failed or bool(problems)
+
+    if strict and failed:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None  # type: ignore[assignment]
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _vm_hwm_mb() -> Optional[float]:
+    """Peak RSS since start or the last _reset_vm_hwm() (Linux)."""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _reset_vm_hwm() -> bool:
+    # Linux >= 4.0: writing 5 to clear_refs resets the peak RSS to the current RSS
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="utf-8") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+@dataclass
+class PhaseStats:
+    name: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    # Peak RSS within the phase; None where the peak can't be reset (non-Linux)
+    peak_rss_mb: Optional[float] = None
+    # Peak RSS of the process (and of its largest child) from start to the end of the phase
+    lifetime_peak_rss_mb: Optional[float] = None
+    children_lifetime_peak_rss_mb: Optional[float] = None
+
+
+@dataclass
+class LoopLagStats:
+    samples: int = 0
+    mean_ms: float = 0.0
+    p50_ms: float = 0.0
+    p99_ms: float = 0.0
+    max_ms: float = 0.0
+    stalls_over_100ms: int = 0
+
+
+@dataclass
+class _Sampler:
+    interval_s: float
+    frames: Dict[Tuple[str, str, int], int] = field(default_factory=dict)
+    # thread name -> stack (frame indices root->leaf) -> sampled seconds; aggregated, so memory
+    # grows with the number of distinct stacks rather than with run length
+    stacks: Dict[str, Dict[Tuple[int, ...], float]] = field(default_factory=dict)
+    samples: int = 0
+
+
+class RunProfiler:
+    """Per-phase wall/CPU/RSS, cProfile and a stack sampler for chosen phases, and event-loop lag.
+
+    Artifacts written by write():
+      <stem>.profile.json          phase timings, loop lag, named timers
+      <stem>.speedscope.json       sampled stacks of every thread during the sampled phases
+                                   (open at https://www.speedscope.app)
+      <stem>.<phase>.pstats        cProfile data for each cProfile'd phase
+
+    Phases don't nest: per-phase peak RSS is measured by resetting the process's peak at
+    the start of each phase.
+    """
+
+    def __init__(
+        self,
+        cprofile_phases: Tuple[str, ...] = ("analysis",),
+        sample_phases: Tuple[str, ...] = ("analysis",),
+        sample_interval_s: float = 0.005,
+    ) -> None:
+        self.cprofile_phases = set(cprofile_phases)
+        self.sample_phases = set(sample_phases)
+        self.phases: List[PhaseStats] = []
+        self.timers: Dict[str, float] = {}
+        self.loop_lag: Optional[LoopLagStats] = None
+        self._current_phase = "startup"
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._sampler = _Sampler(interval_s=sample_interval_s)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._peak_seen_mb: Optional[float] = None
+
+    # Stack sampler ----------------------------------------------------
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._sample_loop, name="run-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _frame_id(self, code) -> int:
+        key = (code.co_qualname if hasattr(code, "co_qualname") else code.co_name, code.co_filename, code.co_firstlineno)
+        idx = self._sampler.frames.get(key)
+        if idx is None:
+            idx = self._sampler.frames[key] = len(self._sampler.frames)
+        return idx
+
+    def _sample_loop(self) -> None:
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self._sampler.interval_s):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            phase = self._current_phase
+            if phase not in self.sample_phases:
+                continue
+            names = {t.ident: t.name for t in threading.enumerate()}
+            phase_key = ("phase:" + phase, "<phase>", 0)
+            self._sampler.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack: List[int] = []
+                f = frame
+                while f is not None:
+                    stack.append(self._frame_id(f.f_code))
+                    f = f.f_back
+                phase_idx = self._sampler.frames.setdefault(phase_key, len(self._sampler.frames))
+                stack.append(phase_idx)
+                stack.reverse()
+                counts = self._sampler.stacks.setdefault(names.get(ident, str(ident)), {})
+                key = tuple(stack)
+                counts[key] = counts.get(key, 0.0) + weight
+
+    # Phases -----------------------------------------------------------
+
+    def _note_peak(self, mb: Optional[float]) -> None:
+        if mb is not None and (self._peak_seen_mb is None or mb > self._peak_seen_mb):
+            self._peak_seen_mb = mb
+
+    def lifetime_peak_rss_mb(self) -> Optional[float]:
+        # ru_maxrss follows the peak resets on Linux, so the peaks seen before each reset count too
+        peaks = [mb for mb in (self._peak_seen_mb, _vm_hwm_mb(), peak_rss_mb()) if mb is not None]
+        return round(max(peaks), 1) if peaks else None
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[PhaseStats]:
+        stats = PhaseStats(name=name)
+        previous, self._current_phase = self._current_phase, name
+        self._note_peak(_vm_hwm_mb())
+        per_phase_peak = _reset_vm_hwm()
+        prof = cProfile.Profile() if name in self.cprofile_phases else None
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        if prof is not None:
+            prof.enable()
+        try:
+            yield stats
+        finally:
+            if prof is not None:
+                prof.disable()
+                self._profiles[name] = prof
+            stats.wall_s = round(time.perf_counter() - wall0, 4)
+            stats.cpu_s = round(time.process_time() - cpu0, 4)
+            hwm = _vm_hwm_mb()
+            self._note_peak(hwm)
+            stats.peak_rss_mb = round(hwm, 1) if per_phase_peak and hwm is not None else None
+            stats.lifetime_peak_rss_mb = self.lifetime_peak_rss_mb()
+            stats.children_lifetime_peak_rss_mb = peak_rss_mb(children=True)
+            self.phases.append(stats)
+            self._current_phase = previous
+
+    @contextlib.contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] = self.timers.get(name, 0.0) + (time.perf_counter() - t0)
+
+    @contextlib.asynccontextmanager
+    async def watch_loop_lag(self, interval_s: float = 0.05):
+        lags: List[float] = []
+
+        async def _monitor() -> None:
+            while True:
+                t0 = time.perf_counter()
+                await asyncio.sleep(interval_s)
+                lags.append(max(0.0, time.perf_counter() - t0 - interval_s))
+
+        task = asyncio.create_task(_monitor())
+        try:
+            yield
+        finally:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+            self.loop_lag = _lag_stats(lags)
+
+    # Output -----------------------------------------------------------
+
+    def speedscope(self, name: str) -> Dict:
+        frames = [None] * len(self._sampler.frames)
+        for (fn, file, line), idx in self._sampler.frames.items():
+            frames[idx] = {"name": fn, "file": file, "line": line}
+        profiles = []
+        for thread_name, counts in sorted(self._sampler.stacks.items(), key=lambda kv: kv[0] != "MainThread"):
+            weights = list(counts.values())
+            profiles.append({
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": [list(stack) for stack in counts],
+                "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+            "name": name,
+            "activeProfileIndex": 0,
+            "exporter": "scrape-evals",
+        }
+
+    def summary(self) -> Dict:
+        return {
+            "pid": os.getpid(),
+            "phases": [asdict(p) for p in self.phases],
+            "timers_s": {k: round(v, 4) for k, v in self.timers.items()},
+            "loop_lag": asdict(self.loop_lag) if self.loop_lag else None,
+            "sampled_phases": sorted(self.sample_phases),
+            "stack_samples": self._sampler.samples,
+            "lifetime_peak_rss_mb": self.lifetime_peak_rss_mb(),
+            "children_lifetime_peak_rss_mb": peak_rss_mb(children=True),
+        }
+
+    def write(self, results_dir: Path, stem: str) -> List[Path]:
+        results_dir.mkdir(parents=True, exist_ok=True)
+        written: List[Path] = []
+        summary_path = results_dir / f"{stem}.profile.json"
+        summary_path.write_text(json.dumps(self.summary(), indent=2), encoding="utf-8")
+        written.append(summary_path)
+        speedscope_path = results_dir / f"{stem}.speedscope.json"
+        speedscope_path.write_text(json.dumps(self.speedscope(stem)), encoding="utf-8")
+        written.append(speedscope_path)
+        for phase_name, prof in self._profiles.items():
+            pstats_path = results_dir / f"{stem}.{phase_name}.pstats"
+            prof.dump_stats(str(pstats_path))
+            written.append(pstats_path)
+        return written
+
+
+def _lag_stats(lags: List[float]) -> LoopLagStats:
+    if not lags:
+        return LoopLagStats()
+    ordered = sorted(lags)
+
+    def pct(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return LoopLagStats(
+        samples=len(lags),
+        mean_ms=round(sum(lags) / len(lags) * 1000, 3),
+        p50_ms=round(pct(0.50), 3),
+        p99_ms=round(pct(0.99), 3),
+        max_ms=round(ordered[-1] * 1000, 3),
+        stalls_over_100ms=sum(1 for lag in lags if lag > 0.1),
+    )
@@ -0,0 +1,174 @@
+"""Recompute stale grades across every engine run under an output directory.
+
+    python -m evals.regrade --output-dir runs
+    python -m evals.regrade --output-dir runs --engines rest_scraper,firecrawl_api --dataset datasets/1-0-0.csv
+
+A grade is stale when the analyzer fingerprint or --lie-weight changed, when the scrape
+output changed since it was graded, or (with --dataset) when the task's truth/lie texts
+changed. Only stale rows are read and re-graded, in parallel across processes; every
+summary in <output-dir>/results/ is then rebuilt from the run indexes without touching
+the per-task files.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import typer  # type: ignore
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+if str(PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(PACKAGE_ROOT))
+
+from evals.analysis.grade_cache import GradeCache, resolve_cache_path  # type: ignore
+from evals.analysis.quality_analyzer import QualityAnalyzer  # type: ignore
+from evals.io_utils import (  # type: ignore
+    UNREADABLE_OUTPUT_ERRORS,
+    load_tasks_from_csv,
+    read_json,
+    read_scrape_output,
+    summary_results_path,
+    truth_hash,
+    write_analyzer_output,
+    write_json,
+)
+from evals.manifest import RunManifest  # type: ignore
+from evals.suites.types import AnalyzerResult, Task  # type: ignore
+
+SUITE_KEY = "quality"
+
+# (engine dir, task id, task fields or None to read task.json)
+WorkItem = Tuple[str, str, Optional[Dict[str, str]]]
+
+app = typer.Typer()
+
+
+def engine_dirs(output_dir: Path, engines: Optional[List[str]] = None) -> List[Path]:
+    dirs = sorted(p for p in output_dir.glob(f"*_{SUITE_KEY}") if p.is_dir())
+    if engines:
+        wanted = {f"{e}_{SUITE_KEY}" for e in engines}
+        dirs = [p for p in dirs if p.name in wanted]
+    return dirs
+
+
+def _grade_chunk(items: List[WorkItem], lie_weight: float, cache_path: Optional[str] = None) -> Tuple[List[Tuple[str, str, Optional[Dict]]], int]:
+    """Grade a batch of tasks in a worker process; None marks a task whose outputs are gone or
+    unreadable. Also returns the number of grading-cache hits."""
+    analyzer = QualityAnalyzer(GradeCache(Path(cache_path)) if cache_path else None)
+    graded: List[Tuple[str, str, Optional[Dict]]] = []
+    for engine_dir_s, task_id, task_fields in items:
+        out_dir = Path(engine_dir_s) / task_id
+        try:
+            task = Task(**(task_fields or read_json(out_dir / "task.json")))
+            scr_out = read_scrape_output(out_dir / "scrape_output.json", Path(engine_dir_s).name, task.url)
+        except UNREADABLE_OUTPUT_ERRORS:
+            # Missing, truncated or corrupt task/scrape files (bad JSON, a damaged content blob)
+            graded.append((engine_dir_s, task_id, None))
+            continue
+        result = analyzer.analyze_one(task, scr_out, lie_weight=lie_weight)
+        write_analyzer_output(out_dir / "grader_output.json", result)
+        graded.append((engine_dir_s, task_id, asdict(result)))
+    if analyzer.cache is None:
+        return graded, 0
+    analyzer.cache.close()
+    return graded, analyzer.cache.hits
+
+
+def summarize_manifest(manifest: RunManifest, analyzer: QualityAnalyzer, task_ids: List[str]) -> Dict:
+    results: List[AnalyzerResult] = []
+    timeouts = 0
+    for task_id in task_ids:
+        if not manifest.entries.get(task_id, {}).get("grade"):
+            continue
+        results.append(manifest.grade_result(task_id))
+        timeouts += int(bool((manifest.scrape_record(task_id) or {}).get("timed_out")))
+    summary = analyzer.summarize(results)
+    summary["timeouts"] = timeouts
+    summary.update(manifest.scrape_stats(task_ids))
+    return summary
+
+
+@app.command()
+def main(
+    output_dir: str = typer.Option("runs", "--output-dir", help="Directory holding <engine>_quality run directories."),
+    engines: Optional[str] = typer.Option(None, "--engines", help="Comma-separated engine names (default: every engine found)."),
+    dataset: Optional[str] = typer.Option(None, "--dataset", help="Dataset CSV; grades are also recomputed where a task's truth/lie texts changed, and summaries cover only its tasks."),
+    lie_weight: float = typer.Option(4.0, "--lie-weight", help="Weight for lie bigram penalty in ordered metrics."),
+    workers: int = typer.Option(os.cpu_count() or 1, "--workers", help="Grading processes."),
+    chunk_size: int = typer.Option(32, "--chunk-size", help="Tasks per worker job."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only report how many grades are stale."),
+    grade_cache: Optional[str] = typer.Option(None, "--grade-cache", help="Grading cache file shared across engines and runs (default <output-dir>/grade_cache.sqlite; off = disabled)."),
+):
+    base = Path(output_dir)
+    engine_list = [e.strip() for e in engines.split(",") if e.strip()] if engines else None
+    dirs = engine_dirs(base, engine_list)
+    if not dirs:
+        typer.echo(f"[regrade] no *_{SUITE_KEY} run directories under {base}")
+        raise typer.Exit(code=1)
+    tasks: Optional[Dict[str, Task]] = {t.id: t for t in load_tasks_from_csv(Path(dataset))} if dataset else None
+
+    analyzer = QualityAnalyzer()
+    grader = analyzer.grader_key(lie_weight)
+    manifests: Dict[str, RunManifest] = {}
+    task_ids: Dict[str, List[str]] = {}
+    work: List[WorkItem] = []
+    for engine_dir in dirs:
+        manifest = manifests[str(engine_dir)] = RunManifest.load(engine_dir)
+        ids = [i for i in manifest.entries if manifest.scraped(i) and (tasks is None or i in tasks)]
+        task_ids[str(engine_dir)] = ids
+        stale = 0
+        for task_id in ids:
+            task = tasks[task_id] if tasks is not None else None
+            if not manifest.grade_is_current(task_id, grader, truth_hash(task) if task else None):
+                work.append((str(engine_dir), task_id, asdict(task) if task else None))
+                stale += 1
+        typer.echo(f"[regrade] {engine_dir.name}: tasks={len(ids)} stale={stale}")
+
+    if dry_run:
+        typer.echo(f"[regrade] {len(work)} stale grade(s) across {len(dirs)} engine(s) (dry run, nothing written)")
+        return
+
+    t0 = time.perf_counter()
+    chunks = [work[i:i + chunk_size] for i in range(0, len(work), max(chunk_size, 1))]
+    missing = cache_hits = 0
+    cache_path = resolve_cache_path(grade_cache, base)
+    if chunks:
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+            futures = [pool.submit(_grade_chunk, chunk, lie_weight, str(cache_path) if cache_path else None) for chunk in chunks]
+            for fut in as_completed(futures):
+                graded, hits = fut.result()
+                cache_hits += hits
+                for engine_dir_s, task_id, result in graded:
+                    manifest = manifests[engine_dir_s]
+                    if result is None:
+                        manifest.forget(task_id)
+                        missing += 1
+                    else:
+                        manifest.record_grade(task_id, AnalyzerResult(**result), grader)
+
+    for engine_dir in dirs:
+        manifest = manifests[str(engine_dir)]
+        manifest.compact()
+        engine_name = engine_dir.name[: -len(f"_{SUITE_KEY}")]
+        summary = summarize_manifest(manifest, analyzer, task_ids[str(engine_dir)])
+        summary_path = summary_results_path(base, engine_name, SUITE_KEY)
+        previous = read_json(summary_path) if summary_path.exists() else {}
+        if "shard" in previous:
+            summary["shard"] = previous["shard"]
+        write_json(summary_path, summary)
+        typer.echo(f"[regrade] {engine_dir.name}: success_rate={summary.get('success_rate')} avg_f1={summary.get('avg_f1')}")
+
+    typer.echo(
+        f"[regrade] regraded={len(work) - missing} cache_hits={cache_hits} missing_outputs={missing} engines={len(dirs)} "
+        f"analyzer={analyzer.version} elapsed_s={time.perf_counter() - t0:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,303 @@
+"""Local stand-in web server that replays dataset pages for offline benchmarks.
+
+    python -m evals.replay.server capture --dataset datasets/1-0-0.csv --from-run runs/rest_scraper_quality
+    python -m evals.replay.server rewrite --dataset datasets/1-0-0.csv --out runs/replay/1-0-0.local.csv
+    python -m evals.replay.server serve --latency-ms 80 --jitter-ms 40 --error-rate 0.02 --bandwidth-kbps 2000
+
+Each task is served at http://<host>:<port>/<task_id>. Absolute http(s) URLs inside a
+snapshot are rewritten to /__ext/... on the replay server (answered with an empty 204),
+so browser engines never leave localhost for the assets referenced by the page markup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import csv
+import html
+import json
+import random
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import typer  # type: ignore
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+if str(PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(PACKAGE_ROOT))
+
+from evals.io_utils import load_tasks_from_csv, read_json, read_scrape_output, write_json  # type: ignore
+
+DEFAULT_SNAPSHOTS = Path("runs") / "replay" / "snapshots"
+_ABS_URL = re.compile(rb"https?://")
+_STATUS_TEXT = {200: "OK", 204: "No Content", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable"}
+
+app = typer.Typer()
+
+
+@dataclass
+class ReplayConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    reset_rate: float = 0.0
+    bandwidth_kbps: float = 0.0  # 0 = unlimited; KiB/s per response
+    seed: Optional[int] = None
+
+
+@dataclass
+class ReplayStats:
+    requests: int = 0
+    pages: int = 0
+    errors: int = 0
+    resets: int = 0
+    bytes_sent: int = 0
+    started_at: float = field(default_factory=time.time)
+
+
+def synthetic_page(url: str, truth_text: str, lie_text: str) -> str:
+    esc = html.escape
+    paragraphs = "".join(f"<p>{esc(p)}</p>" for p in truth_text.splitlines() if p.strip())
+    return (
+        f"<!doctype html><html><head><meta charset=\"utf-8\"><title>{esc(url)}</title></head><body>"
+        f"<nav>{esc(lie_text)}</nav><main><article>{paragraphs}</article></main>"
+        f"<footer>{esc(lie_text)}</footer></body></html>"
+    )
+
+
+def capture_snapshots(dataset: Path, out_dir: Path, from_run: Optional[Path] = None) -> Dict[str, int]:
+    """Write <task_id>.html for every dataset row plus a manifest.json.
+
+    Pages come from an existing html-format run when available, otherwise a synthetic
+    page is built from truth_text/lie_text so every task is always servable.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest: Dict[str, Dict] = {}
+    counts = {"captured": 0, "synthetic": 0}
+    for t in load_tasks_from_csv(dataset):
+        body: Optional[str] = None
+        status = 200
+        if from_run is not None:
+            scrape_path = from_run / t.id / "scrape_output.json"
+            if scrape_path.exists():
+                out = read_scrape_output(scrape_path, from_run.name, t.url)
+                if out.content and (out.format or "html") == "html":
+                    body = out.content
+                    status = int(out.status_code or 200)
+        source = "capture" if body is not None else "synthetic"
+        if body is None:
+            body = synthetic_page(t.url, t.truth_text, t.lie_text)
+        (out_dir / f"{t.id}.html").write_text(body, encoding="utf-8")
+        manifest[t.id] = {"url": t.url, "status": status, "source": source}
+        counts["captured" if source == "capture" else "synthetic"] += 1
+    write_json(out_dir / "manifest.json", manifest)
+    return counts
+
+
+def rewrite_dataset(dataset: Path, out_csv: Path, base_url: str) -> int:
+    base_url = base_url.rstrip("/")
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with dataset.open("r", encoding="utf-8") as src, out_csv.open("w", encoding="utf-8", newline="") as dst:
+        reader = csv.DictReader(src)
+        writer = csv.DictWriter(dst, fieldnames=reader.fieldnames or ["id", "url", "truth_text", "lie_text", "error"])
+        writer.writeheader()
+        for i, row in enumerate(reader):
+            row["url"] = f"{base_url}/{row.get('id') or i}"
+            writer.writerow(row)
+            n += 1
+    return n
+
+
+class ReplayServer:
+    """Minimal HTTP/1.1 server (keep-alive, GET/HEAD) over captured snapshots."""
+
+    def __init__(self, snapshots: Path, config: Optional[ReplayConfig] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.snapshots = snapshots
+        self.config = config or ReplayConfig()
+        self.host = host
+        self.port = port
+        self.stats = ReplayStats()
+        self._rng = random.Random(self.config.seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        manifest_path = snapshots / "manifest.json"
+        self._manifest: Dict[str, Dict] = read_json(manifest_path) if manifest_path.exists() else {}
+        self._load = lru_cache(maxsize=2048)(self._read_page)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "ReplayServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "ReplayServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        async with self._server:
+            await self._server.serve_forever()
+
+    def _read_page(self, task_id: str) -> Optional[bytes]:
+        path = self.snapshots / f"{task_id}.html"
+        if not path.is_file():
+            return None
+        origin = f"{self.base_url}/__ext/".encode()
+        return _ABS_URL.sub(origin, path.read_bytes())
+
+    def _route(self, path: str) -> Tuple[int, bytes, str]:
+        path = path.split("?", 1)[0]
+        if path == "/__health":
+            return 200, b"ok", "text/plain"
+        if path == "/__stats":
+            return 200, json.dumps(asdict(self.stats)).encode(), "application/json"
+        if path.startswith("/__ext/"):
+            return 204, b"", "text/plain"
+        task_id = path.strip("/").split("/", 1)[0]
+        body = self._load(task_id) if task_id else None
+        if body is None:
+            return 404, b"<html><body>Not Found</body></html>", "text/html; charset=utf-8"
+        status = int(self._manifest.get(task_id, {}).get("status") or 200)
+        return status, body, "text/html; charset=utf-8"
+
+    async def _send_body(self, writer: asyncio.StreamWriter, body: bytes) -> None:
+        rate = self.config.bandwidth_kbps * 1024
+        if rate <= 0:
+            writer.write(body)
+            await writer.drain()
+            return
+        chunk = max(256, int(rate / 20))  # ~20 writes per second at the cap
+        for i in range(0, len(body), chunk):
+            part = body[i:i + chunk]
+            # Pace before writing so the transfer time of every chunk is observed by the client
+            await asyncio.sleep(len(part) / rate)
+            writer.write(part)
+            await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        cfg = self.config
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split(" ")
+                if len(parts) < 3:
+                    return
+                method, target, version = parts[0], parts[1], parts[2]
+                headers = {k.strip().lower(): v.strip() for k, _, v in (ln.partition(":") for ln in lines[1:] if ln)}
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                self.stats.requests += 1
+
+                status, body, ctype = self._route(target)
+                is_page = not target.startswith("/__")
+                if is_page:
+                    self.stats.pages += 1
+                    delay = cfg.latency_ms + (self._rng.uniform(-cfg.jitter_ms, cfg.jitter_ms) if cfg.jitter_ms else 0.0)
+                    if delay > 0:
+                        await asyncio.sleep(delay / 1000)
+                    if cfg.reset_rate and self._rng.random() < cfg.reset_rate:
+                        self.stats.resets += 1
+                        writer.transport.abort()
+                        return
+                    if cfg.error_rate and self._rng.random() < cfg.error_rate:
+                        self.stats.errors += 1
+                        status, body, ctype = cfg.error_status, b"<html><body>Injected error</body></html>", "text/html; charset=utf-8"
+
+                reason = _STATUS_TEXT.get(status, "Status")
+                header = (
+                    f"HTTP/1.1 {status} {reason}\r\nContent-Type: {ctype}\r\nContent-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                ).encode("latin-1")
+                writer.write(header)
+                if method != "HEAD" and body:
+                    await self._send_body(writer, body)
+                    self.stats.bytes_sent += len(body)
+                else:
+                    await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.CancelledError):
+            return
+        finally:
+            with contextlib.suppress(Exception):
+                writer.close()
+
+
+@app.command()
+def capture(
+    dataset: str = typer.Option("datasets/1-0-0.csv", "--dataset", help="Dataset CSV to snapshot."),
+    out: str = typer.Option(str(DEFAULT_SNAPSHOTS), "--out", help="Snapshot directory."),
+    from_run: Optional[str] = typer.Option(None, "--from-run", help="Per-engine run dir with html outputs, e.g. runs/rest_scraper_quality."),
+):
+    counts = capture_snapshots(Path(dataset), Path(out), Path(from_run) if from_run else None)
+    typer.echo(f"[replay] snapshots={out} captured={counts['captured']} synthetic={counts['synthetic']}")
+
+
+@app.command()
+def rewrite(
+    dataset: str = typer.Option("datasets/1-0-0.csv", "--dataset", help="Dataset CSV to rewrite."),
+    out: str = typer.Option(..., "--out", help="Output CSV with localhost URLs."),
+    base_url: str = typer.Option("http://127.0.0.1:8800", "--base-url", help="Replay server base URL."),
+):
+    n = rewrite_dataset(Path(dataset), Path(out), base_url)
+    typer.echo(f"[replay] rewrote {n} rows -> {out}")
+
+
+@app.command()
+def serve(
+    snapshots: str = typer.Option(str(DEFAULT_SNAPSHOTS), "--snapshots", help="Snapshot directory from `capture`."),
+    host: str = typer.Option("127.0.0.1", "--host"),
+    port: int = typer.Option(8800, "--port"),
+    latency_ms: float = typer.Option(0.0, "--latency-ms", help="Injected time-to-first-byte per page."),
+    jitter_ms: float = typer.Option(0.0, "--jitter-ms", help="Uniform +/- jitter added to the latency."),
+    error_rate: float = typer.Option(0.0, "--error-rate", help="Fraction of page requests answered with --error-status."),
+    error_status: int = typer.Option(503, "--error-status"),
+    reset_rate: float = typer.Option(0.0, "--reset-rate", help="Fraction of page requests whose connection is reset."),
+    bandwidth_kbps: float = typer.Option(0.0, "--bandwidth-kbps", help="Per-response bandwidth cap in KiB/s (0 = unlimited)."),
+    seed: Optional[int] = typer.Option(None, "--seed", help="Seed for jitter and injected failures."),
+):
+    config = ReplayConfig(
+        latency_ms=latency_ms,
+        jitter_ms=jitter_ms,
+        error_rate=error_rate,
+        error_status=error_status,
+        reset_rate=reset_rate,
+        bandwidth_kbps=bandwidth_kbps,
+        seed=seed,
+    )
+    server = ReplayServer(Path(snapshots), config, host=host, port=port)
+
+    async def _main():
+        await server.start()
+        typer.echo(f"[replay] serving {snapshots} at {server.base_url} config={asdict(config)}")
+        await server.serve_forever()
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    app()
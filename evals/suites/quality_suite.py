@@ -1,20 +1,29 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import dataclasses
 import uuid
-from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 
 from .types import AsyncBaseSuite, Task, TaskResult
 from ..engines.scrape_engine import ScrapeEngine
+from ..analysis.grade_cache import GradeCache
 from ..analysis.quality_analyzer import QualityAnalyzer
+from ..manifest import RunManifest
+from ..event_log import EventLog
+from ..live_metrics import LiveMetrics
+from ..profiling import RunProfiler
+from ..task_source import TaskSelection, load_selected_tasks
+from ..timing_history import order_longest_first
 from ..io_utils import (
+    UNREADABLE_OUTPUT_ERRORS,
     ensure_output_dir,
-    load_tasks_from_csv,
-    read_json,
+    read_scrape_output,
     summary_results_path,
     task_dir,
+    truth_hash,
     write_analyzer_output,
     write_scrape_output,
     write_task,
@@ -22,93 +31,172 @@ from ..io_utils import (
 
 
 class ContentQualitySuite(AsyncBaseSuite):
-    def __init__(self, scrape_engine: str, output_dir: Path, dry_run: bool, max_workers: int, dataset_csv: Path, lie_weight: float = 4.0) -> None:
+    def __init__(self, scrape_engine: str, output_dir: Path, dry_run: bool, max_workers: int, dataset_csv: Path, lie_weight: float = 4.0, max_per_host: int = 2, dns_cache: bool = True, task_timeout: Optional[float] = None, content_codec: str = "auto", selection: Optional[TaskSelection] = None, task_order: Optional[Dict[str, float]] = None, profiler: Optional[RunProfiler] = None, metrics: Optional[LiveMetrics] = None, log_level: str = "info", console_level: str = "notice", grade_cache: Optional[Path] = None) -> None:
         super().__init__(scrape_engine, output_dir, dry_run, max_workers)
         self.dataset_csv = dataset_csv
         self.lie_weight = lie_weight
+        self.max_per_host = max_per_host
+        self.dns_cache = dns_cache
+        self.task_timeout = task_timeout
+        self.content_codec = content_codec
+        self.selection = selection or TaskSelection()
+        self.task_order = task_order
+        self.profiler = profiler
+        self.metrics = metrics
+        self.log_level = log_level
+        self.console_level = console_level
+        self.grade_cache = grade_cache
         self.analyzer = QualityAnalyzer()
 
+    def _phase(self, name: str):
+        if self.metrics is not None:
+            self.metrics.set_phase(name)
+        return self.profiler.phase(name) if self.profiler else contextlib.nullcontext()
+
+    def _timed(self, name: str):
+        return self.profiler.timed(name) if self.profiler else contextlib.nullcontext()
+
     def load_tasks(self) -> List[Task]:
-        limit = 5 if self.dry_run else None
-        self.tasks = load_tasks_from_csv(self.dataset_csv, limit=limit)
+        selection = self.selection
+        if self.dry_run:
+            selection = dataclasses.replace(selection, limit=min(selection.limit or 5, 5))
+        self.tasks = order_longest_first(load_selected_tasks(self.dataset_csv, selection), self.task_order)
         return self.tasks
 
     async def run(self, *, resume: bool, analysis_only: bool) -> List[TaskResult]:
         # Prepare
         suite_key = "quality"
         # Directory already prepared by CLI; do not mutate here
-        engine = ScrapeEngine(self.scrape_engine, self.max_workers)
+        engine = ScrapeEngine(self.scrape_engine, self.max_workers, max_per_host=self.max_per_host, dns_cache=self.dns_cache, task_timeout=self.task_timeout)
         tasks = self.load_tasks()
         run_id = str(uuid.uuid4())
+        engine_dir = self.output_dir / f"{engine.engine_name}_{suite_key}"
+        # One index read instead of per-task stats/reads; resume and re-grading decisions come from it
+        manifest = RunManifest.load(engine_dir)
+        grader = self.analyzer.grader_key(self.lie_weight)
+        log = EventLog(
+            self.output_dir / "logs" / f"{engine.engine_name}_{suite_key}.{run_id}.jsonl" if self.log_level != "off" else None,
+            level=self.log_level if self.log_level != "off" else "info",
+            console_level=self.console_level,
+            context={"suite": suite_key, "engine": engine.engine_name, "run_id": run_id},
+        )
+        self.analyzer.cache = GradeCache(self.grade_cache) if self.grade_cache is not None else None
+        try:
+            return await self._run(engine, tasks, run_id, suite_key, manifest, grader, log, resume=resume, analysis_only=analysis_only)
+        finally:
+            if self.analyzer.cache is not None:
+                self.analyzer.cache.close()
+            log.close()
 
+    async def _run(self, engine: ScrapeEngine, tasks: List[Task], run_id: str, suite_key: str, manifest: RunManifest, grader: str, log: EventLog, *, resume: bool, analysis_only: bool) -> List[TaskResult]:
         results: List[TaskResult] = []
 
         # Scrape phase
-        if not analysis_only:
-            to_scrape: List[Task] = []
-            for t in tasks:
-                out_dir = task_dir(self.output_dir, engine.engine_name, suite_key, t.id)
-                scrape_path = out_dir / "scrape_output.json"
-                write_task(out_dir / "task.json", t)
-                if resume and scrape_path.exists():
-                    continue
-                print(f"{datetime.now().isoformat()} phase=scrape_start suite={suite_key} engine={engine.engine_name} run_id={run_id} task_id={t.id} url={t.url}")
-                to_scrape.append(t)
+        with self._phase("scrape"):
+            if not analysis_only:
+                to_scrape: List[Task] = []
+                for t in tasks:
+                    if resume and manifest.scraped(t.id):
+                        continue
+                    write_task(task_dir(self.output_dir, engine.engine_name, suite_key, t.id) / "task.json", t)
+                    log.emit("scrape_start", "debug", task_id=t.id, url=t.url)
+                    to_scrape.append(t)
 
-            if to_scrape:
-                def _on_result(t: Task, out):
-                    out_dir_local = task_dir(self.output_dir, engine.engine_name, suite_key, t.id)
-                    write_scrape_output(out_dir_local / "scrape_output.json", out)
-                    print(
-                        f"{datetime.now().isoformat()} phase=scrape_done suite={suite_key} engine={engine.engine_name} run_id={run_id} task_id={t.id} url={t.url} "
-                        f"status_code={out.status_code} content_size={out.content_size} format={out.format} error={out.error} saved={out_dir_local / 'scrape_output.json'}"
-                    )
+                log.emit("scrape_planned", "notice", tasks=len(tasks), to_scrape=len(to_scrape), max_workers=engine.max_workers)
+                if to_scrape:
+                    if self.metrics is not None:
+                        self.metrics.add_planned(len(to_scrape))
 
-                await engine.scrape_tasks(to_scrape, run_id=run_id, on_result=_on_result)
+                    def _on_result(t: Task, out):
+                        if self.metrics is not None:
+                            self.metrics.task_finished(out)
+                        out_dir_local = task_dir(self.output_dir, engine.engine_name, suite_key, t.id)
+                        with self._timed("write_scrape_output"):
+                            write_scrape_output(out_dir_local / "scrape_output.json", out, codec=self.content_codec)
+                            manifest.record_scrape(t.id, out)
+                        log.emit(
+                            "scrape_done", "info", task_id=t.id, url=t.url, status_code=out.status_code, content_size=out.content_size,
+                            format=out.format, elapsed_s=out.elapsed_s, timed_out=out.timed_out, truncated=out.truncated, error=out.error,
+                        )
+
+                    async with (self.profiler.watch_loop_lag() if self.profiler else contextlib.nullcontext()):
+                        await engine.scrape_tasks(
+                            to_scrape, run_id=run_id, on_result=_on_result,
+                            on_start=(lambda t: self.metrics.task_started()) if self.metrics is not None else None,
+                        )
+                    if engine.dns_cache is not None:
+                        log.emit(
+                            "scrape_stats", "notice", max_per_host=engine.max_per_host,
+                            dns_cache_hits=engine.dns_cache.hits, dns_cache_misses=engine.dns_cache.misses,
+                        )
 
         # Analysis phase
-        analyzer_results = []
-        for t in tasks:
-            out_dir = task_dir(self.output_dir, engine.engine_name, suite_key, t.id)
-            scrape_path = out_dir / "scrape_output.json"
-            if not scrape_path.exists():
-                if analysis_only:
-                    raise RuntimeError(f"Missing scrape output for task {t.id}. Run without --analysis-only or use --resume.")
-                else:
-                    # Skip tasks that weren't scraped this run
+        with self._phase("analysis"):
+            analyzer_results = []
+            timeouts = 0
+            regraded = 0
+            for t in tasks:
+                out_dir = task_dir(self.output_dir, engine.engine_name, suite_key, t.id)
+                scrape_path = out_dir / "scrape_output.json"
+                if not manifest.scraped(t.id):
+                    if analysis_only:
+                        raise RuntimeError(f"Missing scrape output for task {t.id}. Run without --analysis-only or use --resume.")
+                    else:
+                        # Skip tasks that weren't scraped this run
+                        continue
+                if manifest.grade_is_current(t.id, grader, truth_hash(t)):
+                    # Neither the scrape output, the task texts nor the grader changed: reuse the stored grade
+                    scr_out = manifest.metadata_output(t.id, engine.engine_name, t.url)
+                    analysis = manifest.grade_result(t.id)
+                    timeouts += int(scr_out.timed_out)
+                    results.append(TaskResult(task=t, scrape_output=scr_out, analyzer_result=analysis))
+                    analyzer_results.append(analysis)
                     continue
-            scrape_dict = read_json(scrape_path)
-            # Minimal adaptation to ScrapeOutput fields
-            from .types import ScrapeOutput, AnalyzerResult
-            scr_out = ScrapeOutput(
-                scraper=str(scrape_dict.get("scraper") or engine.engine_name),
-                url=str(scrape_dict.get("url") or t.url),
-                status_code=scrape_dict.get("status_code"),
-                error=scrape_dict.get("error"),
-                created_at=scrape_dict.get("created_at"),
-                format=scrape_dict.get("format"),
-                content_size=scrape_dict.get("content_size"),
-                content=scrape_dict.get("content"),
-            )
-            print(f"{datetime.now().isoformat()} phase=analyze_start suite={suite_key} engine={engine.engine_name} run_id={run_id} task_id={t.id} url={t.url}")
-            analysis = self.analyzer.analyze_one(t, scr_out, lie_weight=self.lie_weight)
-            write_analyzer_output(out_dir / "grader_output.json", analysis)
-            results.append(TaskResult(task=t, scrape_output=scr_out, analyzer_result=analysis))
-            analyzer_results.append(analysis)
-            print(
-                f"{datetime.now().isoformat()} phase=analyze_done suite={suite_key} engine={engine.engine_name} run_id={run_id} task_id={t.id} url={t.url} "
-                f"success={analysis.success} recall={analysis.recall:.3f} precision={analysis.precision:.3f} f1={analysis.f1:.3f}"
-            )
+                try:
+                    with self._timed("read_scrape_output"):
+                        scr_out = read_scrape_output(scrape_path, engine.engine_name, t.url)
+                except UNREADABLE_OUTPUT_ERRORS as e:
+                    # Missing, truncated or corrupt: forgotten, so --resume scrapes the task again
+                    manifest.forget(t.id)
+                    log.emit("scrape_output_unreadable", "warning", task_id=t.id, url=t.url, error=f"{type(e).__name__}: {e}")
+                    if analysis_only:
+                        raise RuntimeError(f"Missing or unreadable scrape output for task {t.id}. Run without --analysis-only or use --resume.")
+                    continue
+                timeouts += int(scr_out.timed_out)
+                regraded += 1
+                log.emit("analyze_start", "debug", task_id=t.id, url=t.url)
+                with self._timed("grade"):
+                    analysis = self.analyzer.analyze_one(t, scr_out, lie_weight=self.lie_weight)
+                with self._timed("write_analyzer_output"):
+                    write_analyzer_output(out_dir / "grader_output.json", analysis)
+                    manifest.record_grade(t.id, analysis, grader)
+                results.append(TaskResult(task=t, scrape_output=scr_out, analyzer_result=analysis))
+                analyzer_results.append(analysis)
+                log.emit(
+                    "analyze_done", "info", task_id=t.id, url=t.url, success=analysis.success,
+                    recall=round(analysis.recall, 3), precision=round(analysis.precision, 3), f1=round(analysis.f1, 3),
+                )
+
+            manifest.compact()
+            if self.analyzer.cache is not None:
+                log.emit(
+                    "grade_cache", "notice", hits=self.analyzer.cache.hits, misses=self.analyzer.cache.misses, errors=self.analyzer.cache.errors,
+                )
 
         # Summary
-        summary = self.analyzer.summarize(analyzer_results)
-        write_task(summary_results_path(self.output_dir, engine.engine_name, suite_key), Task(id="summary", url="", truth_text="", lie_text=""))  # dummy for path ensure
-        from ..io_utils import write_json
-        write_json(summary_results_path(self.output_dir, engine.engine_name, suite_key), summary)  # type: ignore[arg-type]
-        print(
-            f"{datetime.now().isoformat()} phase=summary suite={suite_key} engine={engine.engine_name} run_id={run_id} "
-            f"tasks={len(tasks)} analyzed={len(analyzer_results)} success_rate={summary.get('success_rate')} avg_f1={summary.get('avg_f1')}"
-        )
+        with self._phase("summary"):
+            summary = self.analyzer.summarize(analyzer_results)
+            summary["timeouts"] = timeouts
+            summary.update(manifest.scrape_stats(t.id for t in tasks))
+            if self.selection.shard_label:
+                summary["shard"] = self.selection.shard_label
+            write_task(summary_results_path(self.output_dir, engine.engine_name, suite_key), Task(id="summary", url="", truth_text="", lie_text=""))  # dummy for path ensure
+            from ..io_utils import write_json
+            write_json(summary_results_path(self.output_dir, engine.engine_name, suite_key), summary)  # type: ignore[arg-type]
+            log.emit(
+                "summary", "notice", tasks=len(tasks), analyzed=len(analyzer_results), regraded=regraded,
+                success_rate=summary.get("success_rate"), avg_f1=summary.get("avg_f1"),
+            )
         return results
 
 
@@ -28,6 +28,13 @@ class ScrapeOutput:
     format: Optional[Literal["markdown", "text", "html"]]
     content_size: Optional[int]
     content: Optional[str]
+    elapsed_s: Optional[float] = None
+    timed_out: bool = False
+    truncated: bool = False
+    engine_stats: Optional[Dict[str, Any]] = None
+    # Set when content is stored in a compressed blob next to scrape_output.json instead of inline
+    content_ref: Optional[str] = None
+    content_hash: Optional[str] = None
 
 
 @dataclass
@@ -36,6 +43,18 @@ class AnalyzerResult:
     recall: float
     precision: float
     f1: float
+    # Truth-bigram recall over the whole page, precision penalized by lie bigrams (--lie-weight)
+    ordered_recall: float = 0.0
+    ordered_precision: float = 0.0
+    ordered_f1: float = 0.0
+    # LCS of truth tokens and the best window / truth length (order-aware counterpart of recall)
+    order_score: float = 0.0
+    # "<vendor>:<type>" when the content is a block/captcha page (see analysis/block_signatures/)
+    block_type: Optional[str] = None
+    # Inputs the grade was computed from, so stale grades can be found without re-reading outputs
+    content_hash: Optional[str] = None
+    truth_hash: Optional[str] = None
+    analyzer_version: Optional[str] = None
 
 
 @dataclass
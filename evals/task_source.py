@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import hashlib
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .engines.host_scheduler import host_of
+from .io_utils import iter_tasks_from_csv
+from .suites.types import Task
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """'i/N' -> (i, N) with 0 <= i < N."""
+    try:
+        index_s, count_s = spec.split("/", 1)
+        index, count = int(index_s), int(count_s)
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}'; expected i/N, e.g. 0/4") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{spec}'; need 0 <= i < N")
+    return index, count
+
+
+def shard_of(task_id: str, count: int) -> int:
+    # Stable across machines and Python processes (unlike hash())
+    digest = hashlib.blake2b(task_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+def parse_id_ranges(spec: str) -> List[Tuple[Optional[str], Optional[str]]]:
+    """'1-100,250,300-' -> [("1","100"), ("250","250"), ("300",None)].
+
+    Single ids match exactly; range bounds must be numeric."""
+    ranges: List[Tuple[Optional[str], Optional[str]]] = []
+    for part in (p.strip() for p in spec.split(",")):
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = (s.strip() or None for s in part.split("-", 1))
+            if any(bound is not None and not bound.isdigit() for bound in (lo, hi)):
+                raise ValueError(f"Invalid id range '{part}'; range bounds must be numeric, e.g. 1-100 or 300-")
+            if lo is not None and hi is not None and int(lo) > int(hi):
+                raise ValueError(f"Invalid id range '{part}'; the lower bound is above the upper bound")
+            ranges.append((lo, hi))
+        else:
+            ranges.append((part, part))
+    return ranges
+
+
+def _id_in_range(task_id: str, lo: Optional[str], hi: Optional[str]) -> bool:
+    if lo == hi and lo is not None:
+        return task_id == lo
+    # Open and closed ranges only make sense for numeric ids
+    if not task_id.isdigit():
+        return False
+    n = int(task_id)
+    return (lo is None or n >= int(lo)) and (hi is None or n <= int(hi))
+
+
+@dataclass
+class TaskSelection:
+    """Which dataset rows a run works on. Filters apply first, then sampling, then sharding,
+    so every shard of a sampled run sees the same sample and shards never overlap."""
+
+    shard: Optional[Tuple[int, int]] = None
+    sample: Optional[int] = None
+    seed: int = 0
+    id_ranges: List[Tuple[Optional[str], Optional[str]]] = field(default_factory=list)
+    hosts: List[str] = field(default_factory=list)
+    min_truth_chars: Optional[int] = None
+    max_truth_chars: Optional[int] = None
+    limit: Optional[int] = None
+
+    @property
+    def shard_label(self) -> Optional[str]:
+        return f"{self.shard[0]}/{self.shard[1]}" if self.shard else None
+
+    def matches(self, task: Task) -> bool:
+        if self.id_ranges and not any(_id_in_range(task.id, lo, hi) for lo, hi in self.id_ranges):
+            return False
+        if self.hosts:
+            host = host_of(task.url)
+            if not any(host == h or host.endswith("." + h) for h in self.hosts):
+                return False
+        n = len(task.truth_text)
+        if self.min_truth_chars is not None and n < self.min_truth_chars:
+            return False
+        if self.max_truth_chars is not None and n > self.max_truth_chars:
+            return False
+        return True
+
+    def select(self, tasks: Iterable[Task]) -> Iterator[Task]:
+        selected: Iterable[Task] = (t for t in tasks if self.matches(t))
+        if self.sample is not None:
+            selected = _reservoir(selected, self.sample, self.seed)
+        if self.shard is not None:
+            index, count = self.shard
+            selected = (t for t in selected if shard_of(t.id, count) == index)
+        for i, t in enumerate(selected):
+            if self.limit is not None and i >= self.limit:
+                return
+            yield t
+
+
+def _reservoir(tasks: Iterable[Task], k: int, seed: int) -> List[Task]:
+    """Uniform sample of k tasks in one pass (Algorithm R), returned in dataset order."""
+    rng = random.Random(seed)
+    kept: List[Tuple[int, Task]] = []
+    for i, t in enumerate(tasks):
+        if i < k:
+            kept.append((i, t))
+        else:
+            j = rng.randint(0, i)
+            if j < k:
+                kept[j] = (i, t)
+    return [t for _, t in sorted(kept, key=lambda it: it[0])]
+
+
+def load_selected_tasks(csv_path: Path, selection: Optional[TaskSelection] = None) -> List[Task]:
+    tasks = iter_tasks_from_csv(csv_path)
+    return list(selection.select(tasks) if selection else tasks)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import json
+import statistics
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .manifest import MANIFEST_FILENAME
+from .suites.types import Task
+
+
+def task_durations(engine_dir: Path) -> Dict[str, float]:
+    """Per-task scrape durations from a run index, read-only (no rebuild or compaction)."""
+    durations: Dict[str, float] = {}
+    path = engine_dir / MANIFEST_FILENAME
+    if not path.exists():
+        return durations
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "scrape" not in rec:
+                continue
+            task_id = str(rec.get("task_id"))
+            elapsed = (rec["scrape"] or {}).get("elapsed_s")
+            if elapsed is None:
+                durations.pop(task_id, None)
+            else:
+                durations[task_id] = float(elapsed)
+    return durations
+
+
+def expected_durations(task_ids: Iterable[str], history: Dict[str, float], fallback_s: float) -> Dict[str, float]:
+    """Expected seconds per task: its own history, else the engine's median, else fallback_s."""
+    default = statistics.median(history.values()) if history else fallback_s
+    return {task_id: history.get(task_id, default) for task_id in task_ids}
+
+
+def expected_wall_s(expected: Dict[str, float], workers: int) -> float:
+    # Lower bound of the engine's makespan: perfect packing, but never shorter than its slowest task
+    if not expected:
+        return 0.0
+    return max(sum(expected.values()) / max(workers, 1), max(expected.values()))
+
+
+def order_longest_first(tasks: List[Task], expected: Optional[Dict[str, float]]) -> List[Task]:
+    """Longest expected tasks first (stable for ties); tasks without an estimate keep CSV order at the median."""
+    if not expected:
+        return tasks
+    default = statistics.median(expected.values())
+    return sorted(tasks, key=lambda t: -expected.get(t.id, default))
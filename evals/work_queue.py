@@ -0,0 +1,425 @@
+"""Dynamic (engine, task) job queue for spreading a run over several worker hosts.
+
+The broker is a single SQLite file (WAL mode), so it works locally and on any shared
+filesystem without extra services:
+
+    python run_eval.py coordinator --queue runs/queue.sqlite --dataset datasets/1-0-0.csv --engines rest_scraper,playwright_scraper
+    python run_eval.py worker --queue runs/queue.sqlite          # on every worker host, as many as you like
+
+Workers lease small batches, heartbeat while scraping and hand results back through the
+queue. A job whose lease expires (worker died or hung) goes back to the queue, up to
+max_attempts times. The coordinator is the only writer of the run directories: it stores
+and grades results as they arrive and writes the usual runs/results summaries.
+
+Both sides log through EventLog like single-process runs: the coordinator to
+<output-dir>/logs/coordinator_quality.<run_id>.jsonl, each worker to logs/ next to the queue file.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .analysis.grade_cache import GradeCache
+from .analysis.quality_analyzer import QualityAnalyzer
+from .engines.scrape_engine import ScrapeEngine
+from .event_log import EventLog
+from .io_utils import summary_results_path, task_dir, write_analyzer_output, write_json, write_scrape_output, write_task
+from .manifest import RunManifest
+from .regrade import summarize_manifest
+from .suites.types import ScrapeOutput, Task
+
+SUITE_KEY = "quality"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    engine TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    task TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',   -- queued | leased | done | failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    output TEXT,
+    content BLOB,
+    collected INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    UNIQUE (engine, task_id)
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, engine, id);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    host TEXT,
+    pid INTEGER,
+    started_at REAL,
+    last_heartbeat REAL
+);
+"""
+
+
+@dataclass
+class Job:
+    id: int
+    engine: str
+    task: Task
+    attempts: int
+
+
+class SQLiteQueue:
+    def __init__(self, path: Path, lease_s: float = 120.0, max_attempts: int = 3) -> None:
+        self.path = path
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; multi-statement updates use explicit BEGIN IMMEDIATE
+        self.db = sqlite3.connect(str(path), timeout=30, isolation_level=None, check_same_thread=False)
+        # Workers call the queue from worker threads (asyncio.to_thread); one statement or
+        # transaction at a time on the shared connection
+        self._lock = threading.Lock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _txn(self):
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+
+    def close(self) -> None:
+        self.db.close()
+
+    # Producer side ----------------------------------------------------
+
+    def enqueue(self, engine: str, tasks: Iterable[Task]) -> int:
+        now = time.time()
+        with self._txn():
+            before = self.db.total_changes
+            self.db.executemany(
+                "INSERT OR IGNORE INTO jobs (engine, task_id, task, updated_at) VALUES (?, ?, ?, ?)",
+                ((engine, t.id, json.dumps(asdict(t), ensure_ascii=False), now) for t in tasks),
+            )
+            return self.db.total_changes - before
+
+    def requeue_expired(self) -> int:
+        """Put jobs with expired leases back in the queue (or fail them after max_attempts)."""
+        now = time.time()
+        with self._txn():
+            failed = self.db.execute(
+                "UPDATE jobs SET state='failed', lease_owner=NULL, updated_at=? "
+                "WHERE state='leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            ).rowcount
+            requeued = self.db.execute(
+                "UPDATE jobs SET state='queued', lease_owner=NULL, lease_expires=NULL, updated_at=? "
+                "WHERE state='leased' AND lease_expires < ?",
+                (now, now),
+            ).rowcount
+        return failed + requeued
+
+    def counts(self) -> Dict[str, int]:
+        return {state: n for state, n in self.db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")}
+
+    # Worker side ------------------------------------------------------
+
+    def register(self, worker_id: str) -> None:
+        now = time.time()
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO workers (id, host, pid, started_at, last_heartbeat) VALUES (?, ?, ?, ?, ?)",
+                (worker_id, socket.gethostname(), os.getpid(), now, now),
+            )
+
+    def lease(self, worker_id: str, batch: int, engines: Optional[List[str]] = None) -> List[Job]:
+        """Lease up to `batch` queued jobs, all for the same engine (the one with the oldest job)."""
+        self.requeue_expired()
+        now = time.time()
+        where, params = "state='queued'", []
+        if engines:
+            where += f" AND engine IN ({','.join('?' * len(engines))})"
+            params = list(engines)
+        with self._txn():
+            row = self.db.execute(f"SELECT engine FROM jobs WHERE {where} ORDER BY id LIMIT 1", params).fetchone()
+            if row is None:
+                return []
+            rows = self.db.execute(
+                "SELECT id, engine, task, attempts FROM jobs WHERE state='queued' AND engine=? ORDER BY id LIMIT ?",
+                (row[0], batch),
+            ).fetchall()
+            self.db.executemany(
+                "UPDATE jobs SET state='leased', lease_owner=?, lease_expires=?, attempts=attempts+1, updated_at=? WHERE id=?",
+                ((worker_id, now + self.lease_s, now, r[0]) for r in rows),
+            )
+        return [Job(id=r[0], engine=r[1], task=Task(**json.loads(r[2])), attempts=r[3] + 1) for r in rows]
+
+    def heartbeat(self, worker_id: str, job_ids: Iterable[int]) -> None:
+        now = time.time()
+        ids = list(job_ids)
+        with self._txn():
+            self.db.execute("UPDATE workers SET last_heartbeat=? WHERE id=?", (now, worker_id))
+            self.db.executemany(
+                "UPDATE jobs SET lease_expires=? WHERE id=? AND state='leased' AND lease_owner=?",
+                ((now + self.lease_s, job_id, worker_id) for job_id in ids),
+            )
+
+    def complete(self, job_id: int, output: ScrapeOutput) -> bool:
+        """Store a result. The first result wins, even from a worker whose lease already expired.
+
+        A late result for a job that already failed replaces the failure: collected is reset
+        so the coordinator stores and grades it over the failed record.
+        """
+        meta = asdict(output)
+        content = meta.pop("content")
+        packed = zlib.compress(content.encode("utf-8"), 6) if content is not None else None
+        with self._lock:
+            cur = self.db.execute(
+                "UPDATE jobs SET state='done', output=?, content=?, collected=0, lease_owner=NULL, updated_at=? WHERE id=? AND state != 'done'",
+                (json.dumps(meta, ensure_ascii=False), packed, time.time(), job_id),
+            )
+            return cur.rowcount == 1
+
+    # Coordinator side -------------------------------------------------
+
+    def uncollected(self, limit: int = 256) -> List[tuple]:
+        return self.db.execute(
+            "SELECT id, engine, task, state, attempts, output, content FROM jobs "
+            "WHERE state IN ('done', 'failed') AND collected=0 ORDER BY id LIMIT ?",
+            (limit,),
+        ).fetchall()
+
+    def mark_collected(self, jobs: Iterable[tuple]) -> None:
+        """Mark (job_id, state) pairs collected; a job whose state changed since it was read stays uncollected."""
+        with self._txn():
+            self.db.executemany("UPDATE jobs SET collected=1, content=NULL WHERE id=? AND state=?", jobs)
+
+    def pending(self, engines: Optional[List[str]] = None) -> int:
+        where, params = "state IN ('queued', 'leased')", []
+        if engines:
+            where += f" AND engine IN ({','.join('?' * len(engines))})"
+            params = list(engines)
+        return self.db.execute(f"SELECT COUNT(*) FROM jobs WHERE {where}", params).fetchone()[0]
+
+
+def _failed_output(engine: str, task: Task, attempts: int) -> ScrapeOutput:
+    return ScrapeOutput(
+        scraper=engine,
+        url=task.url,
+        status_code=None,
+        error=f"Worker lost: lease expired on all {attempts} attempt(s)",
+        created_at=datetime.now().isoformat(),
+        format=None,
+        content_size=0,
+        content=None,
+    )
+
+
+async def run_worker(
+    queue: SQLiteQueue,
+    engines: Optional[List[str]],
+    max_workers: int,
+    batch: int,
+    idle_exit_s: float,
+    max_per_host: int = 2,
+    dns_cache: bool = True,
+    task_timeout: Optional[float] = None,
+    log_level: str = "info",
+    console_level: str = "notice",
+) -> int:
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    await asyncio.to_thread(queue.register, worker_id)
+    log = _event_log(
+        queue.path.parent / "logs" / f"worker.{worker_id.replace(':', '-')}.jsonl", log_level, console_level,
+        {"suite": SUITE_KEY, "worker_id": worker_id},
+    )
+    try:
+        return await _work(queue, engines, max_workers, batch, idle_exit_s, max_per_host, dns_cache, task_timeout, worker_id, log)
+    finally:
+        log.close()
+
+
+def _event_log(path: Path, log_level: str, console_level: str, context: Dict[str, str]) -> EventLog:
+    return EventLog(
+        path if log_level != "off" else None,
+        level=log_level if log_level != "off" else "info",
+        console_level=console_level,
+        context=context,
+    )
+
+
+async def _work(
+    queue: SQLiteQueue,
+    engines: Optional[List[str]],
+    max_workers: int,
+    batch: int,
+    idle_exit_s: float,
+    max_per_host: int,
+    dns_cache: bool,
+    task_timeout: Optional[float],
+    worker_id: str,
+    log: EventLog,
+) -> int:
+    scrape_engines: Dict[str, ScrapeEngine] = {}
+    idle_since: Optional[float] = None
+    done = 0
+    log.emit("worker_start", "notice", queue=str(queue.path))
+    # Queue calls run on threads: a write waiting out another worker's lock (up to the
+    # connection's 30 s busy timeout) must not stall the scrapes in flight on this loop
+    while True:
+        jobs = await asyncio.to_thread(queue.lease, worker_id, batch, engines)
+        if not jobs:
+            idle_since = idle_since or time.monotonic()
+            if time.monotonic() - idle_since >= idle_exit_s:
+                break
+            await asyncio.sleep(1.0)
+            continue
+        idle_since = None
+        engine_name = jobs[0].engine
+        if engine_name not in scrape_engines:
+            scrape_engines[engine_name] = ScrapeEngine(engine_name, max_workers, max_per_host=max_per_host, dns_cache=dns_cache, task_timeout=task_timeout)
+        engine = scrape_engines[engine_name]
+        in_flight = {j.task.id: j for j in jobs}
+
+        async def _heartbeat() -> None:
+            while True:
+                await asyncio.sleep(queue.lease_s / 3)
+                await asyncio.to_thread(queue.heartbeat, worker_id, [j.id for j in in_flight.values()])
+
+        async def _complete(job: Job, out: ScrapeOutput) -> None:
+            stored = await asyncio.to_thread(queue.complete, job.id, out)
+            log.emit(
+                "scrape_done", "info", engine=job.engine, task_id=job.task.id, url=job.task.url, status_code=out.status_code,
+                content_size=out.content_size, format=out.format, elapsed_s=out.elapsed_s, timed_out=out.timed_out,
+                truncated=out.truncated, error=out.error, stored=stored,
+            )
+
+        completions: List[asyncio.Task] = []
+
+        def _on_result(t: Task, out: ScrapeOutput) -> None:
+            completions.append(asyncio.create_task(_complete(in_flight.pop(t.id), out)))
+
+        hb = asyncio.create_task(_heartbeat())
+        try:
+            await engine.scrape_tasks([j.task for j in jobs], run_id=worker_id, on_result=_on_result)
+        finally:
+            # Results are stored before the heartbeat stops, so no finished job's lease lapses
+            await asyncio.gather(*completions)
+            hb.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await hb
+        done += len(jobs)
+        log.emit("worker_batch", "info", engine=engine_name, jobs=len(jobs), total=done)
+    log.emit("worker_exit", "notice", jobs=done)
+    return done
+
+
+async def run_coordinator(
+    queue: SQLiteQueue,
+    tasks: List[Task],
+    engines: List[str],
+    output_dir: Path,
+    lie_weight: float,
+    resume: bool,
+    poll_s: float = 2.0,
+    grade_cache: Optional[Path] = None,
+    log_level: str = "info",
+    console_level: str = "notice",
+) -> Dict[str, dict]:
+    run_id = str(uuid.uuid4())
+    log = _event_log(
+        output_dir / "logs" / f"coordinator_{SUITE_KEY}.{run_id}.jsonl", log_level, console_level,
+        {"suite": SUITE_KEY, "run_id": run_id},
+    )
+    try:
+        return await _coordinate(queue, tasks, engines, output_dir, lie_weight, resume, poll_s, grade_cache, log)
+    finally:
+        log.close()
+
+
+async def _coordinate(
+    queue: SQLiteQueue,
+    tasks: List[Task],
+    engines: List[str],
+    output_dir: Path,
+    lie_weight: float,
+    resume: bool,
+    poll_s: float,
+    grade_cache: Optional[Path],
+    log: EventLog,
+) -> Dict[str, dict]:
+    analyzer = QualityAnalyzer(GradeCache(grade_cache) if grade_cache is not None else None)
+    grader = analyzer.grader_key(lie_weight)
+    manifests = {e: RunManifest.load(output_dir / f"{e}_{SUITE_KEY}") for e in engines}
+    for e in engines:
+        todo = [t for t in tasks if not (resume and manifests[e].scraped(t.id))]
+        added = queue.enqueue(e, todo)
+        log.emit("enqueue", "notice", engine=e, tasks=len(todo), new_jobs=added)
+
+    def _collect() -> int:
+        rows = queue.uncollected()
+        for job_id, engine, task_json, state, attempts, meta_json, packed in rows:
+            task = Task(**json.loads(task_json))
+            out_dir = task_dir(output_dir, engine, SUITE_KEY, task.id)
+            if state == "done":
+                meta = json.loads(meta_json)
+                out = ScrapeOutput(**meta, content=zlib.decompress(packed).decode("utf-8") if packed is not None else None)
+            else:
+                out = _failed_output(engine, task, attempts)
+            write_task(out_dir / "task.json", task)
+            write_scrape_output(out_dir / "scrape_output.json", out)
+            manifest = manifests[engine]
+            manifest.record_scrape(task.id, out)
+            analysis = analyzer.analyze_one(task, out, lie_weight=lie_weight)
+            write_analyzer_output(out_dir / "grader_output.json", analysis)
+            manifest.record_grade(task.id, analysis, grader)
+            log.emit(
+                "analyze_done", "info", engine=engine, task_id=task.id, url=task.url, state=state, attempts=attempts,
+                status_code=out.status_code, success=analysis.success, recall=round(analysis.recall, 3),
+                precision=round(analysis.precision, 3), f1=round(analysis.f1, 3),
+            )
+        queue.mark_collected((r[0], r[3]) for r in rows)
+        return len(rows)
+
+    try:
+        while True:
+            queue.requeue_expired()
+            collected = _collect()
+            if not collected and queue.pending(engines) == 0 and not queue.uncollected(1):
+                break
+            if not collected:
+                await asyncio.sleep(poll_s)
+    finally:
+        if analyzer.cache is not None:
+            log.emit("grade_cache", "notice", hits=analyzer.cache.hits, misses=analyzer.cache.misses, errors=analyzer.cache.errors)
+            analyzer.cache.close()
+
+    summaries: Dict[str, dict] = {}
+    task_ids = [t.id for t in tasks]
+    for e in engines:
+        manifest = manifests[e]
+        manifest.compact()
+        summary = summarize_manifest(manifest, analyzer, task_ids)
+        write_json(summary_results_path(output_dir, e, SUITE_KEY), summary)
+        summaries[e] = summary
+        log.emit(
+            "summary", "notice", engine=e, tasks=len(task_ids),
+            success_rate=summary.get("success_rate"), avg_f1=summary.get("avg_f1"),
+        )
+    return summaries
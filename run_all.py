@@ -1,17 +1,45 @@
 from __future__ import annotations
 
+import ast
 import asyncio
 import os
 import sys
+from dataclasses import dataclass
 from pathlib import Path
 import contextlib
-from typing import List
+from typing import Dict, List, Optional
 
 import typer  # type: ignore
 
+from evals.analysis.bootstrap import available as bootstrap_available  # type: ignore
+from evals.compare import compare_engines, comparisons_path  # type: ignore
+from evals.io_utils import iter_tasks_from_csv, write_json  # type: ignore
+from evals.timing_history import expected_durations, expected_wall_s, task_durations  # type: ignore
+
 app = typer.Typer()
 
 
+@dataclass(frozen=True)
+class ResourceClass:
+    # Rough per-process and per-worker costs used for admission, not hard limits
+    process_mem_mb: float
+    worker_mem_mb: float
+    worker_cpu: float
+    default_workers: int
+    # Per-URL duration assumed for engines with no timing history
+    default_task_s: float
+
+
+RESOURCE_CLASSES: Dict[str, ResourceClass] = {
+    # One Chromium/Firefox per worker
+    "browser": ResourceClass(process_mem_mb=250, worker_mem_mb=300, worker_cpu=0.5, default_workers=4, default_task_s=8.0),
+    # One interpreter subprocess per URL
+    "cpu": ResourceClass(process_mem_mb=150, worker_mem_mb=120, worker_cpu=1.0, default_workers=max(2, (os.cpu_count() or 4) // 2), default_task_s=4.0),
+    # Mostly waiting on remote APIs or plain HTTP
+    "network": ResourceClass(process_mem_mb=150, worker_mem_mb=8, worker_cpu=0.05, default_workers=10, default_task_s=4.0),
+}
+
+
 def discover_engines(engines_dir: Path) -> List[str]:
     engines: List[str] = []
     for fp in engines_dir.glob("*.py"):
@@ -23,6 +51,106 @@ def discover_engines(engines_dir: Path) -> List[str]:
     return engines
 
 
+def engine_resource_class(engine_path: Path) -> str:
+    """Read `resource_class = "..."` from the engine's class body without importing it."""
+    try:
+        tree = ast.parse(engine_path.read_text(encoding="utf-8"))
+    except (OSError, SyntaxError):
+        return "network"
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            for stmt in node.body:
+                if (
+                    isinstance(stmt, ast.Assign)
+                    and any(isinstance(t, ast.Name) and t.id == "resource_class" for t in stmt.targets)
+                    and isinstance(stmt.value, ast.Constant)
+                    and stmt.value.value in RESOURCE_CLASSES
+                ):
+                    return stmt.value.value
+    return "network"
+
+
+def available_memory_mb() -> float:
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES") / (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return 4096.0
+
+
+class ResourceBudget:
+    """Admits engine processes while their estimated memory/CPU fit the host budget.
+
+    A request larger than the whole budget is still admitted when nothing else runs,
+    so an oversized engine runs alone instead of never.
+    """
+
+    def __init__(self, mem_mb: float, cpu: float, max_engines: Optional[int] = None) -> None:
+        self.mem_mb = mem_mb
+        self.cpu = cpu
+        self.max_engines = max_engines
+        self.used_mem_mb = 0.0
+        self.used_cpu = 0.0
+        self.running = 0
+        self._cond = asyncio.Condition()
+
+    def _fits(self, mem_mb: float, cpu: float) -> bool:
+        if self.running == 0:
+            return True
+        if self.max_engines is not None and self.running >= self.max_engines:
+            return False
+        return self.used_mem_mb + mem_mb <= self.mem_mb and self.used_cpu + cpu <= self.cpu
+
+    @contextlib.asynccontextmanager
+    async def reserve(self, mem_mb: float, cpu: float):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._fits(mem_mb, cpu))
+            self.used_mem_mb += mem_mb
+            self.used_cpu += cpu
+            self.running += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self.used_mem_mb -= mem_mb
+                self.used_cpu -= cpu
+                self.running -= 1
+                self._cond.notify_all()
+
+
+@dataclass
+class EnginePlan:
+    engine: str
+    resource_class: str
+    workers: int
+    mem_mb: float
+    cpu: float
+    expected_s: float = 0.0
+    # task_id -> expected seconds, handed to run_eval as --task-order
+    task_estimates: Optional[Dict[str, float]] = None
+    task_order_path: Optional[Path] = None
+
+
+def plan_engine(engine: str, resource_class: str, workers: int, mem_budget_mb: float) -> EnginePlan:
+    rc = RESOURCE_CLASSES[resource_class]
+    # Never plan a single engine bigger than the whole memory budget
+    fit = int((mem_budget_mb - rc.process_mem_mb) // rc.worker_mem_mb) if rc.worker_mem_mb else workers
+    workers = max(1, min(workers, fit))
+    return EnginePlan(
+        engine=engine,
+        resource_class=resource_class,
+        workers=workers,
+        mem_mb=rc.process_mem_mb + workers * rc.worker_mem_mb,
+        cpu=workers * rc.worker_cpu,
+    )
+
+
 async def run_one_engine(
     engine: str,
     suite: str,
@@ -37,6 +165,7 @@ async def run_one_engine(
     cmd = [
         sys.executable,
         str(Path(__file__).parent / "run_eval.py"),
+        "run",
         "--scrape_engine",
         engine,
         "--suite",
@@ -57,9 +186,13 @@ async def run_one_engine(
 
     async def _drain(prefix: str):
         assert proc.stdout is not None
+        # Pass bytes straight through; children already write UTF-8
+        tag = f"[{prefix}] ".encode()
+        out = sys.stdout.buffer
         async for line in proc.stdout:
             try:
-                sys.stdout.write(f"[{prefix}] "+line.decode(errors="replace"))
+                out.write(tag + line)
+                out.flush()
             except Exception:
                 pass
 
@@ -80,13 +213,35 @@ def run_all(
     dataset: str = typer.Option(..., "--dataset", help="Path to dataset CSV (relative to scrape_evals/)"),
     suite: str = typer.Option("quality", help="Suite name"),
     output_dir: str = typer.Option("runs", help="Output base directory (relative to scrape_evals/)"),
-    concurrency: int = typer.Option(0, help="Number of concurrent engines (0 = CPUs)"),
+    concurrency: int = typer.Option(0, help="Max concurrent engines (0 = limited only by the memory/CPU budget)"),
+    mem_budget_mb: float = typer.Option(0, help="Memory budget for all engines in MB (0 = 80% of available memory)", rich_help_panel="Resource budget"),
+    cpu_budget: float = typer.Option(0, help="CPU budget for all engines in cores (0 = CPU count)", rich_help_panel="Resource budget"),
+    browser_workers: int = typer.Option(None, help="--max-workers for browser engines (default 4)", rich_help_panel="Resource budget"),
+    cpu_workers: int = typer.Option(None, help="--max-workers for CPU-heavy engines (default CPUs/2)", rich_help_panel="Resource budget"),
+    network_workers: int = typer.Option(None, help="--max-workers for network-bound engines (default 10)", rich_help_panel="Resource budget"),
+    log_level: str = typer.Option(None, help="Pass --log-level to run_eval (JSONL event log threshold)", rich_help_panel="Engine flags"),
+    console_level: str = typer.Option(None, help="Pass --console-level to run_eval (stdout threshold; default notice)", rich_help_panel="Engine flags"),
+    metrics_port: int = typer.Option(0, help="Give engine i live metrics on 127.0.0.1:<metrics-port + i> (0 = off); status files are written either way", rich_help_panel="Engine flags"),
+    history: bool = typer.Option(True, "--history/--no-history", help="Order engines and tasks longest-expected-first using elapsed times of previous runs", rich_help_panel="Resource budget"),
+    history_dir: str = typer.Option(None, help="Directory with previous <engine>_<suite> runs to take timings from (default: --output-dir)", rich_help_panel="Resource budget"),
     timeout_minutes: int = typer.Option(45, help="Per-engine timeout in minutes"),
+    compare: bool = typer.Option(True, "--compare/--no-compare", help="Write paired bootstrap comparisons of all engines to results/comparisons.<suite>.json (needs numpy)"),
     resume: bool = typer.Option(False, help="Pass --resume to run_eval"),
     rerun: bool = typer.Option(False, help="Pass --rerun to run_eval (avoid with parallel; pre-clean instead)"),
     analysis_only: bool = typer.Option(False, help="Pass --analysis-only to run_eval"),
     dry_run: bool = typer.Option(False, help="Pass --dry-run to run_eval"),
-    max_workers: int = typer.Option(None, help="Pass --max-workers to run_eval", rich_help_panel="Engine flags"),
+    max_workers: int = typer.Option(None, help="Pass --max-workers to run_eval for every engine (overrides the per-class values)", rich_help_panel="Engine flags"),
+    max_per_host: int = typer.Option(None, help="Pass --max-per-host to run_eval", rich_help_panel="Engine flags"),
+    task_timeout: float = typer.Option(None, help="Pass --task-timeout to run_eval", rich_help_panel="Engine flags"),
+    max_body_bytes: int = typer.Option(None, help="Pass --max-body-bytes to run_eval", rich_help_panel="Engine flags"),
+    content_codec: str = typer.Option(None, help="Pass --content-codec to run_eval", rich_help_panel="Engine flags"),
+    browser_cache_mb: int = typer.Option(None, help="Pass --browser-cache-mb to run_eval (persistent HTTP cache for browser engines)", rich_help_panel="Engine flags"),
+    grade_cache: str = typer.Option(None, help="Pass --grade-cache to run_eval (default <output-dir>/grade_cache.sqlite, shared by all engines)", rich_help_panel="Engine flags"),
+    shard: str = typer.Option(None, help="Pass --shard to run_eval (i/N)", rich_help_panel="Task selection"),
+    sample: int = typer.Option(None, help="Pass --sample to run_eval", rich_help_panel="Task selection"),
+    seed: int = typer.Option(None, help="Pass --seed to run_eval", rich_help_panel="Task selection"),
+    ids: str = typer.Option(None, help="Pass --ids to run_eval", rich_help_panel="Task selection"),
+    hosts: str = typer.Option(None, help="Pass --hosts to run_eval", rich_help_panel="Task selection"),
 ):
     scrape_evals_root = Path(__file__).parent
     engines_dir = scrape_evals_root / "engines"
@@ -108,12 +263,65 @@ def run_all(
         extra.append("--analysis-only")
     if dry_run:
         extra.append("--dry-run")
-    if max_workers is not None:
-        extra += ["--max-workers", str(max_workers)]
+    if max_per_host is not None:
+        extra += ["--max-per-host", str(max_per_host)]
+    if task_timeout is not None:
+        extra += ["--task-timeout", str(task_timeout)]
+    if max_body_bytes is not None:
+        extra += ["--max-body-bytes", str(max_body_bytes)]
+    if grade_cache is not None:
+        extra += ["--grade-cache", grade_cache]
+    if browser_cache_mb is not None:
+        extra += ["--browser-cache-mb", str(browser_cache_mb)]
+    if content_codec is not None:
+        extra += ["--content-codec", content_codec]
+    if log_level is not None:
+        extra += ["--log-level", log_level]
+    if console_level is not None:
+        extra += ["--console-level", console_level]
+    if shard is not None:
+        extra += ["--shard", shard]
+    if sample is not None:
+        extra += ["--sample", str(sample)]
+    if seed is not None:
+        extra += ["--seed", str(seed)]
+    if ids is not None:
+        extra += ["--ids", ids]
+    if hosts is not None:
+        extra += ["--hosts", hosts]
 
-    # Concurrency
-    if concurrency <= 0:
-        concurrency = os.cpu_count() or 4
+    # Resource budget: browser engines run narrow, network-bound engines wide
+    if mem_budget_mb <= 0:
+        mem_budget_mb = available_memory_mb() * 0.8
+    if cpu_budget <= 0:
+        cpu_budget = float(os.cpu_count() or 4)
+    class_workers = {"browser": browser_workers, "cpu": cpu_workers, "network": network_workers}
+    plans: List[EnginePlan] = []
+    # Timings must be read before --rerun pre-cleans the engine directories
+    history_base = scrape_evals_root / history_dir if history_dir else out_base
+    task_ids = [t.id for t in iter_tasks_from_csv(scrape_evals_root / dataset)] if history else []
+    for eng in engines:
+        rc_name = engine_resource_class(engines_dir / f"{eng}.py")
+        workers = max_workers or class_workers[rc_name] or RESOURCE_CLASSES[rc_name].default_workers
+        plan = plan_engine(eng, rc_name, workers, mem_budget_mb)
+        if history:
+            past = task_durations(history_base / f"{eng}_{suite}")
+            plan.task_estimates = expected_durations(task_ids, past, RESOURCE_CLASSES[rc_name].default_task_s) if past else None
+            if plan.task_estimates:
+                plan.task_order_path = out_base / "results" / f"{eng}_{suite}.schedule.json"
+                write_json(plan.task_order_path, plan.task_estimates)
+            estimates = plan.task_estimates or expected_durations(task_ids, {}, RESOURCE_CLASSES[rc_name].default_task_s)
+            plan.expected_s = min(expected_wall_s(estimates, plan.workers), timeout_minutes * 60)
+        plans.append(plan)
+    # Longest expected engines first (LPT) so the slowest one doesn't start late and set the
+    # total wall time; memory breaks ties, which is the whole order when there is no history
+    plans.sort(key=lambda p: (-p.expected_s, -p.mem_mb, p.engine))
+    typer.echo(f"[budget] mem={mem_budget_mb:.0f}MB cpu={cpu_budget:g} max_engines={concurrency or 'unlimited'}")
+    for p in plans:
+        typer.echo(
+            f"[plan] engine={p.engine} class={p.resource_class} workers={p.workers} mem~{p.mem_mb:.0f}MB cpu~{p.cpu:.2f} "
+            f"expected~{p.expected_s:.0f}s history={'yes' if p.task_estimates else 'no'}"
+        )
 
     # Optionally pre-clean when --rerun set to avoid races across processes
     if rerun:
@@ -139,23 +347,39 @@ def run_all(
         # Do not pass --rerun to children to avoid concurrent deletes
         extra = [a for a in extra if a != "--rerun"]
 
-    sem = asyncio.Semaphore(concurrency)
     timeout_s = timeout_minutes * 60
 
-    async def _runner(eng: str):
-        async with sem:
+    if metrics_port:
+        for i, p in enumerate(plans):
+            typer.echo(f"[metrics] engine={p.engine} http://127.0.0.1:{metrics_port + i}/metrics")
+
+    async def _runner(budget: ResourceBudget, plan: EnginePlan, index: int):
+        engine_args = [*extra, "--max-workers", str(plan.workers)]
+        if plan.task_order_path:
+            engine_args += ["--task-order", str(plan.task_order_path)]
+        if metrics_port:
+            engine_args += ["--metrics-port", str(metrics_port + index)]
+        async with budget.reserve(plan.mem_mb, plan.cpu):
             rc = await run_one_engine(
-                eng, suite, out_base, scrape_evals_root / dataset, timeout_s, extra,
+                plan.engine, suite, out_base, scrape_evals_root / dataset, timeout_s, engine_args,
             )
             if rc != 0:
-                typer.echo(f"[warn] engine={eng} exited with {rc}")
+                typer.echo(f"[warn] engine={plan.engine} exited with {rc}")
 
     async def _main():
-        await asyncio.gather(*[_runner(e) for e in engines])
+        budget = ResourceBudget(mem_budget_mb, cpu_budget, max_engines=concurrency if concurrency > 0 else None)
+        # Runners wait on the budget in plan order; lighter engines backfill while a heavy one waits for room
+        await asyncio.gather(*[_runner(budget, p, i) for i, p in enumerate(plans)])
 
     asyncio.run(_main())
     typer.echo("All engines attempted.")
 
+    if compare and suite == "quality" and bootstrap_available():
+        report = compare_engines(out_base, engines)
+        if len(report["engines"]) > 1:
+            write_json(comparisons_path(out_base), report)
+            typer.echo(f"[compare] {len(report['pairs'])} engine pairs on {report['tasks']} common tasks -> {comparisons_path(out_base)}")
+
 
 if __name__ == "__main__":
     app()
@@ -3,6 +3,7 @@ from __future__ import annotations
 import os
 import sys
 from pathlib import Path
+from typing import Optional
 import uuid
 import tempfile
 import shutil
@@ -13,8 +14,15 @@ PACKAGE_ROOT = Path(__file__).resolve().parent
 if str(PACKAGE_ROOT) not in sys.path:
     sys.path.insert(0, str(PACKAGE_ROOT))
 
+from engines.shared.browser_cache import CACHE_DIR_ENV, CACHE_MB_ENV, reset_cache_root  # type: ignore
+from evals.analysis.grade_cache import resolve_cache_path  # type: ignore
 from evals.suites.quality_suite import ContentQualitySuite  # type: ignore
-from evals.io_utils import ensure_output_dir  # type: ignore
+from evals.io_utils import ensure_output_dir, read_json, resolve_codec  # type: ignore
+from evals.event_log import level_value  # type: ignore
+from evals.live_metrics import LiveMetrics, MetricsPublisher  # type: ignore
+from evals.profiling import RunProfiler  # type: ignore
+from evals.task_source import TaskSelection, load_selected_tasks, parse_id_ranges, parse_shard  # type: ignore
+from evals.work_queue import SQLiteQueue, run_coordinator, run_worker  # type: ignore
 
 
 app = typer.Typer()
@@ -31,8 +39,57 @@ def run(
     rerun: bool = typer.Option(False, "--rerun", help="Recreate output directory (deletes existing)."),
     analysis_only: bool = typer.Option(False, "--analysis-only", help="Only run analysis using existing scrape outputs."),
     max_workers: int = typer.Option(10, "--max-workers", help="Concurrency limit."),
+    max_per_host: int = typer.Option(2, "--max-per-host", help="In-flight request cap per target host for self-hosted engines (0 = no cap)."),
+    dns_cache: bool = typer.Option(True, "--dns-cache/--no-dns-cache", help="Share a resolved-DNS cache across in-process requests of self-hosted engines."),
     dry_run: bool = typer.Option(False, "--dry-run", help="Run with temporary directory and clean up at the end."),
+    task_timeout: Optional[float] = typer.Option(None, "--task-timeout", help="Hard per-URL deadline in seconds, enforced for every engine type (default: engine's own timeouts)."),
+    max_body_bytes: Optional[int] = typer.Option(None, "--max-body-bytes", help="Cap on each scraped body in bytes; longer bodies are cut and marked truncated (default 20 MiB, 0 = no cap)."),
+    browser_cache_mb: int = typer.Option(0, "--browser-cache-mb", help="Give browser engines a persistent HTTP cache of this many MB per concurrent browser, reused across the run's pages and cleared between runs (0 = off)."),
+    content_codec: str = typer.Option("auto", "--content-codec", help="How scraped bodies are stored: auto (zstd if installed, else gzip), zstd, gzip, or inline in scrape_output.json."),
+    shard: Optional[str] = typer.Option(None, "--shard", help="Run only shard i of N (i/N, stable hash of task id), e.g. 0/4; combine shard outputs with `python -m evals.merge`."),
+    sample: Optional[int] = typer.Option(None, "--sample", help="Uniformly sample K tasks (before sharding, so shards split the same sample)."),
+    seed: int = typer.Option(0, "--seed", help="Seed for --sample."),
+    ids: Optional[str] = typer.Option(None, "--ids", help="Task id ranges, e.g. 1-100,250,300-."),
+    hosts: Optional[str] = typer.Option(None, "--hosts", help="Comma-separated hosts to keep (subdomains included)."),
+    min_truth_chars: Optional[int] = typer.Option(None, "--min-truth-chars", help="Skip tasks whose truth_text is shorter."),
+    max_truth_chars: Optional[int] = typer.Option(None, "--max-truth-chars", help="Skip tasks whose truth_text is longer."),
+    limit: Optional[int] = typer.Option(None, "--limit", help="Stop after this many selected tasks."),
+    task_order: Optional[str] = typer.Option(None, "--task-order", help="JSON {task_id: expected seconds}; tasks are started longest-first (written by run_all.py from previous runs)."),
+    log_level: str = typer.Option("info", "--log-level", help="Threshold for the JSONL event log in <output-dir>/logs/ (debug, info, notice, warning, error, off)."),
+    console_level: str = typer.Option("notice", "--console-level", help="Threshold for events echoed to stdout (debug = every task start/finish, notice = milestones only)."),
+    metrics_port: int = typer.Option(0, "--metrics-port", help="Serve live Prometheus metrics on 127.0.0.1:<port>/metrics and JSON on /status (0 = off)."),
+    status_interval: float = typer.Option(10.0, "--status-interval", help="Rewrite <output-dir>/results/<engine>_<suite>.status.json every N seconds (0 = off)."),
+    grade_cache: Optional[str] = typer.Option(None, "--grade-cache", help="Grading cache file shared across engines and runs (default <output-dir>/grade_cache.sqlite; off = disabled)."),
+    profile: bool = typer.Option(False, "--profile", help="Profile the run (phase timings, loop lag, sampled stacks and cProfile of analysis); artifacts go to <output-dir>/results/."),
 ):
+    """Scrape and grade the dataset with one engine."""
+    try:
+        resolve_codec(content_codec)
+        level_value(log_level)
+        level_value(console_level)
+    except (ValueError, RuntimeError) as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+
+    try:
+        selection = TaskSelection(
+            shard=parse_shard(shard) if shard else None,
+            sample=sample,
+            seed=seed,
+            id_ranges=parse_id_ranges(ids) if ids else [],
+            hosts=[h.strip().lower() for h in hosts.split(",") if h.strip()] if hosts else [],
+            min_truth_chars=min_truth_chars,
+            max_truth_chars=max_truth_chars,
+            limit=limit,
+        )
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+
+    if max_body_bytes is not None:
+        # Read by engines/shared/body.py, including in subprocess-based engines
+        os.environ["SCRAPE_MAX_BODY_BYTES"] = str(max(0, max_body_bytes))
+
     # Handle dry run with temporary directory
     if dry_run:
         temp_dir = tempfile.mkdtemp(prefix="scrapers_benchmark_dry_run_")
@@ -43,6 +100,12 @@ def run(
     
     engine_key = f"{scrape_engine}_{suite}"
     engine_out = base / engine_key
+    browser_cache_root = base / "browser_cache" / scrape_engine
+    if browser_cache_mb > 0 and not analysis_only:
+        # Read by engines/shared/browser_cache.py; every run starts cold
+        os.environ[CACHE_DIR_ENV] = str(browser_cache_root.parent)
+        os.environ[CACHE_MB_ENV] = str(browser_cache_mb)
+        reset_cache_root(browser_cache_root)
     # analysis-only must never mutate outputs; require existing per-engine outputs
     if analysis_only:
         if not engine_out.exists() or not any(engine_out.iterdir()):
@@ -55,6 +118,10 @@ def run(
     if suite != "quality":
         raise typer.Exit(code=1)
 
+    profiler = RunProfiler() if profile else None
+    metrics = LiveMetrics(scrape_engine, suite)
+    publisher = MetricsPublisher(metrics, port=metrics_port, status_path=base / "results" / f"{engine_key}.status.json", interval_s=status_interval)
+
     suite_impl = ContentQualitySuite(
         scrape_engine=scrape_engine,
         output_dir=base,
@@ -62,6 +129,17 @@ def run(
         max_workers=max_workers,
         dataset_csv=Path(dataset),
         lie_weight=lie_weight,
+        max_per_host=max_per_host,
+        dns_cache=dns_cache,
+        task_timeout=task_timeout,
+        content_codec=content_codec,
+        selection=selection,
+        task_order=read_json(Path(task_order)) if task_order else None,
+        profiler=profiler,
+        metrics=metrics,
+        log_level=log_level,
+        console_level=console_level,
+        grade_cache=resolve_cache_path(grade_cache, base),
     )
 
     import asyncio
@@ -69,7 +147,22 @@ def run(
     try:
         # In analysis-only mode, force resume=True to avoid directory checks blocking
         effective_resume = True if analysis_only else resume
-        asyncio.run(suite_impl.run(resume=effective_resume, analysis_only=analysis_only))
+        if profiler is not None:
+            profiler.start()
+        publisher.start()
+        if metrics_port:
+            typer.echo(f"[metrics] serving http://127.0.0.1:{metrics_port}/metrics")
+        try:
+            asyncio.run(suite_impl.run(resume=effective_resume, analysis_only=analysis_only))
+            metrics.set_phase("done")
+        finally:
+            publisher.stop()
+            if browser_cache_mb > 0 and not analysis_only:
+                reset_cache_root(browser_cache_root)
+            if profiler is not None:
+                profiler.stop()
+                for path in profiler.write(base / "results", engine_key):
+                    typer.echo(f"[profile] wrote {path}")
         
         # Clean up temporary directory for dry runs
         if dry_run:
@@ -86,7 +179,103 @@ def run(
         raise typer.Exit(code=1)
 
 
+@app.command()
+def worker(
+    queue: str = typer.Option(..., "--queue", help="SQLite queue file shared with the coordinator."),
+    engines: Optional[str] = typer.Option(None, "--engines", help="Comma-separated engines this worker serves (default: any)."),
+    max_workers: int = typer.Option(10, "--max-workers", help="Concurrency limit."),
+    batch: int = typer.Option(20, "--batch", help="Jobs leased at a time."),
+    lease_s: float = typer.Option(120.0, "--lease-s", help="Lease length; renewed by heartbeats every lease/3 seconds."),
+    max_attempts: int = typer.Option(3, "--max-attempts", help="Leases per job before it is marked failed."),
+    idle_exit_s: float = typer.Option(30.0, "--idle-exit-s", help="Exit after the queue has been empty this long."),
+    max_per_host: int = typer.Option(2, "--max-per-host", help="In-flight request cap per target host for self-hosted engines (0 = no cap)."),
+    dns_cache: bool = typer.Option(True, "--dns-cache/--no-dns-cache", help="Share a resolved-DNS cache across in-process requests of self-hosted engines."),
+    task_timeout: Optional[float] = typer.Option(None, "--task-timeout", help="Hard per-URL deadline in seconds."),
+    max_body_bytes: Optional[int] = typer.Option(None, "--max-body-bytes", help="Cap on each scraped body in bytes; longer bodies are cut and marked truncated (default 20 MiB, 0 = no cap)."),
+    browser_cache_mb: int = typer.Option(0, "--browser-cache-mb", help="Give browser engines a persistent HTTP cache of this many MB per concurrent browser, reused across the run's pages and cleared between runs (0 = off)."),
+    log_level: str = typer.Option("info", "--log-level", help="Threshold for the JSONL event log in logs/ next to the queue file (debug, info, notice, warning, error, off)."),
+    console_level: str = typer.Option("notice", "--console-level", help="Threshold for events echoed to stdout (info = every finished task, notice = milestones only)."),
+):
+    """Pull (engine, task) jobs from a queue until it stays empty."""
+    import asyncio
+
+    try:
+        level_value(log_level)
+        level_value(console_level)
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+    q = SQLiteQueue(Path(queue), lease_s=lease_s, max_attempts=max_attempts)
+    engine_list = [e.strip() for e in engines.split(",") if e.strip()] if engines else None
+    if max_body_bytes is not None:
+        os.environ["SCRAPE_MAX_BODY_BYTES"] = str(max(0, max_body_bytes))
+    browser_cache_root = None
+    if browser_cache_mb > 0:
+        # Private to this worker process, so workers sharing a host never share a profile
+        browser_cache_root = Path(tempfile.mkdtemp(prefix="scrape_evals_browser_cache_"))
+        os.environ[CACHE_DIR_ENV] = str(browser_cache_root)
+        os.environ[CACHE_MB_ENV] = str(browser_cache_mb)
+    try:
+        asyncio.run(run_worker(
+            q, engine_list, max_workers, batch, idle_exit_s, max_per_host=max_per_host, dns_cache=dns_cache,
+            task_timeout=task_timeout, log_level=log_level, console_level=console_level,
+        ))
+    finally:
+        q.close()
+        if browser_cache_root is not None:
+            reset_cache_root(browser_cache_root)
+
+
+@app.command()
+def coordinator(
+    queue: str = typer.Option(..., "--queue", help="SQLite queue file shared with the workers."),
+    engines: str = typer.Option(..., "--engines", help="Comma-separated engines to run."),
+    output_dir: str = typer.Option(..., "--output-dir", help="Output directory for artifacts and summary."),
+    dataset: str = typer.Option(..., "--dataset", help="Path to dataset CSV (id,url,truth_text,lie_text)."),
+    lie_weight: float = typer.Option(4.0, help="Weight for lie bigram penalty in ordered metrics."),
+    resume: bool = typer.Option(False, "--resume", help="Do not enqueue tasks already scraped in the output directory."),
+    lease_s: float = typer.Option(120.0, "--lease-s", help="Lease length used when re-queueing jobs of dead workers."),
+    max_attempts: int = typer.Option(3, "--max-attempts", help="Leases per job before it is marked failed."),
+    shard: Optional[str] = typer.Option(None, "--shard", help="Only enqueue shard i of N (i/N)."),
+    sample: Optional[int] = typer.Option(None, "--sample", help="Uniformly sample K tasks."),
+    seed: int = typer.Option(0, "--seed", help="Seed for --sample."),
+    ids: Optional[str] = typer.Option(None, "--ids", help="Task id ranges, e.g. 1-100,250,300-."),
+    grade_cache: Optional[str] = typer.Option(None, "--grade-cache", help="Grading cache file shared across engines and runs (default <output-dir>/grade_cache.sqlite; off = disabled)."),
+    log_level: str = typer.Option("info", "--log-level", help="Threshold for the JSONL event log in <output-dir>/logs/ (debug, info, notice, warning, error, off)."),
+    console_level: str = typer.Option("notice", "--console-level", help="Threshold for events echoed to stdout (info = every collected task, notice = milestones only)."),
+):
+    """Enqueue jobs, then store and grade results as workers deliver them and write the summaries."""
+    import asyncio
+
+    try:
+        level_value(log_level)
+        level_value(console_level)
+        selection = TaskSelection(
+            shard=parse_shard(shard) if shard else None,
+            sample=sample,
+            seed=seed,
+            id_ranges=parse_id_ranges(ids) if ids else [],
+        )
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+    tasks = load_selected_tasks(Path(dataset), selection)
+    engine_list = [e.strip() for e in engines.split(",") if e.strip()]
+    q = SQLiteQueue(Path(queue), lease_s=lease_s, max_attempts=max_attempts)
+    try:
+        asyncio.run(run_coordinator(
+            q, tasks, engine_list, Path(output_dir), lie_weight, resume,
+            grade_cache=resolve_cache_path(grade_cache, Path(output_dir)),
+            log_level=log_level, console_level=console_level,
+        ))
+    finally:
+        q.close()
+
+
 if __name__ == "__main__":
+    # `python run_eval.py --scrape_engine ...` predates the subcommands; treat it as `run`
+    if len(sys.argv) > 1 and sys.argv[1].startswith("-") and sys.argv[1] not in ("--help", "--install-completion", "--show-completion"):
+        sys.argv.insert(1, "run")
     app()
 
 
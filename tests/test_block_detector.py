@@ -0,0 +1,34 @@
+import pytest
+
+from evals.analysis.block_detector import detect_block
+
+ARTICLE = "<p>" + "Ordinary article text about gardening and soil. " * 40 + "</p>"
+
+# Real pages that mention vendor markers without being blocked
+FALSE_POSITIVES = [
+    (
+        "html",
+        "<html><head><title>Tomato growing guide</title></head><body>" + ARTICLE
+        + "<script>(function(){var s=document.createElement('script');"
+        "s.src='/cdn-cgi/challenge-platform/scripts/jsd/main.js';document.head.appendChild(s);})();</script>"
+        "</body></html>",
+    ),
+    ("html", "<html><head><title>Blog</title></head><body><script src=\"/cdn-cgi/challenge-platform/h/b/scripts/jsd/abc/main.js\"></script>" + ARTICLE + "</body></html>"),
+    ("markdown", "# Soil basics\n\nOur article about access denied errors in web servers.\n\n" + ARTICLE),
+    ("text", "Gardening weekly\n" + ARTICLE),
+]
+
+TRUE_POSITIVES = [
+    ("html", "<html><head><title>Just a moment...</title></head><body><div id=\"cf-browser-verification\"></div></body></html>", "cloudflare:challenge"),
+    ("html", "<html><head><title>Attention Required! | Cloudflare</title></head><body>Sorry, you have been blocked</body></html>", "cloudflare:challenge"),
+]
+
+
+@pytest.mark.parametrize("fmt,text", FALSE_POSITIVES)
+def test_real_pages_are_not_blocks(fmt, text):
+    assert detect_block(text, fmt) is None
+
+
+@pytest.mark.parametrize("fmt,text,expected", TRUE_POSITIVES)
+def test_challenge_pages_are_detected(fmt, text, expected):
+    assert detect_block(text, fmt) == expected
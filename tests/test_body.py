@@ -0,0 +1,63 @@
+from engines.shared.body import cap_bytes, cap_text, read_response
+
+
+class FakeResponse:
+    """The parts of a streamed `requests` response that read_response uses."""
+
+    def __init__(self, data: bytes, encoding="utf-8", chunk=7):
+        self.data = data
+        self.encoding = encoding
+        self.chunk = chunk
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.data), self.chunk):
+            self.read += len(self.data[i:i + self.chunk])
+            yield self.data[i:i + self.chunk]
+
+    def close(self):
+        self.closed = True
+
+
+def test_cap_text_at_the_cap():
+    assert cap_text("a" * 10, limit=10) == ("a" * 10, 10, False)
+    assert cap_text("a" * 11, limit=10) == ("a" * 10, 10, True)
+    assert cap_text("a" * 11, limit=0) == ("a" * 11, 11, False)
+
+
+def test_cap_text_drops_a_split_multibyte_character():
+    # "é" is 2 bytes and "☃" 3, so "abcdé" ends at byte 6 and the first snowman at byte 9
+    text = "abcdé☃☃"
+    assert cap_text(text, limit=5) == ("abcd", 4, True)
+    assert cap_text(text, limit=8) == ("abcdé", 6, True)
+    assert cap_text(text, limit=9) == ("abcdé☃", 9, True)
+
+
+def test_cap_bytes_at_the_cap():
+    assert cap_bytes(b"x" * 10, limit=10) == ("x" * 10, 10, False)
+    assert cap_bytes(b"x" * 11, limit=10) == ("x" * 10, 10, True)
+    assert cap_bytes(None, limit=10) == ("", 0, False)
+
+
+def test_cap_bytes_split_multibyte_character():
+    data = "ab☃".encode("utf-8")
+    text, size, truncated = cap_bytes(data, limit=4)
+    assert size == 4 and truncated
+    assert text.startswith("ab") and "☃" not in text
+
+
+def test_read_response_stops_at_env_cap(monkeypatch):
+    monkeypatch.setenv("SCRAPE_MAX_BODY_BYTES", "20")
+    response = FakeResponse(b"y" * 1000)
+    assert read_response(response) == ("y" * 20, 20, True)
+    # Reading stops at the chunk that crosses the cap instead of draining the body
+    assert response.read < 30
+    assert response.closed
+
+
+def test_read_response_uncapped(monkeypatch):
+    monkeypatch.setenv("SCRAPE_MAX_BODY_BYTES", "0")
+    response = FakeResponse("café".encode("latin-1"), encoding="latin-1")
+    assert read_response(response) == ("café", 4, False)
+    assert response.closed
@@ -0,0 +1,58 @@
+import gzip
+
+import pytest
+
+from evals.io_utils import UnreadableContentError, read_scrape_output, write_scrape_output, zstandard
+from evals.suites.types import ScrapeOutput
+
+CODECS = ["inline", "gzip", pytest.param("zstd", marks=pytest.mark.skipif(zstandard is None, reason="zstandard not installed"))]
+BLOBS = {"gzip": "content.gz", "zstd": "content.zst"}
+
+
+def _output(content):
+    return ScrapeOutput(
+        scraper="rest_scraper", url="http://a.example/", status_code=200, error=None,
+        created_at="2024-01-01T00:00:00", format="html", content_size=len(content.encode("utf-8")), content=content,
+    )
+
+
+def _write(tmp_path, codec, content="<p>café ☃ page</p>" * 200):
+    path = tmp_path / "1" / "scrape_output.json"
+    write_scrape_output(path, _output(content), codec)
+    return path, content
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_round_trip(tmp_path, codec):
+    path, content = _write(tmp_path, codec)
+    assert (path.parent / BLOBS[codec]).exists() if codec in BLOBS else not list(path.parent.glob("content.*"))
+    out = read_scrape_output(path, "rest_scraper", "http://a.example/")
+    assert out.content == content
+    assert out.content_hash is not None
+    # Metadata-only reads leave blob-backed bodies on disk
+    lazy = read_scrape_output(path, "rest_scraper", "http://a.example/", load_content=False)
+    assert lazy.content == (content if codec == "inline" else None)
+
+
+@pytest.mark.parametrize("codec", [c for c in CODECS if c != "inline"])
+@pytest.mark.parametrize("damage", ["truncated", "corrupt", "empty"])
+def test_damaged_blob_is_unreadable(tmp_path, codec, damage):
+    path, _ = _write(tmp_path, codec)
+    blob = path.parent / BLOBS[codec]
+    data = blob.read_bytes()
+    if damage == "truncated":
+        data = data[: len(data) // 2]
+    elif damage == "corrupt":
+        data = data[:12] + bytes(b ^ 0xFF for b in data[12:40]) + data[40:]
+    else:
+        data = b""
+    blob.write_bytes(data)
+    with pytest.raises(UnreadableContentError):
+        read_scrape_output(path, "rest_scraper", "http://a.example/")
+
+
+def test_blob_not_matching_its_hash_is_unreadable(tmp_path):
+    path, _ = _write(tmp_path, "gzip")
+    (path.parent / "content.gz").write_bytes(gzip.compress(b"another page"))
+    with pytest.raises(UnreadableContentError):
+        read_scrape_output(path, "rest_scraper", "http://a.example/")
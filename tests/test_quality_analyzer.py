@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from evals.analysis.quality_analyzer import lcs_length, score_content
+
+
+def _naive_lcs(a, b):
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        row = [0]
+        for j, y in enumerate(b):
+            row.append(prev[j] + 1 if x == y else max(prev[j + 1], row[j]))
+        prev = row
+    return prev[-1]
+
+
+def _set_window_scores(content, truth):
+    """The set-based sliding window the analyzer used before the one-pass rewrite."""
+    if not content or not truth:
+        return 0.0, 0.0, 0.0
+    win = max(len(truth), 1)
+    best_recall = best_precision = 0.0
+    truth_set = set(truth)
+    for i in range(0, max(len(content) - win + 1, 1)):
+        wset = set(content[i:i + win])
+        recall = len(wset & truth_set) / max(len(truth_set), 1)
+        precision = len(wset & truth_set) / max(len(wset), 1)
+        if (recall > best_recall) or (abs(recall - best_recall) < 1e-9 and precision > best_precision):
+            best_recall, best_precision = recall, precision
+    f1 = 2 * best_precision * best_recall / (best_precision + best_recall) if best_recall + best_precision > 0 else 0.0
+    return best_recall, best_precision, f1
+
+
+def _words(rng, n, vocab=8):
+    return [f"w{rng.randrange(vocab)}" for _ in range(n)]
+
+
+def test_lcs_length_matches_dynamic_programming():
+    rng = random.Random(0)
+    for _ in range(1000):
+        a = [rng.randrange(6) for _ in range(rng.randrange(0, 80))]
+        b = [rng.randrange(6) for _ in range(rng.randrange(0, 80))]
+        assert lcs_length(a, b) == _naive_lcs(a, b)
+
+
+def test_window_scores_match_set_based_baseline():
+    rng = random.Random(1)
+    for _ in range(1000):
+        content = _words(rng, rng.randrange(0, 60))
+        truth = _words(rng, rng.randrange(1, 15))
+        scores = score_content(content, truth, [])
+        assert (scores.recall, scores.precision, scores.f1) == pytest.approx(_set_window_scores(content, truth))
+
+
+def test_ordered_precision_falls_as_lie_bigrams_appear():
+    truth = "the quick brown fox jumps over the lazy dog".split()
+    lie = "home about contact privacy policy terms".split()
+    precisions = [
+        score_content(lie[:k] + truth, truth, lie).ordered_precision
+        for k in range(0, len(lie) + 1)
+    ]
+    assert precisions[0] == 1.0
+    assert all(later < earlier for earlier, later in zip(precisions[1:], precisions[2:]))
+    assert precisions[-1] < precisions[0]
+
+
+def test_shuffled_truth_keeps_recall_but_loses_order():
+    truth = "alpha beta gamma delta epsilon zeta eta theta".split()
+    shuffled = list(reversed(truth))
+    scores = score_content(shuffled, truth, [])
+    assert scores.recall == 1.0
+    assert scores.order_score < 1.0
+    assert score_content(truth, truth, []).order_score == 1.0
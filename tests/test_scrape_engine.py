@@ -0,0 +1,86 @@
+import asyncio
+import threading
+from datetime import datetime
+
+from engines.base import ScrapeResult
+from evals.engines.scrape_engine import ScrapeEngine
+from evals.suites.types import Task
+
+
+class RecordingScraper:
+    """Async engine that records the order in which scrape() calls start."""
+
+    self_hosted = True
+    started = []
+
+    async def scrape(self, url: str, run_id: str) -> ScrapeResult:
+        RecordingScraper.started.append(url)
+        await asyncio.sleep(0.001)
+        return ScrapeResult(
+            run_id=run_id, scraper="rest_scraper", url=url, status_code=200, error=None,
+            content_size=2, format="html", created_at=datetime.now().isoformat(), content="ok",
+        )
+
+    def check_environment(self) -> bool:
+        return True
+
+
+def _engine(max_workers: int, max_per_host: int = 0) -> ScrapeEngine:
+    engine = ScrapeEngine("rest_scraper", max_workers=max_workers, max_per_host=max_per_host, dns_cache=False)
+    engine.scraper_cls = RecordingScraper
+    RecordingScraper.started = []
+    return engine
+
+
+def _tasks(urls):
+    return [Task(id=str(i), url=url, truth_text="", lie_text="") for i, url in enumerate(urls)]
+
+
+def test_tasks_start_in_list_order():
+    # --task-order / longest-first ordering is only useful if the list order is kept
+    urls = [f"http://host{i}.example/page" for i in range(30)]
+    engine = _engine(max_workers=2)
+    asyncio.run(engine.scrape_tasks(_tasks(urls), run_id="r"))
+    assert RecordingScraper.started == urls
+
+
+def test_host_interleaving_is_kept():
+    urls = [f"http://a.example/{i}" for i in range(4)] + [f"http://b.example/{i}" for i in range(4)]
+    engine = _engine(max_workers=1, max_per_host=1)
+    asyncio.run(engine.scrape_tasks(_tasks(urls), run_id="r"))
+    hosts = [url.split("/")[2] for url in RecordingScraper.started]
+    assert hosts == ["a.example", "b.example"] * 4
+
+
+class HangingScraper:
+    """Sync engine whose /hang pages block until released, past any deadline."""
+
+    self_hosted = True
+    release = None
+
+    def scrape(self, url: str, run_id: str) -> ScrapeResult:
+        if url.endswith("/hang"):
+            HangingScraper.release.wait(10)
+        return ScrapeResult(
+            run_id=run_id, scraper="rest_scraper", url=url, status_code=200, error=None,
+            content_size=2, format="html", created_at=datetime.now().isoformat(), content="ok",
+        )
+
+    def check_environment(self) -> bool:
+        return True
+
+
+def test_abandoned_sync_calls_do_not_starve_later_tasks():
+    # Threads of calls abandoned at the deadline keep running; queued calls must still get
+    # a thread and their own full deadline
+    urls = [f"http://h{i}.example/hang" for i in range(3)] + [f"http://f{i}.example/" for i in range(3)]
+    engine = ScrapeEngine("rest_scraper", max_workers=1, task_timeout=0.3, dns_cache=False)
+    engine.scraper_cls = HangingScraper
+    HangingScraper.release = threading.Event()
+    try:
+        results = asyncio.run(engine.scrape_tasks(_tasks(urls), run_id="r"))
+    finally:
+        HangingScraper.release.set()
+    errors = {t.url: out.error for t, out in results}
+    assert all(errors[url] and errors[url].startswith("Timeout") for url in urls[:3])
+    assert all(errors[url] is None for url in urls[3:])
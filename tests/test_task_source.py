@@ -0,0 +1,21 @@
+import pytest
+
+from evals.suites.types import Task
+from evals.task_source import TaskSelection, parse_id_ranges
+
+
+def test_parse_id_ranges():
+    assert parse_id_ranges("1-100, 250,300-,abc") == [("1", "100"), ("250", "250"), ("300", None), ("abc", "abc")]
+
+
+@pytest.mark.parametrize("spec", ["a-b", "1-b", "x-", "1-2-3", "10-2"])
+def test_parse_id_ranges_rejects_bad_bounds(spec):
+    with pytest.raises(ValueError):
+        parse_id_ranges(spec)
+
+
+def test_id_ranges_select_numeric_ids():
+    selection = TaskSelection(id_ranges=parse_id_ranges("2-3,abc"))
+    ids = ["1", "2", "3", "4", "abc", "x2"]
+    tasks = [Task(id=i, url=f"http://h{i}.example/", truth_text="", lie_text="") for i in ids]
+    assert [t.id for t in tasks if selection.matches(t)] == ["2", "3", "abc"]
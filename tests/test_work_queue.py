@@ -0,0 +1,38 @@
+import time
+
+from evals.suites.types import ScrapeOutput, Task
+from evals.work_queue import SQLiteQueue
+
+
+def _output(task: Task) -> ScrapeOutput:
+    return ScrapeOutput(
+        scraper="rest_scraper", url=task.url, status_code=200, error=None,
+        created_at="2024-01-01T00:00:00", format="html", content_size=2, content="ok",
+    )
+
+
+def _failed_and_collected(tmp_path):
+    queue = SQLiteQueue(tmp_path / "queue.sqlite", lease_s=0.0, max_attempts=1)
+    task = Task(id="1", url="http://a.example/", truth_text="", lie_text="")
+    queue.enqueue("rest_scraper", [task])
+    (job,) = queue.lease("w1", batch=1)
+    time.sleep(0.01)
+    queue.requeue_expired()
+    rows = queue.uncollected()
+    assert [r[3] for r in rows] == ["failed"]
+    return queue, job, rows
+
+
+def test_late_result_replaces_collected_failure(tmp_path):
+    queue, job, rows = _failed_and_collected(tmp_path)
+    queue.mark_collected((r[0], r[3]) for r in rows)
+    assert queue.complete(job.id, _output(job.task))
+    # Collected again, now as a result, so the coordinator stores it over the failure
+    assert [r[3] for r in queue.uncollected()] == ["done"]
+
+
+def test_result_arriving_during_collection_is_not_lost(tmp_path):
+    queue, job, rows = _failed_and_collected(tmp_path)
+    assert queue.complete(job.id, _output(job.task))
+    queue.mark_collected((r[0], r[3]) for r in rows)
+    assert [r[3] for r in queue.uncollected()] == ["done"]